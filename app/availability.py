@@ -0,0 +1,184 @@
+"""Bookable start times from opening hours minus existing bookings.
+
+Everything works on whole intervals expressed as integer minutes from the
+start of the queried range: merge the busy intervals, subtract them from the
+opening windows in one sorted sweep, then step through what is left. Cost is
+O((windows + bookings) log bookings + slots), independent of range length in
+minutes.
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import exists, select
+
+from app import models
+from app.schedule import opening_hours
+
+# opening hours are stored as wall-clock times without a zone
+BUSINESS_TIMEZONE = ZoneInfo(os.getenv("BUSINESS_TIMEZONE", "Australia/Sydney"))
+
+MAX_BOOKING_LENGTH = timedelta(days=1)
+
+
+def merge(intervals):
+    """Sort and coalesce overlapping or touching ``(start, end)`` intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def subtract(windows, busy):
+    """``windows`` minus ``busy``; both sorted and non-overlapping."""
+    free = []
+    i = 0
+    for start, end in windows:
+        # skip busy intervals that finish before this window starts
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        j = i
+        cursor = start
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] > cursor:
+                free.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def slot_starts(free, duration, step):
+    """Start offsets on the ``step`` grid where ``duration`` fits in ``free``."""
+    starts = []
+    for start, end in free:
+        first = -(-start // step) * step
+        starts.extend(range(first, end - duration + 1, step))
+    return starts
+
+
+def compute_slots(origin, windows, bookings, duration_mins, step_mins):
+    """Free start datetimes for a ``duration_mins`` appointment.
+
+    ``windows`` and ``bookings`` are ``(start, end)`` aware datetimes;
+    ``origin`` is the aware datetime the step grid is aligned to. Offsets are
+    taken in UTC so a DST change inside the range can't skew them.
+    """
+    origin = origin.astimezone(timezone.utc)
+
+    def minutes(moment):
+        return int((moment.astimezone(timezone.utc) - origin).total_seconds() // 60)
+
+    open_ = merge((minutes(start), minutes(end)) for start, end in windows)
+    busy = merge((minutes(start), minutes(end)) for start, end in bookings)
+    free = subtract(open_, busy)
+    return [
+        (origin + timedelta(minutes=offset)).astimezone(BUSINESS_TIMEZONE)
+        for offset in slot_starts(free, duration_mins, step_mins)
+    ]
+
+
+async def services_duration(db, business_id, service_ids):
+    """Total duration of ``service_ids``, or None if any isn't the business's."""
+    service_ids = set(service_ids)
+    rows = (
+        await db.execute(
+            select(models.Service.id, models.Service.duration_mins)
+            .join(models.ServiceCategory)
+            .where(
+                models.ServiceCategory.business_id == business_id,
+                models.Service.id.in_(service_ids),
+            )
+        )
+    ).all()
+    if len(rows) != len(service_ids):
+        return None
+    return sum(duration for _, duration in rows)
+
+
+async def opening_windows(db, business_id, start: date, end: date):
+    hours = await opening_hours(db, business_id, start, end)
+    return [
+        (
+            datetime.combine(day, opens, BUSINESS_TIMEZONE),
+            datetime.combine(day, closes, BUSINESS_TIMEZONE),
+        )
+        for day, opens, closes in hours
+    ]
+
+
+async def has_staff(db, business_id):
+    return await db.scalar(
+        select(exists().where(models.Staff.business_id == business_id))
+    )
+
+
+async def booking_intervals(db, business_id, start: datetime, end: datetime):
+    """``(staff_id, start, end)`` of every booking overlapping ``[start, end)``."""
+    rows = await db.execute(
+        select(
+            models.Booking.staff_id, models.Booking.time, models.Booking.ends_at
+        ).where(
+            models.Booking.business_id == business_id,
+            # implied by ends_at > start, as a booking fits in one day's
+            # opening hours; a bound on time lets Postgres skip partitions
+            models.Booking.time > start - MAX_BOOKING_LENGTH,
+            models.Booking.time < end,
+            models.Booking.ends_at > start,
+        )
+    )
+    return rows.all()
+
+
+async def find_slots(db, business_id, start: date, days, service_ids, step_mins):
+    """Bookable slots for ``days`` days from ``start``.
+
+    A business with staff is booked per staff member, so a slot is free
+    while anyone is; bookings made before it had staff block everyone.
+
+    Returns None if a service doesn't belong to the business.
+    """
+    duration = step_mins
+    if service_ids:
+        duration = await services_duration(db, business_id, service_ids)
+        if duration is None:
+            return None
+
+    end = start + timedelta(days=days)
+    origin = datetime.combine(start, datetime.min.time(), BUSINESS_TIMEZONE)
+    windows = await opening_windows(db, business_id, start, end)
+    bookings = await booking_intervals(
+        db,
+        business_id,
+        origin,
+        datetime.combine(end, datetime.min.time(), BUSINESS_TIMEZONE),
+    )
+    staff_ids = (
+        await db.scalars(
+            select(models.Staff.id).where(models.Staff.business_id == business_id)
+        )
+    ).all()
+    if not staff_ids:
+        busy = [(time, ends_at) for _, time, ends_at in bookings]
+        return duration, compute_slots(origin, windows, busy, duration, step_mins)
+
+    shared = [
+        (time, ends_at) for staff_id, time, ends_at in bookings if staff_id is None
+    ]
+    busy = {staff_id: list(shared) for staff_id in staff_ids}
+    for staff_id, time, ends_at in bookings:
+        if staff_id in busy:
+            busy[staff_id].append((time, ends_at))
+    slots = set().union(
+        *(
+            compute_slots(origin, windows, staff_busy, duration, step_mins)
+            for staff_busy in busy.values()
+        )
+    )
+    return duration, sorted(slots)
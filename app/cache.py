@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# channel the business_changed triggers publish on, see revision 3e8b6d0f12ac
+CHANNEL = "business_changed"
+
+# rendered views of a business that are cached; invalidation drops them all
+VIEWS = ("business", "profile")
+
+
+class TTLCache:
+    """Bounded mapping with a per-entry TTL and LRU eviction.
+
+    Not thread-safe: it is only touched from the event loop.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key):
+        item = self._data.pop(key, None)
+        return None if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class BusinessCache:
+    """Rendered business payloads, versioned like their ETags.
+
+    Writes anywhere in a business graph bump the parent's ``updated_at`` (or,
+    for ratings, the stats row's) and publish it on ``CHANNEL``. Every worker
+    evicts on that notification and remembers the version, so a slow read
+    that started before the write can't put the old payload back afterwards.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.entries = TTLCache(maxsize, ttl)
+        self._invalidated = OrderedDict()
+        self.invalidations = 0
+
+    def get(self, business_id, view):
+        return self.entries.get((business_id, view))
+
+    def set(self, business_id, view, version, body):
+        seen = self._invalidated.get(business_id)
+        if seen is not None and version < seen:
+            return
+        self.entries.set((business_id, view), body)
+
+    def invalidate(self, business_id, version):
+        for view in VIEWS:
+            self.entries.pop((business_id, view))
+        self._invalidated[business_id] = version
+        self._invalidated.move_to_end(business_id)
+        while len(self._invalidated) > self.entries.maxsize:
+            self._invalidated.popitem(last=False)
+        self.invalidations += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {**self.entries.stats(), "invalidations": self.invalidations}
+
+
+business_cache = BusinessCache(
+    maxsize=int(os.getenv("BUSINESS_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("BUSINESS_CACHE_TTL", "60")),
+)
+
+
+async def listen_for_invalidations(cache=business_cache, retry_s=5.0):
+    """Evict cache entries on ``business_changed`` notifications, forever.
+
+    Runs on a dedicated asyncpg connection since a LISTEN has to outlive any
+    pooled session. Anything published while disconnected is lost, so the
+    cache is cleared every time the listener (re)connects.
+    """
+    dsn = make_url(DATABASE_URL).set(drivername="postgresql")
+    dsn = dsn.render_as_string(hide_password=False)
+
+    def on_notify(connection, pid, channel, payload):
+        message = json.loads(payload)
+        cache.invalidate(
+            UUID(message["id"]), datetime.fromisoformat(message["version"])
+        )
+
+    while True:
+        try:
+            connection = await asyncpg.connect(dsn)
+        except (OSError, asyncpg.PostgresError):
+            logger.warning("cache listener could not connect, retrying")
+            await asyncio.sleep(retry_s)
+            continue
+
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        try:
+            await connection.add_listener(CHANNEL, on_notify)
+            cache.clear()
+            await closed.wait()
+            logger.warning("cache listener connection lost, reconnecting")
+        finally:
+            if not connection.is_closed():
+                await connection.close()
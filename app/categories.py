@@ -0,0 +1,85 @@
+"""Check ``service_categories`` figures against the services they summarize.
+
+``price_from``, ``min_duration_mins`` and ``max_duration_mins`` are kept by
+the ``services_category_figures`` trigger. This job recomputes them for every
+category in one pass, reports each category whose stored figures differ,
+then (unless ``--dry-run``) overwrites just those. Service writes wait on a
+SHARE lock while it runs, so nothing changes between check and fix.
+
+    python -m app.categories [--dry-run]
+"""
+
+import argparse
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+
+FIGURES = ("price_from", "min_duration_mins", "max_duration_mins")
+
+ACTUAL = """
+    actual AS (
+        SELECT
+            c.id,
+            min(s.price) AS price_from,
+            min(s.duration_mins) AS min_duration_mins,
+            max(s.duration_mins) AS max_duration_mins
+        FROM service_categories c
+        LEFT JOIN services s ON s.service_category_id = c.id
+        GROUP BY c.id
+    )
+"""
+
+DIFFERS = f"""
+    ({", ".join(f"c.{f}" for f in FIGURES)})
+    IS DISTINCT FROM
+    ({", ".join(f"a.{f}" for f in FIGURES)})
+"""
+
+DRIFT = text(f"""
+    WITH {ACTUAL}
+    SELECT
+        c.id,
+        c.name,
+        {", ".join(f"c.{f} AS stored_{f}" for f in FIGURES)},
+        {", ".join(f"a.{f} AS actual_{f}" for f in FIGURES)}
+    FROM service_categories c
+    JOIN actual a USING (id)
+    WHERE {DIFFERS}
+""")
+
+FIX = text(f"""
+    WITH {ACTUAL}
+    UPDATE service_categories c
+    SET {", ".join(f"{f} = a.{f}" for f in FIGURES)}
+    FROM actual a
+    WHERE a.id = c.id AND {DIFFERS}
+""")
+
+
+def check(dry_run=False):
+    """Return the drifted categories; fix them unless dry_run."""
+    with SessionLocal() as db:
+        db.execute(text("LOCK TABLE services IN SHARE MODE"))
+        drift = db.execute(DRIFT).mappings().all()
+        if drift and not dry_run:
+            db.execute(FIX)
+        db.commit()
+    return drift
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    drift = check(args.dry_run)
+    for row in drift:
+        changes = ", ".join(
+            f"{f} {row[f'stored_{f}']} -> {row[f'actual_{f}']}"
+            for f in FIGURES
+            if row[f"stored_{f}"] != row[f"actual_{f}"]
+        )
+        print(f"{row['id']} ({row['name']}): {changes}")
+    action = "found" if args.dry_run else "fixed"
+    print(f"{len(drift)} drifted categories {action}")
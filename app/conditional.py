@@ -0,0 +1,67 @@
+"""HTTP validators for conditional GET.
+
+Versions come from ``updated_at`` columns, which the business_changed
+triggers keep current across a business's whole graph, so a validator costs
+an index lookup instead of loading and serializing the payload.
+"""
+
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi.responses import Response
+
+
+def etag(*parts) -> str:
+    digest = hashlib.blake2b(
+        "|".join(map(str, parts)).encode(), digest_size=12
+    ).hexdigest()
+    # weak: equal versions mean equivalent payloads, not byte-identical ones
+    return f'W/"{digest}"'
+
+
+def validators(tag, modified) -> dict:
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def _opaque(tag):
+    return tag.strip().removeprefix("W/")
+
+
+def is_fresh(request_headers, tag, modified) -> bool:
+    """True when the client's copy is current (RFC 9110 section 13.2.2).
+
+    ``If-None-Match`` wins when present; ``If-Modified-Since`` only has
+    one-second resolution, so ``modified`` is truncated before comparing.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(tag) in {_opaque(t) for t in if_none_match.split(",")}
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def is_conditional(request_headers) -> bool:
+    return (
+        "if-none-match" in request_headers or "if-modified-since" in request_headers
+    )
+
+
+def not_modified(headers) -> Response:
+    return Response(status_code=304, headers=headers)
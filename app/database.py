@@ -1,15 +1,52 @@
 import os
 
 from dotenv import load_dotenv
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from app.instrumentation import instrument
+from app.pool import TimedAsyncQueuePool, TimedQueuePool
+from app.replicas import ReplicaSet, pinned_to_primary
+from app.settings import load_settings
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# APP_ENV picks the dev/test/prod profile, DB_* variables override it
+settings = load_settings()
+
+
+def _asyncpg_url(url):
+    return (
+        make_url(url)
+        .set(drivername="postgresql+asyncpg")
+        .render_as_string(hide_password=False)
+    )
+
+
+# same database, reached through asyncpg for the async request path
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _asyncpg_url(DATABASE_URL)
+
+# comma-separated streaming replicas of DATABASE_URL for read-only routes
+REPLICA_DATABASE_URLS = [
+    url.strip()
+    for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",")
+    if url.strip()
+]
+# how long a client's reads stay on the primary after it writes
+REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
 # connect_args needed for SQLite only; for Postgres this is fine as is
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=TimedQueuePool,
+    connect_args={"options": settings.libpq_options()},
+    **settings.engine_kwargs(),
+)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -17,13 +54,67 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncQueuePool,
+    connect_args={"server_settings": settings.server_settings()},
+    **settings.engine_kwargs(),
+)
+
+# expire_on_commit=False so objects stay readable after the session closes
+# without an implicit (and in async code, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+replicas = ReplicaSet(
+    [
+        create_async_engine(
+            _asyncpg_url(url),
+            poolclass=TimedAsyncQueuePool,
+            connect_args={"server_settings": settings.server_settings()},
+            **settings.engine_kwargs(),
+        )
+        for url in REPLICA_DATABASE_URLS
+    ],
+    strategy=os.getenv("REPLICA_STRATEGY", "round_robin"),
+    max_lag_bytes=int(os.getenv("REPLICA_MAX_LAG_BYTES", str(16 * 1024**2))),
+)
+
+instrument(
+    engine,
+    async_engine.sync_engine,
+    *(replica.engine.sync_engine for replica in replicas.replicas),
+)
+
 Base = declarative_base()
 
 
-# Dependency to use in FastAPI routes
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Session for read-only routes: a healthy replica, else the primary.
+
+    Clients that wrote within the last ``REPLICA_PIN_SECONDS`` stay on the
+    primary, see ``PrimaryPinMiddleware``.
+    """
+    bind = None if pinned_to_primary(request.cookies) else replicas.choose()
+    if bind is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        async with AsyncSessionLocal(bind=bind) as db:
+            yield db
@@ -0,0 +1,181 @@
+"""Streaming export of a business's bookings.
+
+The bookings query runs on a server-side cursor (``yield_per``) and is
+consumed one partition at a time. For each chunk, one ``IN`` query fetches
+the services of just those bookings, then the chunk is encoded, handed to
+the response and dropped. User and rating are one-to-one, so they come
+joined into the cursor query. Memory is bounded by ``CHUNK_SIZE`` however
+many bookings the business has.
+"""
+
+import csv
+import io
+from datetime import datetime, time
+
+from sqlalchemy import select, text
+
+from app import models, schemas
+from app.availability import BUSINESS_TIMEZONE
+from app.database import AsyncSessionLocal
+from app.responses import render
+
+CHUNK_SIZE = 2000
+
+# an export legitimately outlives the pool's statement timeout, and sits idle
+# in its transaction while a slow client drains the response
+EXPORT_TIMEOUTS = text(
+    "SELECT set_config('statement_timeout', '0', true), "
+    "set_config('idle_in_transaction_session_timeout', '300000', true)"
+)
+
+CSV_COLUMNS = (
+    "booking_id",
+    "id",
+    "time",
+    "ends_at",
+    "created_at",
+    "user_id",
+    "user_first_name",
+    "user_last_name",
+    "user_email",
+    "service_ids",
+    "service_names",
+    "duration_mins",
+    "price",
+    "rating_stars",
+    "rating_description",
+)
+
+BOOKINGS = (
+    select(
+        models.Booking.id,
+        models.Booking.booking_id,
+        models.Booking.time,
+        models.Booking.ends_at,
+        models.Booking.created_at,
+        models.User.id.label("user_id"),
+        models.User.first_name,
+        models.User.last_name,
+        models.User.email,
+        models.Rating.stars,
+        models.Rating.description,
+    )
+    .join(models.User, models.User.id == models.Booking.user_id)
+    .outerjoin(models.Rating, models.Rating.booking_id == models.Booking.id)
+)
+
+
+async def _services(db, booking_ids):
+    booking_services = models.booking_services
+    rows = await db.execute(
+        select(
+            booking_services.c.booking_id,
+            models.Service.id,
+            models.Service.name,
+            models.Service.duration_mins,
+            models.Service.price,
+        )
+        .join(models.Service, models.Service.id == booking_services.c.service_id)
+        .where(booking_services.c.booking_id.in_(booking_ids))
+        .order_by(booking_services.c.booking_id, models.Service.name)
+    )
+    by_booking = {}
+    for booking_id, *service in rows:
+        by_booking.setdefault(booking_id, []).append(
+            dict(zip(("id", "name", "duration_mins", "price"), service))
+        )
+    return by_booking
+
+
+def _export(row, services):
+    return {
+        "id": row.id,
+        "booking_id": row.booking_id,
+        "time": row.time,
+        "ends_at": row.ends_at,
+        "created_at": row.created_at,
+        "user": {
+            "id": row.user_id,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "email": row.email,
+        },
+        "services": services,
+        "rating": (
+            None
+            if row.stars is None
+            else {"stars": row.stars, "description": row.description}
+        ),
+    }
+
+
+async def booking_chunks(
+    bind, business_id, start=None, end=None, chunk_size=CHUNK_SIZE
+):
+    """Lists of export dicts, ``chunk_size`` bookings at a time, by time.
+
+    Opens its own session on ``bind``: a streaming response outlives the
+    request's dependencies. ``start`` and ``end`` are local dates, ``end``
+    exclusive.
+    """
+    stmt = BOOKINGS.where(models.Booking.business_id == business_id)
+    if start is not None:
+        since = datetime.combine(start, time.min, tzinfo=BUSINESS_TIMEZONE)
+        stmt = stmt.where(models.Booking.time >= since)
+    if end is not None:
+        until = datetime.combine(end, time.min, tzinfo=BUSINESS_TIMEZONE)
+        stmt = stmt.where(models.Booking.time < until)
+    stmt = stmt.order_by(models.Booking.time, models.Booking.id)
+
+    async with AsyncSessionLocal(bind=bind) as db:
+        await db.execute(EXPORT_TIMEOUTS)
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            services = await _services(db, [row.id for row in rows])
+            yield [_export(row, services.get(row.id, [])) for row in rows]
+
+
+async def ndjson(chunks):
+    async for chunk in chunks:
+        yield b"".join(
+            render(schemas.booking_export_adapter, booking) + b"\n"
+            for booking in chunk
+        )
+
+
+def _csv_row(booking):
+    user, services, rating = booking["user"], booking["services"], booking["rating"]
+    return (
+        booking["booking_id"],
+        booking["id"],
+        booking["time"].isoformat(),
+        booking["ends_at"].isoformat(),
+        booking["created_at"].isoformat(),
+        user["id"],
+        user["first_name"],
+        user["last_name"],
+        user["email"],
+        ";".join(str(service["id"]) for service in services),
+        ";".join(service["name"] for service in services),
+        sum(service["duration_mins"] for service in services),
+        sum(service["price"] for service in services),
+        "" if rating is None else rating["stars"],
+        "" if rating is None else rating["description"] or "",
+    )
+
+
+def _drain(buffer):
+    data = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+async def csv_rows(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield _drain(buffer)
+    async for chunk in chunks:
+        writer.writerows(_csv_row(booking) for booking in chunk)
+        yield _drain(buffer)
@@ -0,0 +1,202 @@
+"""Sparse fieldsets: ``?fields=`` picks the parts of a schema a client gets.
+
+``fields=id,name,logo,address.latitude`` names fields of the schema, or of
+a nested schema after a dot; naming a nested field alone (``address``)
+takes all of it. A ``Fieldset`` turns the selection into loader options for
+the query and a cut-down pydantic model for rendering, so what wasn't asked
+for is neither selected from Postgres nor encoded.
+"""
+
+from functools import lru_cache
+from typing import Union, get_args, get_origin
+
+from fastapi import HTTPException, Query
+from pydantic import TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
+
+from app.conditional import etag
+from app.schemas import Schema
+
+# the query parameter, for routes that take one
+FIELDS = Query(
+    None, description="Comma-separated fields to return, e.g. id,name,address.latitude"
+)
+
+
+def _nested(annotation):
+    """The schema inside ``Optional[X]`` or ``list[X]``, if there is one."""
+    if isinstance(annotation, type) and issubclass(annotation, Schema):
+        return annotation
+    for arg in get_args(annotation):
+        nested = _nested(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+def _replace(annotation, old, new):
+    if annotation is old:
+        return new
+    args = get_args(annotation)
+    if not args:
+        return annotation
+    args = tuple(_replace(arg, old, new) for arg in args)
+    if get_origin(annotation) is Union:
+        return Union[args]
+    return get_origin(annotation)[args]
+
+
+def _parse(schema, fields):
+    """``(name, nested names or None)`` pairs in schema order, for caching."""
+    selected = {}
+    for path in filter(None, (part.strip() for part in fields.split(","))):
+        name, _, nested_name = path.partition(".")
+        if name not in schema.model_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown field {path!r}")
+        if not nested_name:
+            selected[name] = None
+            continue
+        nested = _nested(schema.model_fields[name].annotation)
+        if nested is None or nested_name not in nested.model_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown field {path!r}")
+        if name not in selected:
+            selected[name] = set()
+        if selected[name] is not None:
+            selected[name].add(nested_name)
+
+    if not selected:
+        raise HTTPException(status_code=400, detail="No fields selected")
+    return tuple(
+        (
+            name,
+            None
+            if selected[name] is None
+            else tuple(
+                n
+                for n in _nested(schema.model_fields[name].annotation).model_fields
+                if n in selected[name]
+            ),
+        )
+        for name in schema.model_fields
+        if name in selected
+    )
+
+
+# A subset model and its adapters are built once per distinct selection;
+# the bound keeps clients inventing selections from growing them forever.
+@lru_cache(maxsize=256)
+def _subset(schema, selection):
+    fields = {}
+    for name, nested_names in selection:
+        field = schema.model_fields[name]
+        annotation = field.annotation
+        if nested_names is not None:
+            nested = _nested(annotation)
+            annotation = _replace(
+                annotation,
+                nested,
+                _subset(nested, tuple((n, None) for n in nested_names)),
+            )
+        fields[name] = (annotation, ... if field.is_required() else field.default)
+    return create_model(f"{schema.__name__}Fields", __base__=Schema, **fields)
+
+
+@lru_cache(maxsize=256)
+def _adapter(container, schema):
+    return TypeAdapter(schema if container is None else container[schema])
+
+
+class Fieldset:
+    """The fields of ``schema`` a request asked for, and how to load them.
+
+    ``fields`` is the raw query parameter; without it the response is
+    ``default``, the route's usual schema, loaded the usual way.
+    """
+
+    def __init__(self, schema, model, fields=None, default=None):
+        self.model = model
+        self.sparse = bool(fields)
+        if self.sparse:
+            self.selection = _parse(schema, fields)
+            self.schema = _subset(schema, self.selection)
+        else:
+            self.schema = default or schema
+            self.selection = tuple((name, None) for name in self.schema.model_fields)
+
+    @property
+    def key(self):
+        """The selection, normalised, e.g. ``id,name,address.latitude``."""
+        return ",".join(
+            name if nested is None else ",".join(f"{name}.{n}" for n in nested)
+            for name, nested in self.selection
+        )
+
+    def etag(self, tag):
+        """``tag`` of the full rendering, made distinct per selection."""
+        return etag(tag, self.key) if self.sparse else tag
+
+    def adapter(self, container=None):
+        """Adapter for the selected schema, optionally wrapped, e.g. in Page."""
+        return _adapter(container, self.schema)
+
+    def options(self, *keep):
+        """Loader options fetching the selection and nothing else.
+
+        ``keep`` adds columns the route reads itself (keyset, versions), on
+        the model or on a model one relationship away. Relationships that
+        would otherwise be joined in eagerly are made to raise instead. A
+        selected field that isn't a column, like a property computed from
+        several, can't be narrowed down, so its model loads every column.
+        """
+        mapper = inspect(self.model)
+        columns = _columns(mapper, (name for name, _ in self.selection))
+        related = {}
+        for name, _ in self.selection:
+            if name in mapper.relationships:
+                nested = _nested(self.schema.model_fields[name].annotation)
+                related[name] = _columns(
+                    mapper.relationships[name].mapper, nested.model_fields
+                )
+        for attribute in keep:
+            if attribute.class_ is self.model:
+                loaded = columns
+            else:
+                key = next(
+                    r.key
+                    for r in mapper.relationships
+                    if r.mapper.class_ is attribute.class_
+                )
+                loaded = related.setdefault(key, [])
+            if loaded is not None:
+                loaded.append(attribute)
+
+        options = [] if columns is None else [load_only(*columns)]
+        for relationship in mapper.relationships:
+            attribute = getattr(self.model, relationship.key)
+            if relationship.key in related:
+                loader = selectinload if relationship.uselist else joinedload
+                option = loader(attribute)
+                if related[relationship.key] is not None:
+                    option = option.load_only(*related[relationship.key])
+                options.append(option)
+            elif relationship.lazy == "joined":
+                options.append(raiseload(attribute))
+        return options
+
+
+def _columns(mapper, names):
+    """Column attributes for names, plus the primary key.
+
+    None when a name is neither a column nor a relationship.
+    """
+    columns = [
+        getattr(mapper.class_, mapper.get_property_by_column(column).key)
+        for column in mapper.primary_key
+    ]
+    for name in names:
+        if name in mapper.column_attrs:
+            columns.append(getattr(mapper.class_, name))
+        elif name not in mapper.relationships:
+            return None
+    return columns
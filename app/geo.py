@@ -0,0 +1,101 @@
+"""Proximity search over ``addresses`` without PostGIS.
+
+``addresses.geo_cell`` is a generated column numbering a grid of
+``1 / CELLS_PER_DEGREE`` degree squares, with a B-tree index. A radius query
+turns its bounding box into one contiguous ``geo_cell`` range per grid row,
+so the index narrows candidates to the neighbourhood. Only those rows get
+the exact haversine distance, which filters, sorts and pages the results.
+Work depends on local density, not on the table size.
+
+Longitudes are not wrapped at the antimeridian.
+"""
+
+import math
+from uuid import UUID
+
+from sqlalchemy import Float, cast, func, or_, select, tuple_
+from sqlalchemy.orm import load_only
+
+from app import models, schemas
+from app.pagination import decode_cursor, encode_cursor
+
+# must match the generated column expression in revision 5ad2f3c8e917
+CELLS_PER_DEGREE = 10
+CELLS_PER_ROW = 3600
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def cell_ranges(lat, lng, radius_km):
+    """``(first, last)`` geo_cell ranges covering the circle's bounding box."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+
+    def row(value):
+        return math.floor((value + 90) * CELLS_PER_DEGREE)
+
+    def col(value):
+        return math.floor((value + 180) * CELLS_PER_DEGREE)
+
+    first_col = col(max(lng - dlng, -180.0))
+    last_col = col(min(lng + dlng, 180.0))
+    return [
+        (r * CELLS_PER_ROW + first_col, r * CELLS_PER_ROW + last_col)
+        for r in range(row(max(lat - dlat, -90.0)), row(min(lat + dlat, 90.0)) + 1)
+    ]
+
+
+def distance_km(lat, lng):
+    """Haversine distance from ``(lat, lng)`` to each address, in SQL."""
+    lat1 = math.radians(lat)
+    lat2 = func.radians(cast(models.Address.latitude, Float))
+    dlat = lat2 - lat1
+    dlng = func.radians(cast(models.Address.longitude, Float)) - math.radians(lng)
+
+    a = func.power(func.sin(dlat / 2), 2)
+    a = a + math.cos(lat1) * func.cos(lat2) * func.power(func.sin(dlng / 2), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+
+async def nearby_businesses(db, lat, lng, radius_km, cursor=None, limit=20):
+    """One page of businesses within ``radius_km``, nearest first."""
+    distance = distance_km(lat, lng).label("distance_km")
+    stmt = (
+        select(models.Business, models.Address, distance)
+        .join(models.Address, models.Business.address_id == models.Address.id)
+        .options(
+            load_only(
+                *schemas.schema_columns(schemas.BusinessSummary, models.Business)
+            )
+        )
+        .where(
+            or_(
+                *(
+                    models.Address.geo_cell.between(first, last)
+                    for first, last in cell_ranges(lat, lng, radius_km)
+                )
+            ),
+            distance <= radius_km,
+        )
+        .order_by(distance, models.Business.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        after = decode_cursor(cursor, parsers=(float, UUID))
+        stmt = stmt.where(tuple_(distance, models.Business.id) > after)
+
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].distance_km, rows[-1][0].id)
+
+    return {
+        "items": [
+            {"business": business, "address": address, "distance_km": km}
+            for business, address, km in rows
+        ],
+        "next_cursor": next_cursor,
+    }
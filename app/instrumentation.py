@@ -0,0 +1,179 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# a request running one statement shape more often than this is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+_current = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """SQL and serialization timings collected while serving one request."""
+
+    __slots__ = (
+        "started", "statements", "db_ms", "slowest_ms", "slowest_sql",
+        "checkout_ms", "serialize_ms", "shapes", "_pending",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+        self.checkout_ms = 0.0
+        self.serialize_ms = 0.0
+        self.shapes = Counter()
+        self._pending = None
+
+    def record(self, statement, elapsed_ms):
+        self.statements += 1
+        self.db_ms += elapsed_ms
+        self.shapes[statement] += 1
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = statement
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statement shapes run more than ``threshold`` times, most frequent first."""
+        return [
+            (statement, count)
+            for statement, count in self.shapes.most_common()
+            if count > threshold
+        ]
+
+    def server_timing(self, total_ms):
+        return ", ".join(
+            (
+                f'db;dur={self.db_ms:.2f};desc="{self.statements} statements"',
+                f"db-slowest;dur={self.slowest_ms:.2f}",
+                f"db-checkout;dur={self.checkout_ms:.2f}",
+                f"serialize;dur={self.serialize_ms:.2f}",
+                f"total;dur={total_ms:.2f}",
+            )
+        )
+
+
+@contextmanager
+def timed_serialization():
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_ms += (time.perf_counter() - start) * 1000
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats._pending = None
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None and conn.info.get("query_start"):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats.record(statement, elapsed * 1000)
+
+
+def _do_orm_execute(orm_execute_state):
+    # the session checks out a connection right after this hook when it does
+    # not hold one yet, so the gap up to the pool's checkout event is the wait
+    stats = _current.get()
+    if stats is not None:
+        stats._pending = time.perf_counter()
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    stats = _current.get()
+    if stats is not None and stats._pending is not None:
+        stats.checkout_ms += (time.perf_counter() - stats._pending) * 1000
+        stats._pending = None
+
+
+def instrument(*engines):
+    """Attach the statement and pool hooks to ``engines`` (sync engines)."""
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "checkout", _checkout)
+    if not event.contains(Session, "do_orm_execute", _do_orm_execute):
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
+
+
+class SQLInstrumentationMiddleware:
+    """ASGI middleware reporting each request's SQL work.
+
+    Adds a ``Server-Timing`` header to the response, logs one record per
+    request with the figures in ``extra["sql"]``, and logs a warning when a
+    statement shape repeats more than ``N_PLUS_ONE_THRESHOLD`` times.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - stats.started) * 1000
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"server-timing", stats.server_timing(total_ms).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _report(scope, stats)
+
+
+def _report(scope, stats):
+    route = f"{scope['method']} {scope['path']}"
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    repeated = stats.repeated()
+    logger.info(
+        "%s: %d statements, db %.2f ms, total %.2f ms",
+        route, stats.statements, stats.db_ms, total_ms,
+        extra={
+            "sql": {
+                "route": route,
+                "statements": stats.statements,
+                "db_ms": round(stats.db_ms, 2),
+                "slowest_ms": round(stats.slowest_ms, 2),
+                "slowest_sql": stats.slowest_sql,
+                "checkout_ms": round(stats.checkout_ms, 2),
+                "serialize_ms": round(stats.serialize_ms, 2),
+                "total_ms": round(total_ms, 2),
+                "repeated": [count for _, count in repeated],
+            }
+        },
+    )
+    for statement, count in repeated:
+        logger.warning(
+            "possible N+1 in %s: statement ran %d times: %s",
+            route, count, " ".join(statement.split())[:300],
+            extra={"sql": {"route": route, "count": count, "statement": statement}},
+        )
@@ -1,14 +1,35 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from typing import Union
 
-from fastapi import Depends, FastAPI
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
 
-from . import models
-from .database import engine, get_db
+from .cache import listen_for_invalidations
+from .database import REPLICA_PIN_SECONDS, async_engine, engine, replicas
+from .instrumentation import SQLInstrumentationMiddleware
+from .replicas import PrimaryPinMiddleware
+from .routers.bookings import router as bookings_router
 from .routers.business import router as business_router
+from .routers.metrics import router as metrics_router
+from .routers.search import router as search_router
+from .routers.users import router as users_router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [asyncio.create_task(listen_for_invalidations())]
+    if replicas:
+        tasks.append(asyncio.create_task(replicas.monitor(async_engine)))
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",  # Vite dev server
@@ -23,6 +44,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(SQLInstrumentationMiddleware)
+app.add_middleware(
+    PrimaryPinMiddleware, pin_s=REPLICA_PIN_SECONDS, read_only=("/business/batch",)
+)
+
 
 @app.get("/")
 def read_root():
@@ -34,10 +60,10 @@ def read_item(item_id: int, q: Union[str, None] = None):
     return {"item_id": item_id, "q": q}
 
 
-@app.get("/users")
-def get_users(db: Session = Depends(get_db)):
-    return db.query(models.User).all()
-
 # ---------------------------------------------------------------------------
 # include routers
 app.include_router(business_router)
+app.include_router(users_router)
+app.include_router(bookings_router)
+app.include_router(search_router)
+app.include_router(metrics_router)
@@ -2,36 +2,65 @@ from sqlalchemy import Column, Integer, String
 from .database import Base
 from sqlalchemy import (
     Column,
+    Computed,
     String,
     Date,
     DateTime,
     Time,
     Integer,
+    SmallInteger,
     BigInteger,
+    CheckConstraint,
     ForeignKey,
+    Identity,
+    Index,
     Numeric,
     Text,
     func,
     text,
     Table,
 )
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
+from sqlalchemy.orm import deferred, foreign, relationship
+from sqlalchemy.dialects.postgresql import (
+    UUID,
+    ARRAY,
+    BIT,
+    JSONB,
+    TSVECTOR,
+)
 
 # ---------------------------------------------------------------------------
 # Association tables
 # ---------------------------------------------------------------------------
 
+# One row per booking, kept in step by the bookings_keys trigger. bookings is
+# partitioned by month and Postgres only enforces uniqueness within a
+# partition, so this is what keeps booking ids and numbers unique and what
+# booking_services and ratings reference.
+booking_keys = Table(
+    "booking_keys",
+    Base.metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("booking_id", BigInteger, unique=True),
+    Column("time", DateTime(timezone=True), nullable=False),
+    Column("business_id", UUID(as_uuid=True), nullable=False),
+)
+
 # Booking <-> Service (many-to-many)
 booking_services = Table(
     "booking_services",
     Base.metadata,
     Column(
-        "booking_id", UUID(as_uuid=True), ForeignKey("bookings.id"), primary_key=True
+        "booking_id",
+        UUID(as_uuid=True),
+        ForeignKey("booking_keys.id"),
+        primary_key=True,
     ),
     Column(
         "service_id", UUID(as_uuid=True), ForeignKey("services.id"), primary_key=True
     ),
+    # the primary key leads with booking_id, so it can't serve service lookups
+    Index("ix_booking_services_service_id", "service_id"),
 )
 
 # ---------------------------------------------------------------------------
@@ -58,6 +87,16 @@ class Address(Base):
 
     latitude = Column(Numeric(9, 6), nullable=True)
     longitude = Column(Numeric(9, 6), nullable=True)
+    # 0.1 degree grid cell for proximity search, see app/geo.py
+    geo_cell = Column(
+        Integer,
+        Computed(
+            "floor((latitude + 90) * 10)::integer * 3600"
+            " + floor((longitude + 180) * 10)::integer",
+            persisted=True,
+        ),
+        index=True,
+    )
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -76,6 +115,10 @@ class Address(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # keyset pagination order, see app/pagination.py
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -90,7 +133,9 @@ class User(Base):
     phone = Column(String, nullable=True)
     avatar = Column(String, nullable=True)
 
-    address_id = Column(UUID(as_uuid=True), ForeignKey("addresses.id"), nullable=True)
+    address_id = Column(
+        UUID(as_uuid=True), ForeignKey("addresses.id"), nullable=True, index=True
+    )
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -109,6 +154,15 @@ class User(Base):
 
 class Business(Base):
     __tablename__ = "businesses"
+    __table_args__ = (
+        # keyset pagination order, see app/pagination.py
+        Index("ix_businesses_created_at_id", "created_at", "id"),
+        Index(
+            "ix_businesses_search_document",
+            "search_document",
+            postgresql_using="gin",
+        ),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -122,12 +176,18 @@ class Business(Base):
     website = Column(String, nullable=True)
     social_media = Column(JSONB, nullable=True)
     
-    address_id = Column(UUID(as_uuid=True), ForeignKey("addresses.id"), nullable=True)
+    address_id = Column(
+        UUID(as_uuid=True), ForeignKey("addresses.id"), nullable=True, index=True
+    )
 
     description = Column(Text, nullable=True)
     logo = Column(String, nullable=True)
     images = Column(ARRAY(String), nullable=True)
 
+    # maintained by trigger from the business, its address, categories and
+    # services; see app/search.py
+    search_document = deferred(Column(TSVECTOR, nullable=True))
+
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -140,10 +200,22 @@ class Business(Base):
 
     # relationships
     address = relationship("Address", back_populates="businesses")
-    opening_hours = relationship("OpeningHour", back_populates="business")
+    opening_hour_templates = relationship(
+        "OpeningHourTemplate", back_populates="business"
+    )
+    opening_hour_exceptions = relationship(
+        "OpeningHourException", back_populates="business"
+    )
     bookings = relationship("Booking", back_populates="business")
     staffs = relationship("Staff", back_populates="business")
     service_categories = relationship("ServiceCategory", back_populates="business")
+    # one-row aggregate, always joined in so no route can lazy-load it
+    rating_stats = relationship(
+        "BusinessRatingStats",
+        back_populates="business",
+        uselist=False,
+        lazy="joined",
+    )
 
 
 class Staff(Base):
@@ -162,7 +234,7 @@ class Staff(Base):
     description = Column(Text, nullable=True)
 
     business_id = Column(
-        UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False
+        UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False, index=True
     )
 
     created_at = Column(
@@ -195,7 +267,9 @@ class Qualification(Base):
     certificate_id = Column(String, nullable=True)
     certificate_image = Column(ARRAY(String), nullable=True)
 
-    staff_id = Column(UUID(as_uuid=True), ForeignKey("staff.id"), nullable=False)
+    staff_id = Column(
+        UUID(as_uuid=True), ForeignKey("staff.id"), nullable=False, index=True
+    )
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -211,8 +285,10 @@ class Qualification(Base):
     staff = relationship("Staff", back_populates="qualifications")
 
 
-class OpeningHour(Base):
-    __tablename__ = "opening_hours"
+# Weekly recurring hours: a business open 9-5 on weekdays is five rows, not one
+# per date. app/schedule.py expands them, with the exceptions, for any range.
+class OpeningHourTemplate(Base):
+    __tablename__ = "opening_hour_templates"
 
     id = Column(
         UUID(as_uuid=True),
@@ -221,12 +297,55 @@ class OpeningHour(Base):
     )
 
     business_id = Column(
-        UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False
+        UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False, index=True
     )
 
-    date = Column(Date, nullable=False)
+    # 0 = Monday, as date.weekday()
+    weekday = Column(SmallInteger, nullable=False)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
+    # applies on valid_from <= date < valid_until; NULL leaves that end open
+    valid_from = Column(Date, nullable=True)
+    valid_until = Column(Date, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        CheckConstraint(
+            "weekday BETWEEN 0 AND 6", name="opening_hour_templates_weekday"
+        ),
+    )
+
+    # relationships
+    business = relationship("Business", back_populates="opening_hour_templates")
+
+
+# Dates that don't follow the templates. Any row for a date replaces that
+# date's template hours; a row without times means closed all day.
+class OpeningHourException(Base):
+    __tablename__ = "opening_hour_exceptions"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+
+    business_id = Column(
+        UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False
+    )
+
+    date = Column(Date, nullable=False)
+    start_time = Column(Time, nullable=True)
+    end_time = Column(Time, nullable=True)
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -238,12 +357,27 @@ class OpeningHour(Base):
         nullable=False,
     )
 
+    __table_args__ = (
+        Index("ix_opening_hour_exceptions_business_id_date", "business_id", "date"),
+        CheckConstraint(
+            "(start_time IS NULL) = (end_time IS NULL)",
+            name="opening_hour_exceptions_times",
+        ),
+    )
+
     # relationships
-    business = relationship("Business", back_populates="opening_hours")
+    business = relationship("Business", back_populates="opening_hour_exceptions")
 
 
 class ServiceCategory(Base):
     __tablename__ = "service_categories"
+    __table_args__ = (
+        Index(
+            "ix_service_categories_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -255,12 +389,26 @@ class ServiceCategory(Base):
     description = Column(Text, nullable=True)
     images = Column(ARRAY(String), nullable=True)
 
-    # derived fields in the diagram: store as simple columns
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A')"
+                " || setweight(to_tsvector('english', coalesce(description, '')), 'D')",
+                persisted=True,
+            ),
+        )
+    )
+
+    # derived from the category's services by the services_category_figures
+    # trigger, so listings read them without touching services; NULL while
+    # the category is empty. app/categories.py checks them in bulk.
     price_from = Column(Integer, nullable=True)
-    duration_range = Column(String, nullable=True)
+    min_duration_mins = Column(Integer, nullable=True)
+    max_duration_mins = Column(Integer, nullable=True)
 
     business_id = Column(
-        UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False
+        UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False, index=True
     )
 
     created_at = Column(
@@ -280,6 +428,13 @@ class ServiceCategory(Base):
 
 class Service(Base):
     __tablename__ = "services"
+    __table_args__ = (
+        Index(
+            "ix_services_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -293,8 +448,22 @@ class Service(Base):
     description = Column(Text, nullable=True)
     images = Column(ARRAY(String), nullable=True)
 
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A')"
+                " || setweight(to_tsvector('english', coalesce(description, '')), 'D')",
+                persisted=True,
+            ),
+        )
+    )
+
     service_category_id = Column(
-        UUID(as_uuid=True), ForeignKey("service_categories.id"), nullable=False
+        UUID(as_uuid=True),
+        ForeignKey("service_categories.id"),
+        nullable=False,
+        index=True,
     )
 
     created_at = Column(
@@ -312,6 +481,8 @@ class Service(Base):
     bookings = relationship(
         "Booking",
         secondary=booking_services,
+        primaryjoin=lambda: Service.id == booking_services.c.service_id,
+        secondaryjoin=lambda: Booking.id == foreign(booking_services.c.booking_id),
         back_populates="services",
     )
 
@@ -325,15 +496,38 @@ class Booking(Base):
         server_default=text("gen_random_uuid()"),
     )
 
-    # human-friendly running number
-    booking_id = Column(BigInteger, autoincrement=True, unique=True, index=True)
+    # human-friendly running number, unique through booking_keys
+    booking_id = Column(BigInteger, index=True)
 
-    time = Column(DateTime(timezone=True), nullable=False)
+    # the partition key, so it has to be part of the table's primary key
+    time = Column(DateTime(timezone=True), primary_key=True)
+    # time + summed duration of the booked services
+    ends_at = Column(DateTime(timezone=True), nullable=False)
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+    )
     business_id = Column(
         UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False
     )
+    # required once the business has staff (the bookings_require_staff
+    # trigger); a staff member's bookings are tracked in staff_occupancy
+    staff_id = Column(UUID(as_uuid=True), ForeignKey("staff.id"), nullable=True)
+
+    # declared after the columns it references
+    __table_args__ = (
+        # serves business_id lookups as well as per-day booking scans
+        Index("ix_bookings_business_id_time", "business_id", "time"),
+        Index("ix_bookings_staff_id_time", "staff_id", "time"),
+        # the rollup refresh reads bookings changed since its watermark
+        Index("ix_bookings_updated_at", "updated_at"),
+        # One partition per month, created by create_booking_partition()
+        # (see app.partitions). Each carries the exclusion constraint that no
+        # two bookings of a staff member (or of a business without staff)
+        # overlap in time, as a partitioned table can't.
+        {"postgresql_partition_by": "RANGE (time)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -351,9 +545,28 @@ class Booking(Base):
     services = relationship(
         "Service",
         secondary=booking_services,
+        primaryjoin=lambda: Booking.id == foreign(booking_services.c.booking_id),
+        secondaryjoin=lambda: Service.id == booking_services.c.service_id,
         back_populates="bookings",
     )
-    rating = relationship("Rating", back_populates="booking", uselist=False)
+    rating = relationship(
+        "Rating",
+        primaryjoin=lambda: Booking.id == foreign(Rating.booking_id),
+        back_populates="booking",
+        uselist=False,
+    )
+
+
+# One staff member's bookings on one local day as a bitmap: bit i of cells is
+# set when a booking overlaps the 5 minute cell starting 5 * i wall-clock
+# minutes after midnight. Kept current by the bookings_staff_occupancy
+# trigger; days without bookings have no row. See app.occupancy.
+class StaffOccupancy(Base):
+    __tablename__ = "staff_occupancy"
+
+    staff_id = Column(UUID(as_uuid=True), ForeignKey("staff.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    cells = Column(BIT(288), nullable=False)
 
 
 class Rating(Base):
@@ -367,7 +580,7 @@ class Rating(Base):
 
     booking_id = Column(
         UUID(as_uuid=True),
-        ForeignKey("bookings.id"),
+        ForeignKey("booking_keys.id"),
         nullable=False,
         unique=True,  # one rating per booking
     )
@@ -386,4 +599,97 @@ class Rating(Base):
     )
 
     # relationships
-    booking = relationship("Booking", back_populates="rating")
+    booking = relationship(
+        "Booking",
+        primaryjoin=lambda: foreign(Rating.booking_id) == Booking.id,
+        back_populates="rating",
+    )
+
+
+# per-business rating aggregates, kept in step with ratings by a trigger;
+# app/ratings.py rebuilds them if they ever drift
+class BusinessRatingStats(Base):
+    __tablename__ = "business_rating_stats"
+
+    business_id = Column(
+        UUID(as_uuid=True), ForeignKey("businesses.id"), primary_key=True
+    )
+
+    rating_count = Column(Integer, nullable=False, server_default=text("0"))
+    rating_sum = Column(Numeric(14, 2), nullable=False, server_default=text("0"))
+    rating_avg = Column(
+        Numeric(3, 2),
+        Computed(
+            "CASE WHEN rating_count > 0"
+            " THEN round(rating_sum / rating_count, 2) END",
+            persisted=True,
+        ),
+    )
+
+    # histogram: stars rounded to the nearest whole star
+    stars_1 = Column(Integer, nullable=False, server_default=text("0"))
+    stars_2 = Column(Integer, nullable=False, server_default=text("0"))
+    stars_3 = Column(Integer, nullable=False, server_default=text("0"))
+    stars_4 = Column(Integer, nullable=False, server_default=text("0"))
+    stars_5 = Column(Integer, nullable=False, server_default=text("0"))
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # relationships
+    business = relationship("Business", back_populates="rating_stats")
+
+    @property
+    def histogram(self):
+        return [self.stars_1, self.stars_2, self.stars_3, self.stars_4, self.stars_5]
+
+
+# Daily booking counts and revenue (at list price) per business, and per
+# business and service. Refreshed in batches by app/rollups.py from
+# bookings.updated_at and booking_rollup_changes; never written per request.
+class BookingDailyStats(Base):
+    __tablename__ = "booking_daily_stats"
+
+    business_id = Column(
+        UUID(as_uuid=True), ForeignKey("businesses.id"), primary_key=True
+    )
+    day = Column(Date, primary_key=True)
+    bookings = Column(Integer, nullable=False)
+    revenue = Column(BigInteger, nullable=False)
+
+
+class ServiceDailyStats(Base):
+    __tablename__ = "service_daily_stats"
+
+    business_id = Column(
+        UUID(as_uuid=True), ForeignKey("businesses.id"), primary_key=True
+    )
+    day = Column(Date, primary_key=True)
+    service_id = Column(UUID(as_uuid=True), ForeignKey("services.id"), primary_key=True)
+    bookings = Column(Integer, nullable=False)
+    revenue = Column(BigInteger, nullable=False)
+
+
+# how far each batch job has read, by name
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+
+
+# the old day of every deleted or rescheduled booking, logged by the
+# bookings_rollup_changes trigger, since updated_at can't point at those
+class BookingRollupChange(Base):
+    __tablename__ = "booking_rollup_changes"
+
+    id = Column(BigInteger, Identity(always=True), primary_key=True)
+    business_id = Column(UUID(as_uuid=True), nullable=False)
+    day = Column(Date, nullable=False)
+    changed_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
@@ -0,0 +1,121 @@
+"""Which staff are free for a window, from per-day occupancy bitmaps.
+
+``staff_occupancy`` holds a ``bit(288)`` per staff member and local day, one
+bit per 5 minute wall-clock cell, maintained incrementally by a trigger on
+``bookings`` (a new booking ORs its cells in; a cancelled or moved one
+rebuilds the day). A window becomes a mask of the same cells, and a staff
+member is free when ``cells & mask`` is all zeros: one primary-key lookup and
+one AND per staff member, however many bookings they have that day.
+
+Windows are rounded out to whole cells, so a booking ending at 14:07 blocks
+the 14:05 cell.
+
+Bookings made before a business had staff have no staff member and no
+cells; while one overlaps a window, nobody is free in it.
+"""
+
+from datetime import datetime, time
+from math import ceil
+
+from sqlalchemy import and_, cast, exists, literal, or_, select, text
+from sqlalchemy.dialects.postgresql import BIT
+
+from app import models
+from app.availability import BUSINESS_TIMEZONE, MAX_BOOKING_LENGTH
+
+CELL_MINUTES = 5
+CELLS = 24 * 60 // CELL_MINUTES
+EMPTY = "0" * CELLS
+
+# every staff member's days from scratch, for bulk loads that bypass the
+# trigger; the time zone is inlined as it's configuration, not input
+REBUILD = text("""
+    INSERT INTO staff_occupancy (staff_id, day, cells)
+    SELECT b.staff_id, d.day, bit_or(occupancy_cells(b.time, b.ends_at, d.day, {tz}))
+    FROM bookings b
+    CROSS JOIN LATERAL (
+        SELECT generate_series(
+            (b.time AT TIME ZONE {tz})::date,
+            (b.ends_at AT TIME ZONE {tz} - interval '1 microsecond')::date,
+            interval '1 day'
+        )::date AS day
+    ) d
+    WHERE b.staff_id IS NOT NULL
+    GROUP BY b.staff_id, d.day
+""".format(tz=f"'{BUSINESS_TIMEZONE.key}'"))
+
+
+def _minutes_past_midnight(moment, day):
+    local = moment.astimezone(BUSINESS_TIMEZONE).replace(tzinfo=None)
+    return (local - datetime.combine(day, time.min)).total_seconds() / 60
+
+
+def window_mask(start: datetime, end: datetime):
+    """``(day, mask)``: the local day of ``[start, end)`` and its cells as bits.
+
+    Raises ValueError for a window that doesn't fit in one local day.
+    """
+    day = start.astimezone(BUSINESS_TIMEZONE).date()
+    first = int(_minutes_past_midnight(start, day) // CELL_MINUTES)
+    last = ceil(_minutes_past_midnight(end, day) / CELL_MINUTES)
+    if not first < last <= CELLS:
+        raise ValueError("window must be non-empty and within one day")
+    return day, "0" * first + "1" * (last - first) + "0" * (CELLS - last)
+
+
+def _bits(value):
+    return cast(literal(value), BIT(CELLS))
+
+
+def _unassigned_overlap(business_id, start, end):
+    booking = models.Booking
+    return exists().where(
+        booking.business_id == business_id,
+        booking.staff_id.is_(None),
+        # the same partition bound as availability.booking_intervals
+        booking.time > start - MAX_BOOKING_LENGTH,
+        booking.time < end,
+        booking.ends_at > start,
+    )
+
+
+def free_staff_query(business_id, start, end, staff_ids=None):
+    day, mask = window_mask(start, end)
+    occupancy = models.StaffOccupancy
+    stmt = (
+        select(models.Staff)
+        .outerjoin(
+            occupancy,
+            and_(occupancy.staff_id == models.Staff.id, occupancy.day == day),
+        )
+        .where(
+            models.Staff.business_id == business_id,
+            or_(
+                occupancy.cells.is_(None),
+                occupancy.cells.op("&", return_type=BIT(CELLS))(_bits(mask))
+                == _bits(EMPTY),
+            ),
+            ~_unassigned_overlap(business_id, start, end),
+        )
+    )
+    if staff_ids:
+        stmt = stmt.where(models.Staff.id.in_(staff_ids))
+    return stmt
+
+
+async def free_staff(db, business_id, start, end, staff_ids=None):
+    """Staff of the business with no booking overlapping ``[start, end)``.
+
+    ``staff_ids`` narrows the candidates, e.g. to those offering a service.
+    """
+    stmt = free_staff_query(business_id, start, end, staff_ids)
+    return (
+        await db.scalars(
+            stmt.order_by(models.Staff.last_name, models.Staff.first_name)
+        )
+    ).all()
+
+
+async def any_staff_free(db, business_id, start, end, staff_ids=None):
+    stmt = free_staff_query(business_id, start, end, staff_ids)
+    return await db.scalar(select(stmt.exists()))
@@ -0,0 +1,81 @@
+import base64
+import binascii
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+from app.conditional import etag
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def encode_cursor(*values) -> str:
+    """Opaque token for a keyset position, e.g. ``(created_at, id)``."""
+    raw = "|".join(
+        value.isoformat() if isinstance(value, datetime) else str(value)
+        for value in values
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers=(datetime.fromisoformat, UUID)) -> tuple:
+    """Inverse of ``encode_cursor``; ``parsers`` convert each part back."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        parts = raw.decode().split("|")
+        if len(parts) != len(parsers):
+            raise ValueError(cursor)
+        return tuple(parse(part) for parse, part in zip(parsers, parts))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(db, stmt, model, cursor=None, limit=DEFAULT_LIMIT):
+    """Run ``stmt`` as one keyset page ordered by ``(created_at, id)``.
+
+    The cursor is the position of the last row already seen, so every page is
+    a range scan on the ``(created_at, id)`` index no matter how deep it is.
+    """
+    # fetch one extra row to find out whether there is a next page
+    rows = (await db.scalars(_keyset(stmt, model, cursor, limit))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def _keyset(stmt, model, cursor, limit):
+    stmt = stmt.order_by(model.created_at, model.id)
+    if cursor:
+        stmt = stmt.where(tuple_(model.created_at, model.id) > decode_cursor(cursor))
+    return stmt.limit(limit + 1)
+
+
+def _page_validators(limit, versions, has_more):
+    modified = max((version for _, version in versions), default=None)
+    tag = etag(limit, has_more, *(f"{id_}@{v.isoformat()}" for id_, v in versions))
+    return tag, modified
+
+
+def loaded_page_validators(page, limit, version=lambda row: row.updated_at):
+    """ETag and Last-Modified of a page ``paginate`` returned."""
+    versions = [(row.id, version(row)) for row in page["items"]]
+    return _page_validators(limit, versions, page["next_cursor"] is not None)
+
+
+async def page_validators(db, stmt, model, cursor=None, limit=DEFAULT_LIMIT):
+    """ETag and Last-Modified of the page ``paginate`` would return.
+
+    ``stmt`` selects ``(id, version)`` for ``model``, where version is the
+    row's ``updated_at`` or whatever else the page's payload depends on. Only
+    those two columns are read for the same keyset window, so a conditional
+    request is answered without loading or serializing the page.
+    """
+    rows = (await db.execute(_keyset(stmt, model, cursor, limit))).all()
+    return _page_validators(limit, rows[:limit], len(rows) > limit)
@@ -0,0 +1,121 @@
+"""Create and retire the monthly partitions of ``bookings``.
+
+``bookings`` is range-partitioned on ``time`` by calendar month in the
+business time zone, one ``bookings_YYYY_MM`` table per month, and has no
+default partition: a booking for a month without one is rejected. This job
+creates the partitions for the next ``--ahead`` months and, with
+``--archive-after``, detaches the partitions of months that ended more than
+that many months ago and moves them into the ``archive`` schema. Archived
+bookings drop out of every query, but their ratings and booking numbers stay
+valid because those live on in ``booking_keys``. Run it at least monthly.
+
+Overlap constraints are per partition, so nothing stops a booking that runs
+past midnight on the 1st from overlapping one in the next month's partition;
+``POST /bookings`` refuses bookings that cross a month boundary instead.
+Moving a booking to another month isn't supported either: Postgres runs
+that UPDATE as a DELETE and an INSERT, and the DELETE of its
+``booking_keys`` row fails on the booking's services and rating.
+
+    python -m app.partitions [--ahead 12] [--archive-after N] [--dry-run]
+"""
+
+import argparse
+from datetime import date
+
+from sqlalchemy import text
+
+from app.availability import BUSINESS_TIMEZONE
+from app.database import SessionLocal
+
+ARCHIVE_SCHEMA = "archive"
+
+CREATE = text("SELECT create_booking_partition(:month, :tz)")
+PARTITIONS = text("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'bookings'::regclass
+    ORDER BY c.relname
+""")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_month(name: str) -> date:
+    year, month = name.removeprefix("bookings_").split("_")
+    return date(int(year), int(month), 1)
+
+
+def ensure_partitions(db, first: date, last: date):
+    """Create the missing partitions for the months ``first`` to ``last``.
+
+    Returns the names of the partitions it created.
+    """
+    created = []
+    month = first.replace(day=1)
+    while month <= last:
+        name = db.scalar(CREATE, {"month": month, "tz": BUSINESS_TIMEZONE.key})
+        if name is not None:
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def archive_partitions(db, before: date, dry_run=False):
+    """Detach the partitions of months ending by ``before`` into the archive.
+
+    Returns the names of the partitions archived (or due, if ``dry_run``).
+    Detaching takes an exclusive lock on ``bookings`` for a moment.
+    """
+    due = [
+        name
+        for name in db.scalars(PARTITIONS)
+        if add_months(partition_month(name), 1) <= before
+    ]
+    if due and not dry_run:
+        db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        for name in due:
+            db.execute(text(f"ALTER TABLE bookings DETACH PARTITION {name}"))
+            db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+    return due
+
+
+def maintain(ahead=12, archive_after=None, dry_run=False, today=None):
+    """Return ``(created, archived)`` partition names."""
+    this_month = (today or date.today()).replace(day=1)
+    with SessionLocal() as db:
+        created = []
+        if not dry_run:
+            created = ensure_partitions(db, this_month, add_months(this_month, ahead))
+        archived = []
+        if archive_after is not None:
+            archived = archive_partitions(
+                db, add_months(this_month, -archive_after), dry_run
+            )
+        db.commit()
+    return created, archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--ahead", type=int, default=12, help="months to keep partitions ready for"
+    )
+    parser.add_argument(
+        "--archive-after",
+        type=int,
+        help="archive partitions of months that ended this many months ago",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    created, archived = maintain(args.ahead, args.archive_after, args.dry_run)
+    for name in created:
+        print(f"created {name}")
+    action = "would archive" if args.dry_run else "archived"
+    for name in archived:
+        print(f"{action} {name}")
+    print(f"{len(created)} partition(s) created, {len(archived)} {action}")
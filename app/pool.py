@@ -0,0 +1,78 @@
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# upper bounds in milliseconds; anything slower lands in +Inf
+WAIT_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram, reported cumulatively like Prometheus."""
+
+    def __init__(self, buckets=WAIT_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = {}, 0
+        for bound, bucket in zip((*self.buckets, "+Inf"), counts):
+            running += bucket
+            cumulative[str(bound)] = running
+        return {"count": count, "sum": round(total, 3), "buckets": cumulative}
+
+
+class _TimedCheckout:
+    """Times every wait for a pooled connection, including ones that time out."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait_ms = Histogram()
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.checkout_wait_ms.observe((time.perf_counter() - start) * 1000)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # QueuePool counts overflow from -size, it is only positive once the
+        # core pool is exhausted
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, _TimedCheckout):
+        stats["timeouts"] = pool.timeouts
+        stats["checkout_wait_ms"] = pool.checkout_wait_ms.snapshot()
+    return stats
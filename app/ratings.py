@@ -0,0 +1,95 @@
+"""Reconcile ``business_rating_stats`` against the ratings it summarizes.
+
+The stats are maintained incrementally by the ``ratings_stats`` trigger. This
+job recomputes them in bulk from ``ratings`` and reports every business whose
+stored figures drifted, then (unless ``--dry-run``) replaces the table with
+the recomputed rows. Rating writes wait on a SHARE lock while it runs, so no
+delta can slip in between the recount and the rebuild. Businesses come from
+``booking_keys``, so ratings of archived bookings keep counting.
+
+    python -m app.ratings [--dry-run]
+"""
+
+import argparse
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+
+STAT_COLUMNS = (
+    "rating_count",
+    "rating_sum",
+    "stars_1",
+    "stars_2",
+    "stars_3",
+    "stars_4",
+    "stars_5",
+)
+
+ACTUAL = """
+    actual AS (
+        SELECT
+            bk.business_id,
+            count(*) AS rating_count,
+            sum(r.stars) AS rating_sum,
+            count(*) FILTER (WHERE bucket = 1) AS stars_1,
+            count(*) FILTER (WHERE bucket = 2) AS stars_2,
+            count(*) FILTER (WHERE bucket = 3) AS stars_3,
+            count(*) FILTER (WHERE bucket = 4) AS stars_4,
+            count(*) FILTER (WHERE bucket = 5) AS stars_5
+        FROM ratings r
+        JOIN booking_keys bk ON bk.id = r.booking_id
+        CROSS JOIN LATERAL (
+            SELECT least(5, greatest(1, round(r.stars)))::int AS bucket
+        ) b
+        GROUP BY bk.business_id
+    )
+"""
+
+DRIFT = text(f"""
+    WITH {ACTUAL}
+    SELECT
+        business_id,
+        {", ".join(f"coalesce(a.{c}, 0) AS actual_{c}" for c in STAT_COLUMNS)},
+        {", ".join(f"coalesce(s.{c}, 0) AS stored_{c}" for c in STAT_COLUMNS)}
+    FROM actual a
+    FULL JOIN business_rating_stats s USING (business_id)
+    WHERE ({", ".join(f"coalesce(a.{c}, 0)" for c in STAT_COLUMNS)})
+          IS DISTINCT FROM
+          ({", ".join(f"coalesce(s.{c}, 0)" for c in STAT_COLUMNS)})
+""")
+
+REBUILD = text(f"""
+    WITH {ACTUAL}
+    INSERT INTO business_rating_stats (business_id, {", ".join(STAT_COLUMNS)})
+    SELECT business_id, {", ".join(STAT_COLUMNS)} FROM actual
+""")
+
+
+def reconcile(dry_run=False):
+    """Return the drifted rows; rebuild the table from scratch unless dry_run."""
+    with SessionLocal() as db:
+        db.execute(text("LOCK TABLE ratings IN SHARE MODE"))
+        drift = db.execute(DRIFT).mappings().all()
+        if not dry_run:
+            db.execute(text("DELETE FROM business_rating_stats"))
+            db.execute(REBUILD)
+        db.commit()
+    return drift
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    drift = reconcile(args.dry_run)
+    for row in drift:
+        changes = ", ".join(
+            f"{c} {row[f'stored_{c}']} -> {row[f'actual_{c}']}"
+            for c in STAT_COLUMNS
+            if row[f"stored_{c}"] != row[f"actual_{c}"]
+        )
+        print(f"{row['business_id']}: {changes}")
+    action = "found" if args.dry_run else "fixed"
+    print(f"{len(drift)} drifted business(es) {action}")
@@ -0,0 +1,169 @@
+import asyncio
+import itertools
+import logging
+import time
+from http.cookies import SimpleCookie
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# set on responses to writes; while it is in the future, reads go to the primary
+PIN_COOKIE = "primary_until"
+
+PRIMARY_LSN = text("SELECT pg_current_wal_lsn()::text")
+REPLICA_LAG = text(
+    "SELECT pg_is_in_recovery(), "
+    "pg_wal_lsn_diff(CAST(:primary_lsn AS pg_lsn), pg_last_wal_replay_lsn())"
+)
+
+
+class Replica:
+    def __init__(self, engine):
+        self.engine = engine
+        self.name = engine.url.render_as_string(hide_password=True)
+        # out of rotation until the first lag check passes
+        self.healthy = False
+        self.lag_bytes = None
+        self.error = None
+
+
+class ReplicaSet:
+    """Read-only engines behind the primary, balanced and health-checked.
+
+    ``strategy`` is ``round_robin`` or ``least_connections`` (fewest checked
+    out connections). ``check`` takes a replica out of rotation when it can't
+    be queried within ``timeout_s`` or has replayed less WAL than the primary
+    has written by more than ``max_lag_bytes``, and puts it back once it
+    catches up.
+    """
+
+    def __init__(
+        self,
+        engines,
+        strategy="round_robin",
+        max_lag_bytes=16 * 1024**2,
+        timeout_s=2.0,
+    ):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"unknown replica strategy {strategy!r}")
+        self.replicas = [Replica(engine) for engine in engines]
+        self.strategy = strategy
+        self.max_lag_bytes = max_lag_bytes
+        self.timeout_s = timeout_s
+        self._turn = itertools.count()
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def choose(self):
+        """A healthy replica engine, or None when reads must use the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.strategy == "least_connections":
+            return min(healthy, key=lambda r: r.engine.pool.checkedout()).engine
+        return healthy[next(self._turn) % len(healthy)].engine
+
+    async def _lag(self, replica, primary_lsn):
+        async with replica.engine.connect() as conn:
+            in_recovery, lag = (
+                await conn.execute(REPLICA_LAG, {"primary_lsn": primary_lsn})
+            ).one()
+        # a standalone copy (not in recovery) has no replay position to compare
+        return int(lag or 0) if in_recovery else 0
+
+    async def check(self, primary_engine):
+        async with primary_engine.connect() as conn:
+            primary_lsn = await conn.scalar(PRIMARY_LSN)
+
+        for replica in self.replicas:
+            try:
+                lag = await asyncio.wait_for(
+                    self._lag(replica, primary_lsn), self.timeout_s
+                )
+            except Exception as exc:
+                replica.lag_bytes, replica.error = None, repr(exc)
+                healthy = False
+            else:
+                replica.lag_bytes, replica.error = lag, None
+                healthy = lag <= self.max_lag_bytes
+
+            if healthy != replica.healthy:
+                logger.warning(
+                    "replica %s %s (lag %s bytes, %s)",
+                    replica.name,
+                    "back in rotation" if healthy else "out of rotation",
+                    replica.lag_bytes,
+                    replica.error,
+                )
+            replica.healthy = healthy
+
+    async def monitor(self, primary_engine, interval_s=1.0):
+        while True:
+            try:
+                await self.check(primary_engine)
+            except Exception:
+                # primary unreachable: nothing to compare against, keep state
+                logger.exception("replica health check failed")
+            await asyncio.sleep(interval_s)
+
+    def stats(self):
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_bytes": replica.lag_bytes,
+                "error": replica.error,
+            }
+            for replica in self.replicas
+        ]
+
+
+def pinned_to_primary(cookies):
+    try:
+        return float(cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class PrimaryPinMiddleware:
+    """Pin a client's reads to the primary for ``pin_s`` after it writes.
+
+    Any successful non-GET/HEAD/OPTIONS request gets a ``primary_until``
+    cookie; ``get_read_db`` honours it, so the client reads its own writes
+    even while replicas are behind. Stateless, so it works across workers.
+    POSTs to ``read_only`` paths are reads with a body and don't pin.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, app, pin_s=5.0, read_only=()):
+        self.app = app
+        self.pin_s = pin_s
+        self.read_only = frozenset(read_only)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in self.SAFE_METHODS
+            or scope["path"] in self.read_only
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[PIN_COOKIE] = f"{time.time() + self.pin_s:.3f}"
+                cookie[PIN_COOKIE]["max-age"] = int(self.pin_s) + 1
+                cookie[PIN_COOKIE]["path"] = "/"
+                cookie[PIN_COOKIE]["httponly"] = True
+                cookie[PIN_COOKIE]["samesite"] = "lax"
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"set-cookie", cookie.output(header="").strip().encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
@@ -0,0 +1,23 @@
+from fastapi.responses import Response
+
+from app.instrumentation import timed_serialization
+
+
+def render(adapter, content) -> bytes:
+    with timed_serialization():
+        return adapter.dump_json(
+            adapter.validate_python(content, from_attributes=True)
+        )
+
+
+class SchemaResponse(Response):
+    """JSON response encoded by a prebuilt pydantic ``TypeAdapter``.
+
+    Validation reads ORM attributes directly and ``dump_json`` runs in
+    pydantic-core, skipping ``jsonable_encoder`` and ``json.dumps``.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, adapter, content, **kwargs):
+        super().__init__(render(adapter, content), **kwargs)
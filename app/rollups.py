@@ -0,0 +1,133 @@
+"""Incremental refresh of the daily booking and revenue rollups.
+
+``booking_daily_stats`` (bookings and revenue per business and local day)
+and ``service_daily_stats`` (the same per service) are what the stats
+endpoints read. This job finds the (business, day) pairs touched since the
+last run, from ``bookings.updated_at`` and the ``booking_rollup_changes`` log
+of deleted bookings' days and rescheduled ones' old and new days (so moves
+made in SQL, which leave ``updated_at`` alone, are found), and recomputes
+just those days from the bookings. Work per run is proportional to what
+changed, not to history.
+
+Each run re-reads ``OVERLAP`` before its watermark: ``updated_at`` is a
+transaction's start time, so a booking can commit after a run that started
+later has passed it. Recomputing a day is idempotent, so re-reading is
+harmless. The first run after the migration builds everything.
+
+    python -m app.rollups [--every SECONDS]
+"""
+
+import argparse
+import time
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.availability import BUSINESS_TIMEZONE
+from app.database import SessionLocal
+
+WATERMARK = "booking_rollups"
+OVERLAP = timedelta(minutes=5)
+
+LOCK_WATERMARK = text(
+    "SELECT watermark FROM rollup_watermarks WHERE name = :name FOR UPDATE"
+)
+SINCE = "(SELECT watermark - :overlap FROM rollup_watermarks WHERE name = :name)"
+
+DIRTY_DAYS = text(f"""
+    CREATE TEMPORARY TABLE rollup_dirty_days ON COMMIT DROP AS
+    SELECT DISTINCT business_id, day
+    FROM (
+        SELECT business_id, (time AT TIME ZONE :tz)::date AS day
+        FROM bookings
+        WHERE updated_at > {SINCE}
+        UNION ALL
+        SELECT business_id, day
+        FROM booking_rollup_changes
+        WHERE changed_at > {SINCE}
+    ) changed
+""")
+
+# the bookings of the dirty days, found through ix_bookings_business_id_time
+DIRTY_BOOKINGS = """
+    FROM rollup_dirty_days d
+    JOIN bookings b
+      ON b.business_id = d.business_id
+     AND b.time >= d.day::timestamp AT TIME ZONE :tz
+     AND b.time < (d.day + 1)::timestamp AT TIME ZONE :tz
+"""
+
+CLEAR = [
+    text(f"""
+        DELETE FROM {table} s
+        USING rollup_dirty_days d
+        WHERE s.business_id = d.business_id AND s.day = d.day
+    """)
+    for table in ("booking_daily_stats", "service_daily_stats")
+]
+
+REBUILD_DAYS = text(f"""
+    INSERT INTO booking_daily_stats (business_id, day, bookings, revenue)
+    SELECT d.business_id, d.day, count(*), coalesce(sum(p.price), 0)
+    {DIRTY_BOOKINGS}
+    CROSS JOIN LATERAL (
+        SELECT sum(s.price) AS price
+        FROM booking_services bs
+        JOIN services s ON s.id = bs.service_id
+        WHERE bs.booking_id = b.id
+    ) p
+    GROUP BY d.business_id, d.day
+""")
+
+REBUILD_SERVICE_DAYS = text(f"""
+    INSERT INTO service_daily_stats (business_id, day, service_id, bookings, revenue)
+    SELECT d.business_id, d.day, bs.service_id, count(*), sum(s.price)
+    {DIRTY_BOOKINGS}
+    JOIN booking_services bs ON bs.booking_id = b.id
+    JOIN services s ON s.id = bs.service_id
+    GROUP BY d.business_id, d.day, bs.service_id
+""")
+
+ADVANCE = text("UPDATE rollup_watermarks SET watermark = now() WHERE name = :name")
+PRUNE_CHANGES = text(
+    "DELETE FROM booking_rollup_changes WHERE changed_at < now() - :overlap"
+)
+
+
+def refresh():
+    """Recompute the days changed since the last refresh; return how many.
+
+    Concurrent runs queue on the watermark row.
+    """
+    params = {"tz": BUSINESS_TIMEZONE.key}
+    with SessionLocal() as db:
+        db.execute(LOCK_WATERMARK, {"name": WATERMARK})
+        db.execute(DIRTY_DAYS, {**params, "name": WATERMARK, "overlap": OVERLAP})
+        db.execute(text("ANALYZE rollup_dirty_days"))
+        days = db.scalar(text("SELECT count(*) FROM rollup_dirty_days"))
+        if days:
+            for statement in CLEAR:
+                db.execute(statement)
+            db.execute(REBUILD_DAYS, params)
+            db.execute(REBUILD_SERVICE_DAYS, params)
+        db.execute(ADVANCE, {"name": WATERMARK})
+        db.execute(PRUNE_CHANGES, {"overlap": OVERLAP})
+        db.commit()
+    return days
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--every", type=float, help="keep refreshing, this many seconds apart"
+    )
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        days = refresh()
+        elapsed = time.perf_counter() - started
+        print(f"{days} business day(s) refreshed in {elapsed:.2f}s")
+        if args.every is None:
+            break
+        time.sleep(args.every)
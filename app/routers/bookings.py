@@ -0,0 +1,197 @@
+from datetime import datetime, time, timedelta
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.availability import (
+    BUSINESS_TIMEZONE,
+    has_staff,
+    opening_windows,
+    services_duration,
+)
+from app.database import get_async_db
+from app.occupancy import free_staff
+from app.partitions import add_months
+from app.responses import SchemaResponse
+from app import models, schemas
+
+router = APIRouter(prefix="/bookings", tags=["bookings"])
+
+EXCLUSION_VIOLATION = "23P01"
+FOREIGN_KEY_VIOLATION = "23503"
+# a booking without staff_id for a business with staff (bookings_require_staff)
+NOT_NULL_VIOLATION = "23502"
+# also raised for a time with no bookings partition yet (see app.partitions)
+CHECK_VIOLATION = "23514"
+
+
+async def _insert_booking(db, payload, staff_id, start, ends_at, service_ids):
+    booking = await db.scalar(
+        insert(models.Booking)
+        .values(
+            business_id=payload.business_id,
+            user_id=payload.user_id,
+            staff_id=staff_id,
+            time=start,
+            ends_at=ends_at,
+        )
+        .returning(models.Booking)
+    )
+    await db.execute(
+        insert(models.booking_services),
+        [
+            {"booking_id": booking.id, "service_id": service_id}
+            for service_id in service_ids
+        ],
+    )
+    return booking
+
+
+@router.post("", status_code=201, response_model=schemas.Booking)
+async def create_booking(
+    payload: schemas.BookingCreate, db: AsyncSession = Depends(get_async_db)
+):
+    """Book a slot; overlap is ruled out by the database, not by a pre-check.
+
+    Each month's bookings partition has a ``_no_overlap`` exclusion
+    constraint, so two racing requests for the same staff member (or, with
+    no staff, business) and time can't both commit: the loser blocks only
+    until the winner commits, then fails and gets a 409. Nothing is locked
+    beyond the rows being inserted, so other bookings proceed in parallel.
+    The constraints can't see across partitions, so a booking may not run
+    over into the next month.
+
+    A business with staff only takes bookings for one of them. Without a
+    ``staff_id`` the booking goes to the first staff member free for the
+    whole slot, by name, moving on to the next if a racing request takes
+    them first. Either way the slot must be free of the business's bookings
+    that predate its staff, as ``/availability`` has it.
+    """
+    start = payload.time
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=BUSINESS_TIMEZONE)
+
+    service_ids = list(dict.fromkeys(payload.service_ids))
+    duration = await services_duration(db, payload.business_id, service_ids)
+    if duration is None:
+        raise HTTPException(
+            status_code=400, detail="Service does not belong to this business"
+        )
+    ends_at = start + timedelta(minutes=duration)
+
+    month = start.astimezone(BUSINESS_TIMEZONE).date().replace(day=1)
+    next_month = datetime.combine(add_months(month, 1), time(), BUSINESS_TIMEZONE)
+    if ends_at > next_month:
+        raise HTTPException(
+            status_code=400, detail="Bookings can't run into the next month"
+        )
+
+    if payload.staff_id is not None:
+        staff_business = await db.scalar(
+            select(models.Staff.business_id).where(
+                models.Staff.id == payload.staff_id
+            )
+        )
+        if staff_business != payload.business_id:
+            raise HTTPException(
+                status_code=400, detail="Staff does not belong to this business"
+            )
+
+    local_day = start.astimezone(BUSINESS_TIMEZONE).date()
+    windows = await opening_windows(
+        db, payload.business_id, local_day, local_day + timedelta(days=1)
+    )
+    if not any(opens <= start and ends_at <= closes for opens, closes in windows):
+        raise HTTPException(status_code=400, detail="Outside opening hours")
+
+    # the exclusion constraints never compare a staffed booking with one made
+    # before the business had staff, so free_staff does; no new staff-less
+    # booking can appear meanwhile (bookings_require_staff)
+    candidates = [payload.staff_id]
+    if payload.staff_id is not None or await has_staff(db, payload.business_id):
+        try:
+            free = await free_staff(
+                db,
+                payload.business_id,
+                start,
+                ends_at,
+                payload.staff_id and [payload.staff_id],
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        if not free:
+            raise HTTPException(status_code=409, detail="Slot is already booked")
+        candidates = [member.id for member in free]
+
+    try:
+        for staff_id in candidates[:-1]:
+            try:
+                async with db.begin_nested():
+                    booking = await _insert_booking(
+                        db, payload, staff_id, start, ends_at, service_ids
+                    )
+                break
+            except IntegrityError as exc:
+                if getattr(exc.orig, "sqlstate", None) != EXCLUSION_VIOLATION:
+                    raise
+        else:
+            booking = await _insert_booking(
+                db, payload, candidates[-1], start, ends_at, service_ids
+            )
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        sqlstate = getattr(exc.orig, "sqlstate", None)
+        if sqlstate == EXCLUSION_VIOLATION:
+            raise HTTPException(status_code=409, detail="Slot is already booked")
+        if sqlstate == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=400, detail="Unknown user")
+        if sqlstate == CHECK_VIOLATION:
+            raise HTTPException(
+                status_code=400, detail="Bookings are not open for that month yet"
+            )
+        if sqlstate == NOT_NULL_VIOLATION:
+            # staff were added to the business since has_staff() looked
+            raise HTTPException(
+                status_code=409, detail="Business now has staff, book one of them"
+            )
+        raise
+
+    return SchemaResponse(schemas.booking_adapter, booking, status_code=201)
+
+
+@router.delete("/{booking_id}", status_code=204)
+async def cancel_booking(booking_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    """Cancel a booking.
+
+    The staff member's occupancy for the day is rebuilt by the
+    ``bookings_staff_occupancy`` trigger in the same transaction.
+    """
+    try:
+        await db.execute(
+            delete(models.booking_services).where(
+                models.booking_services.c.booking_id == booking_id
+            )
+        )
+        deleted = await db.scalar(
+            delete(models.Booking)
+            .where(models.Booking.id == booking_id)
+            .returning(models.Booking.id)
+        )
+        if deleted is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Booking not found")
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        # booking_keys is still referenced by the booking's rating
+        if getattr(exc.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(
+                status_code=409, detail="A rated booking can't be cancelled"
+            )
+        raise
+    return Response(status_code=204)
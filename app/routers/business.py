@@ -1,22 +1,460 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Literal, Union
+from uuid import UUID
 
-from app.database import get_db
-from app import models
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from app.availability import BUSINESS_TIMEZONE, find_slots
+from app.cache import business_cache
+from app.conditional import etag, is_conditional, is_fresh, not_modified, validators
+from app.database import get_async_db, get_read_db
+from app.fieldsets import FIELDS, Fieldset
+from app.geo import nearby_businesses
+from app.occupancy import free_staff
+from app.pagination import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    loaded_page_validators,
+    page_validators,
+    paginate,
+)
+from app.responses import SchemaResponse, render
+from app.routers.loaders import Loader
+from app.schedule import opening_hours
+from app.stats import business_stats
+from app import export, models, schemas
 
 router = APIRouter(prefix="/business", tags=["business"])
 
 
-@router.get("/")
-def list_businesses(db: Session = Depends(get_db)):
-    return db.query(models.Business).all()
+# Rating stats are maintained by their own trigger and don't bump
+# businesses.updated_at, so a business's version is the later of the two;
+# their writes publish that version on business_changed themselves.
+VERSION = func.greatest(
+    models.Business.updated_at, models.BusinessRatingStats.updated_at
+)
+
+
+def business_version(business):
+    stats = business.rating_stats
+    if stats is None:
+        return business.updated_at
+    return max(business.updated_at, stats.updated_at)
+
+
+def _versions(*columns):
+    return select(*columns).select_from(models.Business).outerjoin(
+        models.BusinessRatingStats
+    )
+
+
+# read by business_version whichever fields were asked for
+VERSION_COLUMNS = (models.Business.updated_at, models.BusinessRatingStats.updated_at)
+
+
+def business_fieldset(fields, default=schemas.Business):
+    return Fieldset(schemas.Business, models.Business, fields, default)
+
+
+@router.get("/", response_model=schemas.Page[schemas.BusinessSummary])
+async def list_businesses(
+    request: Request,
+    cursor: Union[str, None] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: Union[str, None] = FIELDS,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """A page of business summaries, or of any ``Business`` fields asked for."""
+    fieldset = business_fieldset(fields, default=schemas.BusinessSummary)
+    if is_conditional(request.headers):
+        tag, modified = await page_validators(
+            db, _versions(models.Business.id, VERSION), models.Business, cursor, limit
+        )
+        tag = fieldset.etag(tag)
+        if is_fresh(request.headers, tag, modified):
+            return not_modified(validators(tag, modified))
+
+    stmt = select(models.Business).options(
+        *fieldset.options(models.Business.created_at, *VERSION_COLUMNS)
+    )
+    page = await paginate(db, stmt, models.Business, cursor, limit)
+    tag, modified = loaded_page_validators(page, limit, business_version)
+    return SchemaResponse(
+        fieldset.adapter(schemas.Page),
+        page,
+        headers=validators(fieldset.etag(tag), modified),
+    )
+
+
+# declared before /{business_id} so "search" isn't parsed as an id
+@router.get("/search", response_model=schemas.Page[schemas.NearbyBusiness])
+async def search_nearby(
+    lat: float = Query(ge=-90, le=90),
+    lng: float = Query(ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=50),
+    cursor: Union[str, None] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    page = await nearby_businesses(db, lat, lng, radius_km, cursor, limit)
+    return SchemaResponse(schemas.nearby_page_adapter, page)
+
+
+async def load_business(db: AsyncSession, business_id: UUID, fieldset=None):
+    if fieldset is not None and fieldset.sparse:
+        options = fieldset.options(*VERSION_COLUMNS)
+    else:
+        options = [
+            load_only(*schemas.schema_columns(schemas.Business, models.Business)),
+            joinedload(models.Business.address).load_only(
+                *schemas.schema_columns(schemas.Address, models.Address)
+            ),
+        ]
+    return await db.scalar(
+        select(models.Business)
+        .options(*options)
+        .where(models.Business.id == business_id)
+    )
+
+
+async def load_businesses(db: AsyncSession, business_ids, fieldset=None):
+    """Businesses by id, keyed by id, from one ``IN`` query.
+
+    The full view loads addresses with one more; a fieldset joins in only
+    what it selects.
+    """
+    if fieldset is not None and fieldset.sparse:
+        options = fieldset.options()
+    else:
+        options = [
+            load_only(*schemas.schema_columns(schemas.Business, models.Business)),
+            selectinload(models.Business.address).load_only(
+                *schemas.schema_columns(schemas.Address, models.Address)
+            ),
+        ]
+    businesses = await db.scalars(
+        select(models.Business)
+        .options(*options)
+        .where(models.Business.id.in_(business_ids))
+    )
+    return {business.id: business for business in businesses}
+
+
+def business_loader(db: AsyncSession, fieldset=None):
+    return Loader(
+        partial(load_businesses, db, fieldset=fieldset),
+        max_batch=schemas.MAX_BATCH_IDS,
+    )
+
+
+async def _business_batch(db, business_ids, fields):
+    fieldset = business_fieldset(fields)
+    found, missing = await business_loader(db, fieldset).load_many(business_ids)
+    return SchemaResponse(
+        fieldset.adapter(schemas.Batch), {"items": found, "missing": missing}
+    )
+
+
+# declared before /{business_id} so "batch" isn't parsed as an id
+@router.get("/batch", response_model=schemas.Batch[schemas.Business])
+async def get_business_batch(
+    ids: list[str] = Query(description="Comma-separated or repeated business ids"),
+    fields: Union[str, None] = FIELDS,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Several businesses in one request, for lists of cards.
+
+    Ids may be comma-separated, repeated, or both. Longer lists than fit in a
+    URL go to ``POST /business/batch`` instead.
+    """
+    try:
+        business_ids = schemas.BusinessIds(
+            ids=[i for value in ids for i in value.split(",") if i]
+        ).ids
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False)) from None
+    return await _business_batch(db, business_ids, fields)
+
+
+@router.post("/batch", response_model=schemas.Batch[schemas.Business])
+async def post_business_batch(
+    body: schemas.BusinessIds,
+    fields: Union[str, None] = FIELDS,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await _business_batch(db, body.ids, fields)
+
+
+async def load_business_profile(db: AsyncSession, business_id: UUID):
+    """Load a business and its whole page graph in at most seven statements.
 
+    ``address`` is many-to-one, so it rides along in the main query as a
+    join. Every collection uses ``selectinload``: one ``IN`` query per
+    relationship, which doesn't multiply rows the way a join would and keeps
+    the statement count bounded however many staff or services there are.
+    A nested collection under an empty one (no staff, no categories) costs
+    no query at all.
+    """
+    return await db.scalar(
+        select(models.Business)
+        .options(
+            load_only(*schemas.schema_columns(schemas.Business, models.Business)),
+            joinedload(models.Business.address).load_only(
+                *schemas.schema_columns(schemas.Address, models.Address)
+            ),
+            selectinload(models.Business.opening_hour_templates),
+            selectinload(
+                models.Business.opening_hour_exceptions.and_(
+                    models.OpeningHourException.date >= func.current_date()
+                )
+            ),
+            selectinload(models.Business.staffs).selectinload(
+                models.Staff.qualifications
+            ),
+            selectinload(models.Business.service_categories).selectinload(
+                models.ServiceCategory.services
+            ),
+        )
+        .where(models.Business.id == business_id)
+    )
+
+
+async def _business_view(request, db, business_id, view, load, adapter, fieldset=None):
+    """A cached rendering of one business, honouring conditional requests.
+
+    The cache keeps each body with the validators it was rendered at, so a
+    hit needs no database at all. On a miss, a conditional request first
+    checks the version alone and gets a 304 without loading the graph.
+    Sparse ``fieldset`` renderings are cheap and too varied to be worth
+    caching, so they always load.
+    """
+    sparse = fieldset is not None and fieldset.sparse
+    cached = None if sparse else business_cache.get(business_id, view)
+    if cached is None:
+        if is_conditional(request.headers):
+            modified = await db.scalar(
+                _versions(VERSION).where(models.Business.id == business_id)
+            )
+            if modified is None:
+                raise HTTPException(status_code=404, detail="Business not found")
+            tag = etag(business_id, modified)
+            headers = validators(fieldset.etag(tag) if sparse else tag, modified)
+            if is_fresh(request.headers, headers["ETag"], modified):
+                return not_modified(headers)
+
+        business = await load(db, business_id)
+        if business is None:
+            raise HTTPException(status_code=404, detail="Business not found")
+        modified = business_version(business)
+        tag = etag(business_id, modified)
+        headers = validators(fieldset.etag(tag) if sparse else tag, modified)
+        cached = (modified, headers, render(adapter, business))
+        if not sparse:
+            business_cache.set(business_id, view, modified, cached)
+
+    modified, headers, body = cached
+    if is_fresh(request.headers, headers["ETag"], modified):
+        return not_modified(headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/{business_id}", response_model=schemas.Business)
+async def get_business(
+    business_id: UUID,
+    request: Request,
+    fields: Union[str, None] = FIELDS,
+    db: AsyncSession = Depends(get_read_db),
+):
+    fieldset = business_fieldset(fields)
+    return await _business_view(
+        request,
+        db,
+        business_id,
+        "business",
+        partial(load_business, fieldset=fieldset),
+        fieldset.adapter() if fieldset.sparse else schemas.business_adapter,
+        fieldset,
+    )
+
+
+@router.get("/{business_id}/profile", response_model=schemas.BusinessProfile)
+async def get_business_profile(
+    business_id: UUID, request: Request, db: AsyncSession = Depends(get_read_db)
+):
+    return await _business_view(
+        request,
+        db,
+        business_id,
+        "profile",
+        load_business_profile,
+        schemas.business_profile_adapter,
+    )
+
+
+async def _require_business(db: AsyncSession, business_id: UUID):
+    """404 unless the business exists.
+
+    Routes call this only when they found nothing, to tell an unknown
+    business from one with nothing to show.
+    """
+    found = await db.scalar(
+        select(models.Business.id).where(models.Business.id == business_id)
+    )
+    if found is None:
+        raise HTTPException(status_code=404, detail="Business not found")
+
+
+@router.get("/{business_id}/opening-hours", response_model=schemas.OpeningHours)
+async def get_opening_hours(
+    business_id: UUID,
+    start: date,
+    days: int = Query(7, ge=1, le=366),
+    db: AsyncSession = Depends(get_read_db),
+):
+    hours = await opening_hours(db, business_id, start, start + timedelta(days=days))
+    if not hours:
+        await _require_business(db, business_id)
+    return SchemaResponse(
+        schemas.opening_hours_adapter,
+        {
+            "business_id": business_id,
+            "hours": [
+                {"date": day, "start_time": opens, "end_time": closes}
+                for day, opens, closes in hours
+            ],
+        },
+    )
+
+
+@router.get("/{business_id}/availability", response_model=schemas.Availability)
+async def get_availability(
+    business_id: UUID,
+    start: date,
+    days: int = Query(1, ge=1, le=14),
+    service_ids: list[UUID] = Query([]),
+    step_mins: int = Query(15, ge=5, le=120),
+    db: AsyncSession = Depends(get_async_db),
+):
+    found = await find_slots(db, business_id, start, days, service_ids, step_mins)
+    if found is None:
+        raise HTTPException(
+            status_code=400, detail="Service does not belong to this business"
+        )
+    duration, slots = found
+    return SchemaResponse(
+        schemas.availability_adapter,
+        {
+            "business_id": business_id,
+            "duration_mins": duration,
+            "step_mins": step_mins,
+            "slots": slots,
+        },
+    )
+
+
+@router.get(
+    "/{business_id}/categories", response_model=list[schemas.ServiceCategory]
+)
+async def get_categories(business_id: UUID, db: AsyncSession = Depends(get_read_db)):
+    """The business's service categories with their price and duration figures.
+
+    The figures are stored on the categories, so this reads no services.
+    """
+    categories = await db.scalars(
+        select(models.ServiceCategory)
+        .options(
+            load_only(
+                *schemas.schema_columns(schemas.ServiceCategory, models.ServiceCategory)
+            )
+        )
+        .where(models.ServiceCategory.business_id == business_id)
+        .order_by(models.ServiceCategory.name)
+    )
+    categories = categories.all()
+    if not categories:
+        await _require_business(db, business_id)
+    return SchemaResponse(schemas.service_categories_adapter, categories)
+
+
+MAX_STATS_DAYS = 3 * 366
+
+
+@router.get("/{business_id}/stats", response_model=schemas.BusinessStats)
+async def get_stats(
+    business_id: UUID,
+    start: date = Query(alias="from"),
+    end: date = Query(alias="to"),
+    granularity: Literal["day", "week"] = "day",
+    top: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Bookings, revenue and top services from ``from`` up to ``to`` (exclusive).
+
+    Reads only the daily rollups, see ``app.rollups``.
+    """
+    if not start < end <= start + timedelta(days=MAX_STATS_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"'to' must be after 'from' and at most {MAX_STATS_DAYS} days on",
+        )
+    stats = await business_stats(db, business_id, start, end, granularity, top)
+    if not stats["periods"]:
+        await _require_business(db, business_id)
+    return SchemaResponse(schemas.business_stats_adapter, stats)
+
+
+@router.get("/{business_id}/staff/free", response_model=schemas.FreeStaff)
+async def get_free_staff(
+    business_id: UUID,
+    start: datetime,
+    duration_mins: int = Query(30, ge=5, le=24 * 60),
+    staff_ids: list[UUID] = Query([]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Staff with no booking in ``[start, start + duration_mins)``."""
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=BUSINESS_TIMEZONE)
+    end = start + timedelta(minutes=duration_mins)
+    try:
+        staff = await free_staff(db, business_id, start, end, staff_ids)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return SchemaResponse(
+        schemas.free_staff_adapter,
+        {"business_id": business_id, "start": start, "end": end, "staff": staff},
+    )
+
+
+@router.get("/{business_id}/bookings/export")
+async def export_bookings(
+    business_id: UUID,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Union[date, None] = None,
+    end: Union[date, None] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Every booking of the business with user, services and rating, streamed."""
+    found = await db.scalar(
+        select(models.Business.id).where(models.Business.id == business_id)
+    )
+    if found is None:
+        raise HTTPException(status_code=404, detail="Business not found")
 
-@router.get("/{business_id}")
-def get_business(business_id: str, db: Session = Depends(get_db)):
-    return (
-        db.query(models.Business)
-        .options(joinedload(models.Business.address))
-        .filter(models.Business.id == business_id)
-        .first()
+    chunks = export.booking_chunks(db.bind, business_id, start, end)
+    if format == "csv":
+        body, media_type = export.csv_rows(chunks), "text/csv"
+    else:
+        body, media_type = export.ndjson(chunks), "application/x-ndjson"
+    filename = f"bookings-{business_id}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -0,0 +1,73 @@
+"""Dataloader-style batching for routes that resolve many ids.
+
+A ``Loader`` wraps a batch function, ``async (ids) -> {id: object}``, that
+answers a list of ids with one query. Every ``load`` made in the same event
+loop turn is queued and dispatched as a single call, so a route that fans
+out over ids (or gathers several lookups) costs one query per
+``max_batch`` ids instead of one per id. Each id is fetched at most once
+per loader; make one per request so nothing outlives its session.
+
+    loader = Loader(partial(load_businesses, db))
+    found, missing = await loader.load_many(ids)
+"""
+
+import asyncio
+
+MAX_BATCH = 500
+
+
+class Loader:
+    def __init__(self, batch, max_batch=MAX_BATCH):
+        self._batch = batch
+        self._max_batch = max_batch
+        self._futures = {}
+        self._queue = []
+        self._tasks = set()
+        # an AsyncSession runs one statement at a time
+        self._lock = asyncio.Lock()
+
+    def load(self, key):
+        """A future for key's object, resolving to None if there is none."""
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            self._queue.append(key)
+        return future
+
+    async def load_many(self, keys):
+        """The objects found, in keys order, and the keys not found.
+
+        Repeated keys are answered once, at their first position.
+        """
+        keys = list(dict.fromkeys(keys))
+        objects = await asyncio.gather(*(self.load(key) for key in keys))
+        found = [obj for obj in objects if obj is not None]
+        missing = [key for key, obj in zip(keys, objects) if obj is None]
+        return found, missing
+
+    def _dispatch(self):
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self._max_batch):
+            task = asyncio.create_task(
+                self._resolve(queue[start : start + self._max_batch])
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, keys):
+        try:
+            async with self._lock:
+                found = await self._batch(keys)
+        except Exception as exc:
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(found.get(key))
@@ -0,0 +1,27 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter
+
+from app.cache import business_cache
+from app.database import async_engine, engine, replicas, settings
+from app.pool import pool_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/cache")
+def cache_metrics():
+    return {"business": business_cache.stats()}
+
+
+@router.get("/pool")
+def pool_metrics():
+    return {
+        "settings": asdict(settings),
+        "async": pool_stats(async_engine.sync_engine),
+        "sync": pool_stats(engine),
+        "replicas": [
+            {**health, **pool_stats(replica.engine.sync_engine)}
+            for health, replica in zip(replicas.stats(), replicas.replicas)
+        ],
+    }
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.responses import SchemaResponse
+from app.search import search_businesses
+from app import schemas
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=schemas.SearchResults)
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    results = await search_businesses(db, q, limit)
+    return SchemaResponse(schemas.search_results_adapter, results)
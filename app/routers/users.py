@@ -0,0 +1,48 @@
+from typing import Union
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.conditional import is_conditional, is_fresh, not_modified, validators
+from app.database import get_read_db
+from app.fieldsets import FIELDS, Fieldset
+from app.pagination import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    loaded_page_validators,
+    page_validators,
+    paginate,
+)
+from app.responses import SchemaResponse
+from app import models, schemas
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get("", response_model=schemas.Page[schemas.User])
+async def get_users(
+    request: Request,
+    cursor: Union[str, None] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: Union[str, None] = FIELDS,
+    db: AsyncSession = Depends(get_read_db),
+):
+    fieldset = Fieldset(schemas.User, models.User, fields)
+    if is_conditional(request.headers):
+        versions = select(models.User.id, models.User.updated_at)
+        tag, modified = await page_validators(db, versions, models.User, cursor, limit)
+        tag = fieldset.etag(tag)
+        if is_fresh(request.headers, tag, modified):
+            return not_modified(validators(tag, modified))
+
+    stmt = select(models.User).options(
+        *fieldset.options(models.User.created_at, models.User.updated_at)
+    )
+    page = await paginate(db, stmt, models.User, cursor, limit)
+    tag, modified = loaded_page_validators(page, limit)
+    return SchemaResponse(
+        fieldset.adapter(schemas.Page),
+        page,
+        headers=validators(fieldset.etag(tag), modified),
+    )
@@ -0,0 +1,90 @@
+"""Effective opening hours from weekly templates and per-date exceptions.
+
+A business's schedule is a handful of ``opening_hour_templates`` rows (one
+per weekday interval) plus ``opening_hour_exceptions`` for the dates that
+differ. Reading a range loads the templates and only the exceptions inside
+it, and expands them in memory, so the cost is O(templates + exceptions)
+rather than one stored row per day.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import or_, select
+
+from app import models
+
+ONE_DAY = timedelta(days=1)
+
+
+def _applies(template, day):
+    return (template.valid_from is None or template.valid_from <= day) and (
+        template.valid_until is None or day < template.valid_until
+    )
+
+
+def effective_hours(templates, exceptions, start: date, end: date):
+    """Sorted ``(date, start_time, end_time)`` open intervals in ``[start, end)``.
+
+    Exceptions for a date replace that date's templates entirely; a closure
+    is an exception row without times.
+    """
+    weekly = defaultdict(list)
+    for template in templates:
+        weekly[template.weekday].append(template)
+    overrides = defaultdict(list)
+    for exception in exceptions:
+        overrides[exception.date].append(exception)
+
+    hours = []
+    day = start
+    while day < end:
+        if day in overrides:
+            hours.extend(
+                (day, exception.start_time, exception.end_time)
+                for exception in overrides[day]
+                if exception.start_time is not None
+            )
+        else:
+            hours.extend(
+                (day, template.start_time, template.end_time)
+                for template in weekly[day.weekday()]
+                if _applies(template, day)
+            )
+        day += ONE_DAY
+    return sorted(hours)
+
+
+async def opening_hours(db, business_id, start: date, end: date):
+    """``effective_hours`` for a business, in two small queries."""
+    templates = await db.execute(
+        select(
+            models.OpeningHourTemplate.weekday,
+            models.OpeningHourTemplate.start_time,
+            models.OpeningHourTemplate.end_time,
+            models.OpeningHourTemplate.valid_from,
+            models.OpeningHourTemplate.valid_until,
+        ).where(
+            models.OpeningHourTemplate.business_id == business_id,
+            or_(
+                models.OpeningHourTemplate.valid_from.is_(None),
+                models.OpeningHourTemplate.valid_from < end,
+            ),
+            or_(
+                models.OpeningHourTemplate.valid_until.is_(None),
+                models.OpeningHourTemplate.valid_until > start,
+            ),
+        )
+    )
+    exceptions = await db.execute(
+        select(
+            models.OpeningHourException.date,
+            models.OpeningHourException.start_time,
+            models.OpeningHourException.end_time,
+        ).where(
+            models.OpeningHourException.business_id == business_id,
+            models.OpeningHourException.date >= start,
+            models.OpeningHourException.date < end,
+        )
+    )
+    return effective_hours(templates.all(), exceptions.all(), start, end)
@@ -0,0 +1,322 @@
+from datetime import date, datetime, time
+from typing import Generic, Literal, Optional, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field
+from sqlalchemy import inspect
+
+T = TypeVar("T")
+
+
+class Schema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Page(Schema, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+class Address(Schema):
+    id: UUID
+    street_line_1: str
+    street_line_2: Optional[str] = None
+    suburb: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    postcode: Optional[str] = None
+    country: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class User(Schema):
+    id: UUID
+    first_name: str
+    last_name: str
+    date_of_birth: Optional[date] = None
+    email: str
+    phone: Optional[str] = None
+    avatar: Optional[str] = None
+    address_id: Optional[UUID] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class RatingStats(Schema):
+    rating_count: int
+    rating_avg: Optional[float] = None
+    # counts for 1..5 stars
+    histogram: list[int]
+
+
+class BusinessSummary(Schema):
+    """List/card view: leaves out description, images and social_media."""
+
+    id: UUID
+    name: str
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    website: Optional[str] = None
+    logo: Optional[str] = None
+    address_id: Optional[UUID] = None
+    created_at: datetime
+    updated_at: datetime
+    rating_stats: Optional[RatingStats] = None
+
+
+class Business(BusinessSummary):
+    description: Optional[str] = None
+    images: Optional[list[str]] = None
+    social_media: Optional[dict] = None
+    address: Optional[Address] = None
+
+
+# Enough for a screen of favourites or search cards. A GET carries about 200
+# ids before its URL gets too long for some proxies; POST takes the rest.
+MAX_BATCH_IDS = 500
+
+
+class BusinessIds(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class Batch(Schema, Generic[T]):
+    """Objects in the order their ids were asked for; unknown ids in missing."""
+
+    items: list[T]
+    missing: list[UUID]
+
+
+class NearbyBusiness(Schema):
+    distance_km: float
+    business: BusinessSummary
+    address: Address
+
+
+class Qualification(Schema):
+    id: UUID
+    name: str
+    company: Optional[str] = None
+    description: Optional[str] = None
+    certificate_id: Optional[str] = None
+    certificate_image: Optional[list[str]] = None
+    staff_id: UUID
+
+
+class Staff(Schema):
+    id: UUID
+    first_name: str
+    last_name: str
+    position: Optional[list[str]] = None
+    description: Optional[str] = None
+    business_id: UUID
+
+
+class OpeningHourTemplate(Schema):
+    id: UUID
+    # 0 = Monday
+    weekday: int
+    start_time: time
+    end_time: time
+    valid_from: Optional[date] = None
+    valid_until: Optional[date] = None
+
+
+class OpeningHourException(Schema):
+    id: UUID
+    date: date
+    # both None: closed all day
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+
+
+class OpeningHour(Schema):
+    """An effective open interval, templates and exceptions applied."""
+
+    date: date
+    start_time: time
+    end_time: time
+
+
+class OpeningHours(Schema):
+    business_id: UUID
+    hours: list[OpeningHour]
+
+
+class Service(Schema):
+    id: UUID
+    name: str
+    duration_mins: int
+    price: int
+    description: Optional[str] = None
+    images: Optional[list[str]] = None
+    service_category_id: UUID
+
+
+class ServiceCategory(Schema):
+    id: UUID
+    name: str
+    description: Optional[str] = None
+    images: Optional[list[str]] = None
+    price_from: Optional[int] = None
+    min_duration_mins: Optional[int] = None
+    max_duration_mins: Optional[int] = None
+    business_id: UUID
+
+    @computed_field
+    @property
+    def duration_range(self) -> Optional[str]:
+        if self.min_duration_mins is None:
+            return None
+        if self.min_duration_mins == self.max_duration_mins:
+            return f"{self.min_duration_mins} mins"
+        return f"{self.min_duration_mins}–{self.max_duration_mins} mins"
+
+
+class StaffDetail(Staff):
+    qualifications: list[Qualification] = []
+
+
+class ServiceCategoryDetail(ServiceCategory):
+    services: list[Service] = []
+
+
+class BusinessProfile(Business):
+    opening_hour_templates: list[OpeningHourTemplate] = []
+    # upcoming ones only
+    opening_hour_exceptions: list[OpeningHourException] = []
+    staffs: list[StaffDetail] = []
+    service_categories: list[ServiceCategoryDetail] = []
+
+
+class Booking(Schema):
+    id: UUID
+    booking_id: Optional[int] = None
+    time: datetime
+    ends_at: datetime
+    user_id: UUID
+    business_id: UUID
+    staff_id: Optional[UUID] = None
+    created_at: datetime
+
+
+class BookingCreate(BaseModel):
+    business_id: UUID
+    user_id: UUID
+    staff_id: Optional[UUID] = None
+    time: datetime
+    service_ids: list[UUID] = Field(min_length=1)
+
+
+class Rating(Schema):
+    id: UUID
+    booking_id: UUID
+    stars: float
+    description: Optional[str] = None
+    created_at: datetime
+
+
+class ExportedUser(Schema):
+    id: UUID
+    first_name: str
+    last_name: str
+    email: str
+
+
+class ExportedService(Schema):
+    id: UUID
+    name: str
+    duration_mins: int
+    price: int
+
+
+class ExportedRating(Schema):
+    stars: float
+    description: Optional[str] = None
+
+
+class BookingExport(Schema):
+    """One line of the bookings export."""
+
+    id: UUID
+    booking_id: Optional[int] = None
+    time: datetime
+    ends_at: datetime
+    created_at: datetime
+    user: ExportedUser
+    services: list[ExportedService]
+    rating: Optional[ExportedRating] = None
+
+
+class SearchResult(Schema):
+    business: BusinessSummary
+    rank: float
+    services: list[Service] = []
+
+
+class SearchResults(Schema):
+    items: list[SearchResult]
+
+
+class Availability(Schema):
+    business_id: UUID
+    duration_mins: int
+    step_mins: int
+    slots: list[datetime]
+
+
+class PeriodStats(Schema):
+    start: date
+    bookings: int
+    revenue: int
+
+
+class ServiceStats(Schema):
+    service_id: UUID
+    name: str
+    bookings: int
+    revenue: int
+
+
+class BusinessStats(Schema):
+    business_id: UUID
+    start: date
+    end: date
+    granularity: Literal["day", "week"]
+    bookings: int
+    revenue: int
+    periods: list[PeriodStats]
+    top_services: list[ServiceStats]
+
+
+class FreeStaff(Schema):
+    business_id: UUID
+    start: datetime
+    end: datetime
+    staff: list[Staff]
+
+
+# compiled once at import; building a TypeAdapter per request would throw
+# away the point of having one
+business_page_adapter = TypeAdapter(Page[BusinessSummary])
+business_adapter = TypeAdapter(Business)
+business_profile_adapter = TypeAdapter(BusinessProfile)
+nearby_page_adapter = TypeAdapter(Page[NearbyBusiness])
+availability_adapter = TypeAdapter(Availability)
+free_staff_adapter = TypeAdapter(FreeStaff)
+business_stats_adapter = TypeAdapter(BusinessStats)
+service_categories_adapter = TypeAdapter(list[ServiceCategory])
+opening_hours_adapter = TypeAdapter(OpeningHours)
+search_results_adapter = TypeAdapter(SearchResults)
+booking_adapter = TypeAdapter(Booking)
+booking_export_adapter = TypeAdapter(BookingExport)
+
+
+def schema_columns(schema, model):
+    """The column attributes of ``model`` that ``schema`` serializes.
+
+    Pass to ``load_only`` so the SELECT list matches the response body.
+    """
+    columns = inspect(model).column_attrs.keys()
+    return [getattr(model, name) for name in schema.model_fields if name in columns]
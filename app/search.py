@@ -0,0 +1,98 @@
+"""Ranked full-text search over businesses and their services.
+
+``businesses.search_document`` holds the whole searchable text of a business
+and is kept current by triggers: name (weight A), suburb/city and
+category/service names (B), descriptions (D). One GIN lookup therefore
+matches queries that mix what and where, like "brow lamination Surry Hills".
+Matching services are then pulled from the hits only, through the
+per-row ``services.search_vector``.
+"""
+
+from functools import reduce
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.orm import load_only
+
+from app import models, schemas
+
+SEARCH_CONFIG = "english"
+
+# matching services returned per business
+SERVICES_PER_BUSINESS = 5
+
+
+def _any_term(q):
+    """A tsquery matching any of the terms ``q`` asks for, or None if none.
+
+    Each term goes through ``websearch_to_tsquery`` on its own, so stemming
+    and stop words match the full query, and the results are OR'ed. Negated
+    terms (``-word``) and ``or`` are dropped: OR'ing in a negation would
+    match nearly everything.
+    """
+    terms = [
+        term.strip('"')
+        for term in q.split()
+        if not term.startswith("-") and term.lower() != "or"
+    ]
+    queries = [func.websearch_to_tsquery(SEARCH_CONFIG, term) for term in terms if term]
+    if not queries:
+        return None
+    return reduce(lambda a, b: a.op("||", return_type=TSQUERY)(b), queries)
+
+
+async def search_businesses(db, q, limit=20):
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(models.Business.search_document, query).label("rank")
+    hits = (
+        await db.execute(
+            select(models.Business, rank)
+            .options(
+                load_only(
+                    *schemas.schema_columns(schemas.BusinessSummary, models.Business)
+                )
+            )
+            .where(models.Business.search_document.bool_op("@@")(query))
+            .order_by(rank.desc(), models.Business.id)
+            .limit(limit)
+        )
+    ).all()
+    if not hits:
+        return {"items": []}
+
+    # a service only has to match some of the terms: "Surry Hills" lives in
+    # the address, not in the service name
+    any_term = _any_term(q)
+    services = []
+    if any_term is not None:
+        service_rank = func.ts_rank_cd(models.Service.search_vector, any_term)
+        services = (
+            await db.execute(
+                select(models.Service, models.ServiceCategory.business_id)
+                .join(models.ServiceCategory)
+                .where(
+                    models.ServiceCategory.business_id.in_(
+                        [business.id for business, _ in hits]
+                    ),
+                    models.Service.search_vector.bool_op("@@")(any_term),
+                )
+                .order_by(service_rank.desc())
+            )
+        ).all()
+
+    matches = {}
+    for service, business_id in services:
+        found = matches.setdefault(business_id, [])
+        if len(found) < SERVICES_PER_BUSINESS:
+            found.append(service)
+
+    return {
+        "items": [
+            {
+                "business": business,
+                "rank": score,
+                "services": matches.get(business.id, []),
+            }
+            for business, score in hits
+        ]
+    }
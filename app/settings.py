@@ -0,0 +1,106 @@
+import os
+from dataclasses import dataclass, fields, replace
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Connection pool and session settings, applied to both engines.
+
+    Pool sizes are per engine per worker process: with N uvicorn workers the
+    database sees up to N * (pool_size + max_overflow) connections per engine.
+    """
+
+    profile: str
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float  # seconds to wait for a connection before erroring
+    pool_recycle: int  # seconds before a connection is replaced, -1 never
+    pool_pre_ping: bool
+    echo: bool
+    statement_timeout_ms: int  # 0 disables
+    idle_in_transaction_timeout_ms: int  # 0 disables
+
+    def engine_kwargs(self):
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+            "echo": self.echo,
+        }
+
+    def server_settings(self):
+        """Session GUCs set when a connection is opened."""
+        return {
+            "statement_timeout": str(self.statement_timeout_ms),
+            "idle_in_transaction_session_timeout": str(
+                self.idle_in_transaction_timeout_ms
+            ),
+        }
+
+    def libpq_options(self):
+        return " ".join(
+            f"-c {name}={value}" for name, value in self.server_settings().items()
+        )
+
+
+PROFILES = {
+    "dev": DatabaseSettings(
+        profile="dev",
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=-1,
+        pool_pre_ping=False,
+        echo=True,
+        statement_timeout_ms=0,
+        idle_in_transaction_timeout_ms=0,
+    ),
+    # small, fail-fast pools so leaked connections surface as errors
+    "test": DatabaseSettings(
+        profile="test",
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=5,
+        pool_recycle=-1,
+        pool_pre_ping=False,
+        echo=False,
+        statement_timeout_ms=10_000,
+        idle_in_transaction_timeout_ms=10_000,
+    ),
+    "prod": DatabaseSettings(
+        profile="prod",
+        pool_size=10,
+        max_overflow=5,
+        pool_timeout=5,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        echo=False,
+        statement_timeout_ms=5_000,
+        idle_in_transaction_timeout_ms=30_000,
+    ),
+}
+
+
+def _parse(kind, value):
+    if kind is bool:
+        return value.lower() in ("1", "true", "yes", "on")
+    return kind(value)
+
+
+def load_settings(environ=os.environ):
+    """The APP_ENV profile (default dev) with DB_<FIELD> overrides applied.
+
+    e.g. ``APP_ENV=prod DB_POOL_SIZE=20 DB_ECHO=1``
+    """
+    name = environ.get("APP_ENV", "dev")
+    if name not in PROFILES:
+        raise ValueError(f"APP_ENV must be one of {', '.join(PROFILES)}, not {name!r}")
+
+    overrides = {}
+    for field in fields(DatabaseSettings):
+        value = environ.get(f"DB_{field.name.upper()}")
+        if value is not None and field.name != "profile":
+            overrides[field.name] = _parse(field.type, value)
+    return replace(PROFILES[name], **overrides)
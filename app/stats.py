@@ -0,0 +1,74 @@
+"""Dashboard figures for a business, read from the daily rollups only.
+
+``booking_daily_stats`` and ``service_daily_stats`` hold one row per day (and
+service), so a query costs O(days in range) index reads however long the
+booking history. Figures are as fresh as the last ``app.rollups`` refresh.
+"""
+
+from sqlalchemy import BigInteger, Date, cast, func, select
+
+from app import models
+
+
+def _sum(column):
+    return cast(func.sum(column), BigInteger)
+
+
+async def business_stats(db, business_id, start, end, granularity="day", top=5):
+    """Totals, periods and the ``top`` services by revenue over ``[start, end)``.
+
+    Periods are days, or ISO weeks (starting Monday) for ``week``.
+    """
+    daily = models.BookingDailyStats
+    period = daily.day
+    if granularity == "week":
+        period = cast(func.date_trunc("week", daily.day), Date)
+    periods = (
+        await db.execute(
+            select(
+                period.label("start"),
+                _sum(daily.bookings).label("bookings"),
+                _sum(daily.revenue).label("revenue"),
+            )
+            .where(
+                daily.business_id == business_id,
+                daily.day >= start,
+                daily.day < end,
+            )
+            .group_by(period)
+            .order_by(period)
+        )
+    ).all()
+
+    by_service = models.ServiceDailyStats
+    revenue = _sum(by_service.revenue)
+    top_services = (
+        await db.execute(
+            select(
+                by_service.service_id,
+                models.Service.name,
+                _sum(by_service.bookings).label("bookings"),
+                revenue.label("revenue"),
+            )
+            .join(models.Service, models.Service.id == by_service.service_id)
+            .where(
+                by_service.business_id == business_id,
+                by_service.day >= start,
+                by_service.day < end,
+            )
+            .group_by(by_service.service_id, models.Service.name)
+            .order_by(revenue.desc(), models.Service.name)
+            .limit(top)
+        )
+    ).all()
+
+    return {
+        "business_id": business_id,
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "bookings": sum(row.bookings for row in periods),
+        "revenue": sum(row.revenue for row in periods),
+        "periods": periods,
+        "top_services": top_services,
+    }
@@ -0,0 +1,52 @@
+"""Micro-benchmark for the slot engine on a busy week.
+
+No database involved: synthetic opening windows and bookings go straight
+into ``compute_slots``.
+
+    python -m benchmarks.availability --bookings 600
+"""
+
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from app.availability import BUSINESS_TIMEZONE, compute_slots
+
+
+def _week(bookings, seed=42):
+    rng = random.Random(seed)
+    origin = datetime(2025, 12, 1, tzinfo=BUSINESS_TIMEZONE)
+    windows = [
+        (origin + timedelta(days=d, hours=9), origin + timedelta(days=d, hours=19))
+        for d in range(7)
+    ]
+    busy = []
+    for _ in range(bookings):
+        day = rng.randrange(7)
+        start = origin + timedelta(days=day, hours=9, minutes=5 * rng.randrange(120))
+        busy.append((start, start + timedelta(minutes=rng.choice((30, 45, 60, 90)))))
+    return origin, windows, busy
+
+
+def main(args):
+    origin, windows, busy = _week(args.bookings)
+    slots = compute_slots(origin, windows, busy, args.duration, args.step)
+
+    def run():
+        compute_slots(origin, windows, busy, args.duration, args.step)
+
+    seconds = min(timeit.repeat(run, number=args.number, repeat=5)) / args.number
+    print(
+        f"{len(windows)} windows, {len(busy)} bookings -> {len(slots)} slots: "
+        f"{seconds * 1e3:.3f} ms per week query"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=600)
+    parser.add_argument("--duration", type=int, default=60)
+    parser.add_argument("--step", type=int, default=15)
+    parser.add_argument("--number", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,168 @@
+"""Concurrent booking load test: many clients racing for the same slots.
+
+Creates throwaway businesses with a single 30 minute service and opening
+hours over ``--days`` days, then has ``--concurrency`` clients POST random
+slots at the running app until the run ends. Reports sustained bookings/sec
+and the 201/409 split, then checks the table for overlapping bookings and
+removes the fixture data.
+
+    python -m benchmarks.booking_race --concurrency 200 --businesses 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, time as dtime, timedelta
+
+from sqlalchemy import delete, select, text
+
+from app import models
+from app.availability import BUSINESS_TIMEZONE
+from app.database import SessionLocal
+from app.partitions import ensure_partitions
+from benchmarks.loadgen import send, start_uvicorn, wait_for_server
+
+OVERLAPS = text("""
+    SELECT count(*)
+    FROM bookings a
+    JOIN bookings b
+      ON a.business_id = b.business_id
+     AND a.id < b.id
+     AND tstzrange(a.time, a.ends_at) && tstzrange(b.time, b.ends_at)
+    WHERE a.business_id = ANY(:business_ids)
+""")
+
+
+def _create_fixture(businesses, days, users):
+    first_day = date.today() + timedelta(days=1)
+    with SessionLocal() as db:
+        ensure_partitions(db, first_day, first_day + timedelta(days=days))
+        fixture = {"businesses": [], "users": []}
+        for i in range(businesses):
+            business = models.Business(name=f"Race {i}")
+            business.opening_hour_templates = [
+                models.OpeningHourTemplate(
+                    weekday=weekday,
+                    start_time=dtime(9),
+                    end_time=dtime(17),
+                    valid_from=first_day,
+                    valid_until=first_day + timedelta(days=days),
+                )
+                for weekday in range(7)
+            ]
+            category = models.ServiceCategory(name="Race", business=business)
+            service = models.Service(name="Race", duration_mins=30, price=1)
+            category.services = [service]
+            db.add_all([business, category])
+            db.flush()
+            fixture["businesses"].append((business.id, service.id))
+        for i in range(users):
+            user = models.User(
+                first_name="Race",
+                last_name=str(i),
+                email=f"race-{uuid.uuid4()}@example.com",
+            )
+            db.add(user)
+            db.flush()
+            fixture["users"].append(user.id)
+        db.commit()
+    return first_day, fixture
+
+
+def _drop_fixture(fixture):
+    business_ids = [business_id for business_id, _ in fixture["businesses"]]
+    with SessionLocal() as db:
+        booking_ids = select(models.Booking.id).where(
+            models.Booking.business_id.in_(business_ids)
+        )
+        category_ids = select(models.ServiceCategory.id).where(
+            models.ServiceCategory.business_id.in_(business_ids)
+        )
+        db.execute(
+            delete(models.booking_services).where(
+                models.booking_services.c.booking_id.in_(booking_ids)
+            )
+        )
+        db.execute(delete(models.Booking).where(models.Booking.business_id.in_(business_ids)))
+        db.execute(delete(models.Service).where(models.Service.service_category_id.in_(category_ids)))
+        db.execute(delete(models.ServiceCategory).where(models.ServiceCategory.business_id.in_(business_ids)))
+        db.execute(delete(models.OpeningHourTemplate).where(models.OpeningHourTemplate.business_id.in_(business_ids)))
+        db.execute(delete(models.Business).where(models.Business.id.in_(business_ids)))
+        db.execute(delete(models.User).where(models.User.id.in_(fixture["users"])))
+        db.commit()
+
+
+async def _client(args, first_day, fixture, deadline, counts, rng):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while time.perf_counter() < deadline:
+            business_id, service_id = rng.choice(fixture["businesses"])
+            day = first_day + timedelta(days=rng.randrange(args.days))
+            start = datetime.combine(day, dtime(9), BUSINESS_TIMEZONE) + timedelta(
+                minutes=15 * rng.randrange(31)
+            )
+            body = json.dumps(
+                {
+                    "business_id": str(business_id),
+                    "user_id": str(rng.choice(fixture["users"])),
+                    "time": start.isoformat(),
+                    "service_ids": [str(service_id)],
+                }
+            ).encode()
+            status, _, _ = await send(reader, writer, args.host, "POST", "/bookings", body)
+            counts[status] = counts.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def main(args):
+    first_day, fixture = _create_fixture(args.businesses, args.days, args.users)
+    server = start_uvicorn("app.main:app", args.host, args.port, args.workers)
+    try:
+        await wait_for_server(args.host, args.port)
+        counts = {}
+        rng = random.Random(args.seed)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                _client(args, first_day, fixture, deadline, counts, random.Random(rng.random()))
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    try:
+        with SessionLocal() as db:
+            business_ids = [business_id for business_id, _ in fixture["businesses"]]
+            overlaps = db.scalar(OVERLAPS, {"business_ids": business_ids})
+    finally:
+        _drop_fixture(fixture)
+
+    created = counts.get(201, 0)
+    print(f"requests: {sum(counts.values())} in {elapsed:.1f}s, by status {counts}")
+    print(f"bookings/sec: {created / elapsed:.1f}")
+    print(f"overlapping bookings: {overlaps}")
+    if overlaps:
+        sys.exit("double booking detected")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--businesses", type=int, default=5)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
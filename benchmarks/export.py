@@ -0,0 +1,82 @@
+"""Throughput and server memory of the streaming bookings export.
+
+Exports the business with the most bookings in each format and reports
+rows/sec, MB/s and the server's resident memory before and after. Flat RSS
+across dataset sizes is the point of the server-side cursor.
+
+    python seed.py --scale 100 --bookings-per-business 20000 --days 4000  # once
+    python -m benchmarks.export
+"""
+
+import argparse
+import asyncio
+import time
+from urllib.request import urlopen
+
+from sqlalchemy import func, select
+
+from app import models
+from app.database import AsyncSessionLocal
+from benchmarks.loadgen import start_uvicorn, wait_for_server
+
+
+async def _busiest_business():
+    async with AsyncSessionLocal() as db:
+        return (
+            await db.execute(
+                select(models.Booking.business_id, func.count())
+                .group_by(models.Booking.business_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            )
+        ).first()
+
+
+def _rss_mb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _export(url):
+    rows = size = 0
+    started = time.perf_counter()
+    with urlopen(url) as response:
+        while block := response.read(1 << 16):
+            rows += block.count(b"\n")
+            size += len(block)
+    return rows, size, time.perf_counter() - started
+
+
+async def main(args):
+    busiest = await _busiest_business()
+    if busiest is None:
+        raise SystemExit("no bookings, run seed.py --scale first")
+    business_id, bookings = busiest
+    print(f"business {business_id}: {bookings} bookings")
+
+    server = start_uvicorn("app.main:app", args.host, args.port)
+    try:
+        await wait_for_server(args.host, args.port)
+        base = f"http://{args.host}:{args.port}/business/{business_id}/bookings/export"
+        for fmt in ("ndjson", "csv"):
+            before = _rss_mb(server.pid)
+            rows, size, seconds = _export(f"{base}?format={fmt}")
+            rows -= fmt == "csv"  # header
+            print(
+                f"{fmt:<7} {rows:>9} rows  {rows / seconds:>10.0f} rows/s"
+                f"  {size / seconds / 1e6:>7.1f} MB/s"
+                f"  rss {before:.0f} -> {_rss_mb(server.pid):.0f} MB"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8767)
+    asyncio.run(main(parser.parse_args()))
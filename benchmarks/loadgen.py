@@ -0,0 +1,153 @@
+"""Minimal keep-alive HTTP/1.1 load generator.
+
+Speaks just enough HTTP to drive the app under uvicorn without pulling an HTTP
+client library into requirements.txt. Each connection sends one request at a
+time, so ``concurrency`` is the number of requests in flight.
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class LoadResult:
+    path: str
+    concurrency: int
+    duration_s: float
+    latencies_ms: list = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests(self):
+        return len(self.latencies_ms)
+
+    @property
+    def rps(self):
+        return self.requests / self.duration_s if self.duration_s else 0.0
+
+    def percentile(self, p):
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        return {
+            "path": self.path,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.rps, 1),
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+        }
+
+
+async def _read_response(reader):
+    status_line = await reader.readuntil(b"\r\n")
+    status = int(status_line.split(b" ", 2)[1])
+
+    headers = {}
+    while True:
+        line = await reader.readuntil(b"\r\n")
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = b""
+    if "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).strip(), 16)
+            chunks.append((await reader.readexactly(size + 2))[:-2])
+            if size == 0:
+                break
+        body = b"".join(chunks)
+
+    return status, headers, body
+
+
+async def send(reader, writer, host, method, path, body=None, headers=None):
+    """One request on an open keep-alive connection; JSON ``body`` bytes."""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+    for name, value in (headers or {}).items():
+        head += f"{name}: {value}\r\n"
+    if body is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+    return await _read_response(reader)
+
+
+async def _worker(host, port, path, headers, deadline, result):
+    reader, writer = await asyncio.open_connection(host, port)
+    extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n"
+    ).encode("latin-1")
+
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            status, _, _ = await _read_response(reader)
+            if status >= 400:
+                result.errors += 1
+            else:
+                result.latencies_ms.append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, path, concurrency=50, duration_s=10.0, headers=None):
+    result = LoadResult(path=path, concurrency=concurrency, duration_s=duration_s)
+    deadline = time.perf_counter() + duration_s
+    await asyncio.gather(
+        *(
+            _worker(host, port, path, headers or {}, deadline, result)
+            for _ in range(concurrency)
+        )
+    )
+    return result
+
+
+async def wait_for_server(host, port, timeout_s=15.0):
+    deadline = time.perf_counter() + timeout_s
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            return
+
+
+def start_uvicorn(app_path, host, port, workers=1):
+    """Start ``app_path`` (``module:attr``) under uvicorn in a child process."""
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app_path,
+            "--host",
+            host,
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ]
+    )
@@ -0,0 +1,108 @@
+"""Partition pruning of the business-by-date bookings queries.
+
+Runs the availability and export queries for the busiest business over a
+day, a week and a month, plus an unbounded export for contrast, and EXPLAIN
+ANALYZEs the bookings statement of each. Reports how many monthly partitions
+the plan touches out of how many exist, and the execution time. A bounded
+range should touch one or two partitions however much history is stored.
+
+    python seed.py --scale 100 --bookings-per-business 2000 --days 1500  # once
+    python -m benchmarks.partition_pruning
+"""
+
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, select
+
+from app import export, models
+from app.availability import find_slots
+from app.database import AsyncSessionLocal, async_engine
+from app.partitions import PARTITIONS
+
+RANGES = (("day", 1), ("week", 7), ("month", 30))
+
+
+def _relations(plan):
+    if plan.get("Relation Name", "").startswith("bookings_"):
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from _relations(child)
+
+
+def _subplans_removed(plan):
+    return plan.get("Subplans Removed", 0) + sum(
+        _subplans_removed(child) for child in plan.get("Plans", ())
+    )
+
+
+async def _first_chunk(business_id, start, end):
+    chunks = export.booking_chunks(async_engine, business_id, start, end, 100)
+    try:
+        await anext(chunks, None)
+    finally:
+        await chunks.aclose()
+
+
+def _probes(db, business_id):
+    today = date.today()
+    for name, days in RANGES:
+        yield (
+            f"availability {name}",
+            find_slots(db, business_id, today, days, [], 15),
+        )
+    for name, days in RANGES:
+        yield (
+            f"export {name}",
+            _first_chunk(business_id, today, today + timedelta(days=days)),
+        )
+    yield "export unbounded", _first_chunk(business_id, None, None)
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        busiest = await db.scalar(
+            select(models.Booking.business_id)
+            .group_by(models.Booking.business_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+        if busiest is None:
+            sys.exit("partition_pruning needs bookings, run seed.py --scale first")
+        total = len((await db.scalars(PARTITIONS)).all())
+
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM bookings" in statement:
+            captured.append((statement, parameters))
+
+    print(f"{total} bookings partitions, business {busiest}")
+    async with AsyncSessionLocal() as db:
+        for label, probe in _probes(db, busiest):
+            captured.clear()
+            event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+            try:
+                await probe
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+            statement, parameters = captured[0]
+            conn = await db.connection()
+            result = await conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters
+            )
+            explained = result.scalar()[0]
+            scanned = set(_relations(explained["Plan"]))
+            removed = _subplans_removed(explained["Plan"])
+            print(
+                f"{label:<22} {len(scanned):>4}/{total} partitions"
+                f" {removed:>4} pruned at run time"
+                f" {explained['Execution Time']:>10.2f} ms"
+            )
+        await db.rollback()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""Check that GET /business/{id}/profile runs a fixed number of statements.
+
+Builds a small and a large business inside a transaction that is rolled back,
+loads both profiles, and exits non-zero if the statement counts differ.
+
+    python -m benchmarks.profile_query_count --staff 40 --services 60
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date, time, timedelta
+
+from sqlalchemy import event
+
+from app import models
+from app.database import AsyncSessionLocal, async_engine
+from app.routers.business import load_business_profile
+
+
+def _business(name, staff, services):
+    business = models.Business(
+        name=name,
+        address=models.Address(street_line_1="1 Count St"),
+        opening_hour_templates=[
+            models.OpeningHourTemplate(
+                weekday=weekday, start_time=time(9), end_time=time(17)
+            )
+            for weekday in range(min(staff, 7))
+        ],
+        opening_hour_exceptions=[
+            models.OpeningHourException(date=date.today() + timedelta(days=i))
+            for i in range(staff)
+        ],
+    )
+    for i in range(staff):
+        member = models.Staff(first_name=f"Staff{i}", last_name="Count")
+        member.qualifications = [models.Qualification(name=f"Cert {i}")]
+        business.staffs.append(member)
+    category = models.ServiceCategory(name="Category")
+    category.services = [
+        models.Service(name=f"Service {i}", duration_mins=30, price=50)
+        for i in range(services)
+    ]
+    business.service_categories.append(category)
+    return business
+
+
+async def main(args):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with AsyncSessionLocal() as db:
+        small = _business("Small", 1, 1)
+        large = _business("Large", args.staff, args.services)
+        db.add_all([small, large])
+        await db.flush()
+        db.expunge_all()
+
+        counts = {}
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+        try:
+            for business in (small, large):
+                statements.clear()
+                await load_business_profile(db, business.id)
+                counts[business.name] = len(statements)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+            await db.rollback()
+
+    print(f"statements: small={counts['Small']} large={counts['Large']}")
+    if counts["Small"] != counts["Large"]:
+        sys.exit("profile statement count grows with business size")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--staff", type=int, default=40)
+    parser.add_argument("--services", type=int, default=60)
+    asyncio.run(main(parser.parse_args()))
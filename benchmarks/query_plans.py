@@ -0,0 +1,195 @@
+"""Query-plan regression check for the SQL behind each route.
+
+Runs every route handler against a seeded database, captures the statements
+it sends, and EXPLAINs each one with ``enable_seqscan = off``. That setting
+makes the planner pick an index whenever one can serve the query, even on a
+tiny seed, so a remaining Seq Scan means no usable index exists. Exits
+non-zero if any route scans a table sequentially.
+
+    python -m benchmarks.query_plans
+"""
+
+import asyncio
+import sys
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import event, select
+from starlette.requests import Request
+
+from app import models, schemas
+from app.availability import BUSINESS_TIMEZONE
+from app.cache import business_cache
+from app.database import AsyncSessionLocal, async_engine
+from app.pagination import encode_cursor
+from app.routers import business, users
+from benchmarks.sparse_fields import CARD_FIELDS, PIN_FIELDS
+
+
+def _request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+async def _probes(db):
+    """(route, coroutine) pairs exercising each handler's queries."""
+    first_business = await db.scalar(
+        select(models.Business).order_by(models.Business.created_at).limit(1)
+    )
+    first_user = await db.scalar(
+        select(models.User).order_by(models.User.created_at).limit(1)
+    )
+    if first_business is None or first_user is None:
+        sys.exit("query_plans needs a seeded database, run seed.py first")
+
+    batch_ids = await db.scalars(
+        select(models.Business.id).order_by(models.Business.created_at).limit(20)
+    )
+    batch = schemas.BusinessIds(ids=[*batch_ids, uuid.uuid4()])
+
+    business_cursor = encode_cursor(first_business.created_at, first_business.id)
+    user_cursor = encode_cursor(first_user.created_at, first_user.id)
+
+    plain, conditional = _request(), _request(if_none_match='W/"stale"')
+
+    return [
+        ("GET /business/", business.list_businesses(plain, None, 20, None, db)),
+        (
+            "GET /business/?cursor",
+            business.list_businesses(plain, business_cursor, 20, None, db),
+        ),
+        (
+            "GET /business/ If-None-Match",
+            business.list_businesses(conditional, business_cursor, 20, None, db),
+        ),
+        (
+            "GET /business/?fields (pins)",
+            business.list_businesses(plain, None, 20, PIN_FIELDS, db),
+        ),
+        (
+            "GET /business/{id}",
+            business.get_business(first_business.id, plain, None, db),
+        ),
+        (
+            "GET /business/{id}?fields (card)",
+            business.get_business(first_business.id, plain, CARD_FIELDS, db),
+        ),
+        (
+            "GET /business/{id} If-None-Match",
+            business.get_business(first_business.id, conditional, None, db),
+        ),
+        (
+            "GET /business/{id}/profile",
+            business.get_business_profile(first_business.id, plain, db),
+        ),
+        (
+            "POST /business/batch",
+            business.post_business_batch(batch, None, db),
+        ),
+        (
+            "POST /business/batch?fields (card)",
+            business.post_business_batch(batch, CARD_FIELDS, db),
+        ),
+        (
+            "GET /business/search",
+            business.search_nearby(-33.884, 151.212, 5, None, 20, db),
+        ),
+        (
+            "GET /business/{id}/opening-hours",
+            business.get_opening_hours(first_business.id, date.today(), 28, db),
+        ),
+        (
+            "GET /business/{id}/availability",
+            business.get_availability(
+                first_business.id, date.today(), 7, [], 15, db
+            ),
+        ),
+        (
+            "GET /business/{id}/staff/free",
+            business.get_free_staff(
+                first_business.id,
+                datetime.combine(date.today(), time(14, 15), BUSINESS_TIMEZONE),
+                45,
+                [],
+                db,
+            ),
+        ),
+        (
+            "GET /business/{id}/categories",
+            business.get_categories(first_business.id, db),
+        ),
+        (
+            "GET /business/{id}/stats",
+            business.get_stats(
+                first_business.id,
+                date.today() - timedelta(days=91),
+                date.today(),
+                "week",
+                5,
+                db,
+            ),
+        ),
+        ("GET /users", users.get_users(plain, None, 20, None, db)),
+        ("GET /users?cursor", users.get_users(plain, user_cursor, 20, None, db)),
+        (
+            "GET /users?fields",
+            users.get_users(plain, None, 20, "id,first_name,avatar", db),
+        ),
+        (
+            "GET /users If-None-Match",
+            users.get_users(conditional, user_cursor, 20, None, db),
+        ),
+    ]
+
+
+def _seq_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from _seq_scans(child)
+
+
+async def main():
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    failures = 0
+    async with AsyncSessionLocal() as db:
+        for route, probe in await _probes(db):
+            business_cache.clear()
+            captured.clear()
+            event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+            try:
+                await probe
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+            conn = await db.connection()
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for statement, parameters in list(captured):
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + statement, parameters
+                )
+                plan = result.scalar()[0]["Plan"]
+                scans = sorted(set(_seq_scans(plan)))
+                status = "SEQ SCAN " + ", ".join(scans) if scans else "ok"
+                failures += bool(scans)
+                print(f"{route:<34} {status:<40} {statement.split()[0]} ...")
+        await db.rollback()
+
+    if failures:
+        sys.exit(f"{failures} statement(s) fell back to a sequential scan")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
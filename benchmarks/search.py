@@ -0,0 +1,46 @@
+"""Latency of GET /search queries over a generated corpus.
+
+    python seed.py --scale 100000 --bookings-per-business 0   # once
+    python -m benchmarks.search --runs 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.database import AsyncSessionLocal
+from app.search import search_businesses
+
+QUERIES = [
+    "brow lamination Surry Hills",
+    "lash lift",
+    "gel manicure Fitzroy",
+    "massage Brisbane",
+    "keratin",
+    "facial Bondi",
+    "happy nails",
+]
+
+
+async def run(runs):
+    async with AsyncSessionLocal() as db:
+        for q in QUERIES:
+            await search_businesses(db, q)  # warm up
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                await search_businesses(db, q)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(0.95 * (len(timings) - 1))]
+            print(
+                f"{q:<30} p50 {statistics.median(timings):7.2f} ms"
+                f"  p95 {p95:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100)
+    asyncio.run(run(parser.parse_args().runs))
@@ -0,0 +1,64 @@
+"""Serialization CPU per list response: jsonable_encoder vs TypeAdapter.
+
+Runs on transient ORM objects, no database round trip involved, so the
+numbers isolate the encoding cost FastAPI pays per request.
+
+    python -m benchmarks.serialization --page-size 100
+"""
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app import models, schemas
+from app.responses import SchemaResponse
+
+
+def _business(i):
+    now = datetime.now(timezone.utc)
+    return models.Business(
+        id=uuid.uuid4(),
+        name=f"Business {i}",
+        phone="+61 400 123 456",
+        email=f"hello{i}@example.com",
+        website=f"https://example.com/{i}",
+        social_media={
+            "instagram": f"https://instagram.com/business{i}",
+            "facebook": f"https://facebook.com/business{i}",
+        },
+        address_id=uuid.uuid4(),
+        description="A cosy beauty studio specialising in modern treatments. " * 8,
+        logo=f"business-images/{i}_logo.png",
+        images=[f"business-images/{i}_{n}.jpg" for n in range(6)],
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def main(args):
+    page = {"items": [_business(i) for i in range(args.page_size)], "next_cursor": None}
+
+    def encoder_path():
+        # what FastAPI did for a route returning ORM objects without a model
+        return json.dumps(jsonable_encoder(page)).encode()
+
+    def adapter_path():
+        return SchemaResponse(schemas.business_page_adapter, page).body
+
+    for label, fn in (("jsonable_encoder", encoder_path), ("TypeAdapter", adapter_path)):
+        seconds = min(timeit.repeat(fn, number=args.number, repeat=5)) / args.number
+        print(
+            f"{label:<17} {seconds * 1e6:>10.1f} us/response "
+            f"{len(fn()):>9} bytes"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--number", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""Payload size and latency of ?fields= selections against full responses.
+
+Calls the business list, single-business and batch handlers on a seeded
+database with no selection, with what a card needs, and with what a map pin
+needs, and reports body bytes and p50/p95 latency for each. The business
+cache is cleared before every call so the full single-business response is
+measured loading, like the sparse ones always are.
+
+    python -m benchmarks.sparse_fields --requests 200 --limit 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from sqlalchemy import select
+from starlette.requests import Request
+
+from app import models, schemas
+from app.cache import business_cache
+from app.database import AsyncSessionLocal
+from app.routers import business
+
+CARD_FIELDS = "id,name,logo,images,rating_stats"
+PIN_FIELDS = "id,name,address.latitude,address.longitude"
+SELECTIONS = {"full": None, "card": CARD_FIELDS, "pins": PIN_FIELDS}
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "headers": []})
+
+
+def _routes(db, business_ids, limit):
+    """(route, handler call for a fields value) pairs."""
+    batch = schemas.BusinessIds(ids=business_ids)
+    return [
+        (
+            f"GET /business/?limit={limit}",
+            lambda fields: business.list_businesses(
+                _request(), None, limit, fields, db
+            ),
+        ),
+        (
+            "GET /business/{id}",
+            lambda fields: business.get_business(
+                business_ids[0], _request(), fields, db
+            ),
+        ),
+        (
+            f"POST /business/batch ({len(business_ids)} ids)",
+            lambda fields: business.post_business_batch(batch, fields, db),
+        ),
+    ]
+
+
+async def main(args):
+    async with AsyncSessionLocal() as db:
+        business_ids = (
+            await db.scalars(
+                select(models.Business.id)
+                .order_by(models.Business.created_at)
+                .limit(args.ids)
+            )
+        ).all()
+        if not business_ids:
+            sys.exit("sparse_fields needs a seeded database, run seed.py first")
+
+        for route, call in _routes(db, business_ids, args.limit):
+            print(route)
+            full_size = None
+            for label, fields in SELECTIONS.items():
+                samples = []
+                for _ in range(args.requests):
+                    business_cache.clear()
+                    started = time.perf_counter()
+                    response = await call(fields)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    await db.rollback()
+                size = len(response.body)
+                full_size = full_size or size
+                samples.sort()
+                print(
+                    f"  {label:<6} {size:>9} bytes ({size / full_size:6.1%})"
+                    f"   p50 {statistics.median(samples):7.2f} ms"
+                    f"   p95 {samples[int(len(samples) * 0.95)]:7.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--ids", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
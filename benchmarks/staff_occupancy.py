@@ -0,0 +1,164 @@
+"""Staff occupancy bitmaps against scanning booking intervals.
+
+Creates a throwaway business with ``--staff`` staff and a packed calendar of
+bookings over ``--days`` days, then answers the same random "which staff
+are free for this window" and "is anyone free" questions two ways: with the
+bitmap query from app.occupancy and with a NOT EXISTS scan of each staff
+member's overlapping bookings. Checks the answers agree and reports latency
+percentiles for each, plus the insert rate with the occupancy trigger on.
+
+    python -m benchmarks.staff_occupancy --staff 20 --days 30 --queries 2000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, time as dtime, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from app import models
+from app.availability import BUSINESS_TIMEZONE, MAX_BOOKING_LENGTH
+from app.database import SessionLocal
+from app.occupancy import CELL_MINUTES, free_staff_query
+from app.partitions import ensure_partitions
+
+OPENS, CLOSES = 9 * 60, 19 * 60
+
+
+def interval_scan_query(business_id, start, end):
+    busy = select(models.Booking.id).where(
+        models.Booking.staff_id == models.Staff.id,
+        models.Booking.time > start - MAX_BOOKING_LENGTH,
+        models.Booking.time < end,
+        models.Booking.ends_at > start,
+    )
+    return select(models.Staff).where(
+        models.Staff.business_id == business_id, ~busy.exists()
+    )
+
+
+def _at(day, minutes):
+    return datetime.combine(day, dtime(minutes // 60, minutes % 60), BUSINESS_TIMEZONE)
+
+
+def _create_fixture(db, staff_count, days, rng):
+    first_day = date.today() + timedelta(days=1)
+    ensure_partitions(db, first_day, first_day + timedelta(days=days))
+    business = models.Business(name="Occupancy benchmark")
+    user = models.User(
+        first_name="Occupancy",
+        last_name="Benchmark",
+        email=f"occupancy-{uuid.uuid4()}@example.com",
+    )
+    staff = [
+        models.Staff(first_name="Staff", last_name=str(n), business=business)
+        for n in range(staff_count)
+    ]
+    db.add_all([business, user, *staff])
+    db.flush()
+
+    # each staff member booked back to back with random gaps, on a 15 minute grid
+    bookings = []
+    for day in (first_day + timedelta(days=offset) for offset in range(days)):
+        for member in staff:
+            cursor = OPENS + rng.choice((0, 15, 30))
+            while True:
+                length = rng.choice((30, 45, 60, 90))
+                if cursor + length > CLOSES:
+                    break
+                bookings.append(
+                    {
+                        "business_id": business.id,
+                        "user_id": user.id,
+                        "staff_id": member.id,
+                        "time": _at(day, cursor),
+                        "ends_at": _at(day, cursor + length),
+                    }
+                )
+                cursor += length + rng.choice((0, 0, 15, 30, 60))
+
+    started = time.perf_counter()
+    db.execute(insert(models.Booking), bookings)
+    elapsed = time.perf_counter() - started
+    db.commit()
+    print(
+        f"{len(bookings)} bookings for {staff_count} staff inserted in "
+        f"{elapsed:.1f}s ({len(bookings) / elapsed:.0f}/s with the trigger)"
+    )
+    return business, user, first_day
+
+
+def _drop_fixture(db, business, user):
+    db.execute(delete(models.Booking).where(models.Booking.business_id == business.id))
+    db.execute(
+        delete(models.StaffOccupancy).where(
+            models.StaffOccupancy.staff_id.in_(
+                select(models.Staff.id).where(models.Staff.business_id == business.id)
+            )
+        )
+    )
+    db.execute(delete(models.Staff).where(models.Staff.business_id == business.id))
+    db.execute(delete(models.Business).where(models.Business.id == business.id))
+    db.execute(delete(models.User).where(models.User.id == user.id))
+    db.commit()
+
+
+def _timed(db, stmt):
+    started = time.perf_counter()
+    result = db.execute(stmt).all()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95)]
+    print(
+        f"{label:<24} p50 {statistics.median(samples):7.3f} ms"
+        f"   p95 {p95:7.3f} ms"
+    )
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    with SessionLocal() as db:
+        business, user, first_day = _create_fixture(db, args.staff, args.days, rng)
+        try:
+            timings = {"which free": ([], []), "any free": ([], [])}
+            for _ in range(args.queries):
+                day = first_day + timedelta(days=rng.randrange(args.days))
+                minutes = rng.randrange(OPENS, CLOSES - 60, CELL_MINUTES)
+                start = _at(day, minutes)
+                end = start + timedelta(minutes=rng.choice((15, 30, 45, 60)))
+
+                bitmap = free_staff_query(business.id, start, end)
+                scan = interval_scan_query(business.id, start, end)
+                bitmap_ms, by_bitmap = _timed(db, bitmap)
+                scan_ms, by_scan = _timed(db, scan)
+                if {row[0].id for row in by_bitmap} != {row[0].id for row in by_scan}:
+                    raise SystemExit(f"answers differ for {start} - {end}")
+                timings["which free"][0].append(bitmap_ms)
+                timings["which free"][1].append(scan_ms)
+
+                bitmap_ms, _ = _timed(db, select(bitmap.exists()))
+                scan_ms, _ = _timed(db, select(scan.exists()))
+                timings["any free"][0].append(bitmap_ms)
+                timings["any free"][1].append(scan_ms)
+
+            for question, (bitmap_ms, scan_ms) in timings.items():
+                _report(f"{question} (bitmap)", bitmap_ms)
+                _report(f"{question} (interval)", scan_ms)
+        finally:
+            db.rollback()
+            _drop_fixture(db, business, user)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--staff", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,252 @@
+"""HTTP load benchmark for every GET route, with JSON baselines.
+
+Starts ``app.main:app`` under uvicorn against the database in DATABASE_URL,
+drives ``--concurrency`` keep-alive connections at each route in ``ROUTES``
+for ``--duration`` seconds, and writes throughput and p50/p95/p99 latency per
+route to a JSON file. ``compare`` diffs two such files and exits non-zero when
+a route got slower than ``--threshold`` percent.
+
+    python seed.py --scale 10000                 # once
+    python -m benchmarks.suite run -o benchmarks/baselines/main.json
+    python -m benchmarks.suite run -o /tmp/branch.json
+    python -m benchmarks.suite compare benchmarks/baselines/main.json /tmp/branch.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import quote
+from urllib.request import urlopen
+
+from benchmarks.loadgen import run_load, start_uvicorn, wait_for_server
+
+# name -> path template, filled from the samples found by _samples(). New GET
+# endpoints get an entry here; `run` warns about routes that are missing one.
+ROUTES = {
+    "GET /business/": "/business/",
+    "GET /business/?cursor": "/business/?cursor={business_cursor}",
+    "GET /business/?fields": (
+        "/business/?fields=id,name,address.latitude,address.longitude"
+    ),
+    "GET /business/{business_id}": "/business/{business_id}",
+    "GET /business/{business_id}/profile": "/business/{business_id}/profile",
+    "GET /business/{business_id}/availability": (
+        "/business/{business_id}/availability?start={today}&days=7"
+    ),
+    "GET /business/{business_id}/opening-hours": (
+        "/business/{business_id}/opening-hours?start={today}&days=28"
+    ),
+    "GET /business/{business_id}/categories": "/business/{business_id}/categories",
+    "GET /business/{business_id}/stats": (
+        "/business/{business_id}/stats?from={quarter_ago}&to={today}&granularity=week"
+    ),
+    "GET /business/{business_id}/staff/free": (
+        "/business/{business_id}/staff/free?start={today}T14:15&duration_mins=45"
+    ),
+    "GET /business/batch": "/business/batch?ids={business_ids}",
+    "GET /business/search": (
+        "/business/search?lat=-33.884&lng=151.212&radius_km=5"
+    ),
+    "GET /search": "/search?q={search_term}",
+    "GET /users": "/users",
+    "GET /users?cursor": "/users?cursor={user_cursor}",
+    # revalidation by a repeat visitor: sent with the ETag of a first fetch
+    "GET /business/ 304": "/business/",
+    "GET /business/{business_id} 304": "/business/{business_id}",
+    "GET /users 304": "/users",
+}
+
+# Not load-tested here: the docs, the template routes, /metrics, and the
+# bookings export, which benchmarks.export measures in rows/sec instead.
+IGNORED = (
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/items/",
+    "/metrics/",
+    "/business/{business_id}/bookings/export",
+)
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _get(host, port, path):
+    with urlopen(f"http://{host}:{port}{path}") as response:
+        return json.load(response)
+
+
+def _etag(host, port, path):
+    with urlopen(f"http://{host}:{port}{path}") as response:
+        return response.headers["ETag"]
+
+
+def _samples(host, port):
+    """Ids and cursors from the running app to substitute into ROUTES."""
+    businesses = _get(host, port, "/business/")
+    users = _get(host, port, "/users")
+    if not businesses["items"] or not users["items"]:
+        sys.exit("the benchmark needs a seeded database, run seed.py --scale first")
+
+    first = businesses["items"][0]
+    return {
+        "business_id": first["id"],
+        "business_ids": ",".join(item["id"] for item in businesses["items"]),
+        "business_cursor": quote(businesses["next_cursor"] or ""),
+        "user_cursor": quote(users["next_cursor"] or ""),
+        "search_term": quote(first["name"].split()[0]),
+        "today": date.today().isoformat(),
+        "quarter_ago": (date.today() - timedelta(days=91)).isoformat(),
+    }
+
+
+def _unbenchmarked():
+    from app.main import app
+
+    covered = {name.split()[1].split("?")[0] for name in ROUTES}
+    for route in app.routes:
+        if "GET" not in getattr(route, "methods", ()) or route.path == "/":
+            continue
+        if route.path not in covered and not route.path.startswith(IGNORED):
+            yield route.path
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    for path in _unbenchmarked():
+        print(f"warning: GET {path} has no entry in benchmarks.suite.ROUTES")
+
+    selected = {
+        name: template
+        for name, template in ROUTES.items()
+        if not args.route or any(r in name for r in args.route)
+    }
+
+    server = start_uvicorn("app.main:app", args.host, args.port, args.workers)
+    try:
+        await wait_for_server(args.host, args.port)
+        samples = _samples(args.host, args.port)
+
+        routes = {}
+        for name, template in selected.items():
+            path = template.format(**samples)
+            headers = {}
+            if name.endswith(" 304"):
+                headers["If-None-Match"] = _etag(args.host, args.port, path)
+            await run_load(
+                args.host, args.port, path, args.concurrency, args.warmup, headers
+            )
+            result = await run_load(
+                args.host, args.port, path, args.concurrency, args.duration, headers
+            )
+            routes[name] = result.summary()
+            print(_row(name, routes[name]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "meta": {
+            "revision": _revision(),
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "workers": args.workers,
+        },
+        "routes": routes,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"wrote {output}")
+
+
+def _row(name, summary):
+    return (
+        f"{name:<42} {summary['rps']:>9} rps  p50 {summary['p50_ms']:>8}"
+        f"  p95 {summary['p95_ms']:>8}  p99 {summary['p99_ms']:>8}"
+        f"  errors {summary['errors']}"
+    )
+
+
+def _change(metric, before, after):
+    """Percent change, positive meaning worse."""
+    if not before:
+        return 0.0
+    change = (after - before) / before * 100
+    return -change if metric == "rps" else change
+
+
+def compare(args):
+    baseline = json.loads(Path(args.baseline).read_text())["routes"]
+    current = json.loads(Path(args.current).read_text())["routes"]
+
+    regressions = 0
+    print(f"{'route':<42} " + " ".join(f"{m:>17}" for m in METRICS))
+    for name, before in baseline.items():
+        after = current.get(name)
+        if after is None:
+            print(f"{name:<42} missing from {args.current}")
+            continue
+
+        cells = []
+        for metric in METRICS:
+            change = _change(metric, before[metric], after[metric])
+            flag = "!" if change > args.threshold else " "
+            regressions += flag == "!"
+            cells.append(f"{after[metric]:>9} {change:+5.0f}%{flag}")
+        if after["errors"] > before["errors"]:
+            regressions += 1
+            cells.append(f"errors {before['errors']} -> {after['errors']}")
+        print(f"{name:<42} " + " ".join(cells))
+
+    for name in current.keys() - baseline.keys():
+        print(f"{name:<42} new, no baseline")
+
+    if regressions:
+        sys.exit(f"{regressions} metric(s) regressed by more than {args.threshold}%")
+    print(f"no regressions above {args.threshold}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark routes, write JSON")
+    run_parser.add_argument("-o", "--output", default="benchmark.json")
+    run_parser.add_argument("--host", default="127.0.0.1")
+    run_parser.add_argument("--port", type=int, default=8766)
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--concurrency", type=int, default=50)
+    run_parser.add_argument("--duration", type=float, default=10.0)
+    run_parser.add_argument("--warmup", type=float, default=2.0)
+    run_parser.add_argument(
+        "--route", action="append", help="only routes containing this text"
+    )
+
+    compare_parser = commands.add_parser("compare", help="diff two JSON results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=10.0, help="percent, default 10"
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    else:
+        compare(args)
@@ -0,0 +1,104 @@
+"""Compare the threadpool (sync) and asyncpg (async) request paths.
+
+The sync handlers below are the pre-async versions of the routes, mounted
+under ``/sync`` next to the real async routes so both run in the same uvicorn
+process against the same database.
+
+    python -m benchmarks.sync_vs_async --concurrency 200 --duration 15
+"""
+
+import argparse
+import asyncio
+import json
+from urllib.request import urlopen
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session, joinedload
+
+from app import models
+from app.database import get_db
+from app.main import app as bench_app
+from benchmarks.loadgen import run_load, start_uvicorn, wait_for_server
+
+sync_router = APIRouter(prefix="/sync")
+
+
+@sync_router.get("/business/")
+def list_businesses_sync(db: Session = Depends(get_db)):
+    return (
+        db.query(models.Business)
+        .order_by(models.Business.created_at, models.Business.id)
+        .limit(20)
+        .all()
+    )
+
+
+@sync_router.get("/business/{business_id}")
+def get_business_sync(business_id: str, db: Session = Depends(get_db)):
+    return (
+        db.query(models.Business)
+        .options(joinedload(models.Business.address))
+        .filter(models.Business.id == business_id)
+        .first()
+    )
+
+
+@sync_router.get("/users")
+def get_users_sync(db: Session = Depends(get_db)):
+    return (
+        db.query(models.User)
+        .order_by(models.User.created_at, models.User.id)
+        .limit(20)
+        .all()
+    )
+
+
+bench_app.include_router(sync_router)
+
+
+def _first_business_id(host, port):
+    with urlopen(f"http://{host}:{port}/business/") as response:
+        businesses = json.load(response)["items"]
+    return businesses[0]["id"] if businesses else None
+
+
+async def main(args):
+    server = start_uvicorn("benchmarks.sync_vs_async:bench_app", args.host, args.port)
+    try:
+        await wait_for_server(args.host, args.port)
+        business_id = _first_business_id(args.host, args.port)
+
+        paths = ["/business/", "/users"]
+        if business_id:
+            paths.append(f"/business/{business_id}")
+
+        rows = []
+        for path in paths:
+            for label, prefix in (("sync", "/sync"), ("async", "")):
+                result = await run_load(
+                    args.host,
+                    args.port,
+                    prefix + path,
+                    concurrency=args.concurrency,
+                    duration_s=args.duration,
+                )
+                rows.append({"mode": label, **result.summary()})
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'mode':<6} {'path':<50} {'rps':>9} {'p99_ms':>9} {'errors':>7}")
+    for row in rows:
+        print(
+            f"{row['mode']:<6} {row['path']:<50} "
+            f"{row['rps']:>9} {row['p99_ms']:>9} {row['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
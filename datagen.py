@@ -0,0 +1,384 @@
+"""Deterministic synthetic dataset, bulk-loaded with COPY.
+
+Every business and user is generated from its own ``Random(f"{seed}:...")``,
+so the same seed always yields the same rows and ids, however the work is
+split. Ranges of businesses are generated in one pass (optionally across
+processes) straight into per-table CSV files, which are then streamed into
+the database with one COPY each inside a single transaction. Memory stays
+flat whatever the scale.
+
+Triggers are switched off for the load (``session_replication_role =
+replica``, which needs a superuser) and the derived tables they would have
+maintained are rebuilt in bulk afterwards, see ``DERIVED``.
+"""
+
+import csv
+import json
+import os
+import random
+import tempfile
+import time as clock
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from multiprocessing import Pool
+
+from app.availability import BUSINESS_TIMEZONE
+from app.database import engine
+from app.occupancy import REBUILD as REBUILD_STAFF_OCCUPANCY
+from app.ratings import REBUILD as REBUILD_RATING_STATS
+from app.rollups import refresh as refresh_rollups
+
+COLUMNS = {
+    "addresses": (
+        "id", "street_line_1", "suburb", "city", "state", "postcode", "country",
+        "latitude", "longitude",
+    ),
+    "users": (
+        "id", "first_name", "last_name", "date_of_birth", "email", "phone",
+        "avatar", "address_id",
+    ),
+    "businesses": (
+        "id", "name", "phone", "email", "website", "social_media", "address_id",
+        "description", "logo", "images",
+    ),
+    "opening_hour_templates": (
+        "id", "business_id", "weekday", "start_time", "end_time", "valid_from",
+    ),
+    "staff": (
+        "id", "first_name", "last_name", "position", "description", "business_id",
+    ),
+    "qualifications": (
+        "id", "name", "company", "description", "certificate_id",
+        "certificate_image", "staff_id",
+    ),
+    "service_categories": (
+        "id", "name", "description", "images", "price_from", "min_duration_mins",
+        "max_duration_mins", "business_id",
+    ),
+    "services": (
+        "id", "name", "duration_mins", "price", "description", "images",
+        "service_category_id",
+    ),
+    "bookings": (
+        "id", "booking_id", "time", "ends_at", "user_id", "business_id", "staff_id",
+    ),
+    "booking_services": ("booking_id", "service_id"),
+    "ratings": ("id", "booking_id", "stars", "description"),
+}
+
+# the monthly bookings partitions spanning a date range
+PARTITIONS = """
+    SELECT create_booking_partition(month::date, %(tz)s)
+    FROM generate_series(
+        date_trunc('month', %(first)s::date), %(last)s::date, interval '1 month'
+    ) month
+"""
+
+# derived data normally kept up by triggers, rebuilt after the load
+DERIVED = [
+    "INSERT INTO booking_keys (id, booking_id, time, business_id) "
+    "SELECT id, booking_id, time, business_id FROM bookings "
+    "ON CONFLICT DO NOTHING",
+    "UPDATE businesses SET search_document = business_search_document(businesses)",
+    "DELETE FROM business_rating_stats",
+    str(REBUILD_RATING_STATS),
+    "DELETE FROM staff_occupancy",
+    str(REBUILD_STAFF_OCCUPANCY),
+]
+
+CITIES = [
+    ("Sydney", "NSW", -33.8688, 151.2093, ["Surry Hills", "Newtown", "Bondi"]),
+    ("Melbourne", "VIC", -37.8136, 144.9631, ["Fitzroy", "Richmond", "South Yarra"]),
+    ("Brisbane", "QLD", -27.4698, 153.0251, ["Fortitude Valley", "New Farm"]),
+    ("Perth", "WA", -31.9523, 115.8613, ["Subiaco", "Leederville"]),
+    ("Adelaide", "SA", -34.9285, 138.6007, ["Glenelg", "Norwood"]),
+]
+CATEGORIES = {
+    "Brows": ["Brow Lamination", "Brow Shape & Tint", "Brow Wax"],
+    "Lashes": ["Lash Lift", "Lash Extensions", "Lash Tint"],
+    "Nails": ["Gel Manicure", "Acrylic Set", "Pedicure"],
+    "Facials": ["Signature Glow Facial", "Microdermabrasion", "Chemical Peel"],
+    "Massage": ["Remedial Massage", "Hot Stone Massage", "Lymphatic Drainage"],
+    "Hair": ["Balayage", "Blow Dry", "Keratin Treatment"],
+}
+FIRST_NAMES = ["Mia", "Olivia", "Nicole", "Emily", "Chloe", "Grace", "Zoe", "Ava"]
+LAST_NAMES = ["Chan", "Nguyen", "Low", "Wong", "Smith", "Brown", "Tran", "Lee", "Patel"]
+BRAND_WORDS = ["Happy", "Glow", "Luxe", "Velvet", "Bloom", "Halo", "Pure", "Golden"]
+BRAND_NOUNS = ["Nails", "Beauty", "Brows", "Skin", "Lounge", "Bar", "Studio", "Room"]
+
+OPENS, CLOSES = time(9), time(17)
+DURATIONS = (30, 45, 60, 75, 90)
+
+# bookings a day always has room for, even at the longest service
+MAX_BOOKINGS_PER_DAY = (CLOSES.hour - OPENS.hour) * 60 // max(DURATIONS)
+
+# Default centre of the booking calendar. Fixed, not date.today(), so a seed
+# gives the same rows whenever it runs; seed.py --today moves it.
+ANCHOR = date(2026, 1, 5)
+
+
+@dataclass
+class Scale:
+    businesses: int
+    users: int
+    bookings_per_business: int
+    days: int = 56
+    seed: int = 1
+    # the booking calendar is centred on this day: half past, half future
+    today: date = ANCHOR
+
+    def __post_init__(self):
+        if self.bookings_per_business > self.days * MAX_BOOKINGS_PER_DAY:
+            raise ValueError(
+                f"{self.bookings_per_business} bookings per business don't fit "
+                f"in {self.days} days, at most {MAX_BOOKINGS_PER_DAY} a day"
+            )
+
+    @property
+    def first_day(self):
+        return self.today - timedelta(days=self.days // 2)
+
+
+def _uuid(rng):
+    # Postgres takes 32 bare hex digits as a uuid; far cheaper than uuid.UUID
+    return f"{rng.getrandbits(128):032x}"
+
+
+@lru_cache
+def _user_id_base(seed):
+    return random.Random(f"{seed}:users").getrandbits(128) >> 32 << 32
+
+
+def _user_id(scale, index):
+    # derivable without generating the user, so bookings can point at one
+    return f"{_user_id_base(scale.seed) | index:032x}"
+
+
+def _array(values):
+    return "{" + ",".join(f'"{value}"' for value in values) + "}"
+
+
+def user_rows(scale, index):
+    rng = random.Random(f"{scale.seed}:user:{index}")
+    rows = {"addresses": [], "users": []}
+    address_id = None
+    if rng.random() < 0.5:
+        city, state, lat, lng, suburbs = rng.choice(CITIES)
+        address_id = _uuid(rng)
+        rows["addresses"].append((
+            address_id, f"{rng.randint(1, 400)} User St", rng.choice(suburbs),
+            city, state, f"{rng.randint(2000, 6999)}", "Australia",
+            round(lat + rng.uniform(-0.2, 0.2), 6),
+            round(lng + rng.uniform(-0.2, 0.2), 6),
+        ))
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    rows["users"].append((
+        _user_id(scale, index), first, last,
+        date(1960, 1, 1) + timedelta(days=rng.randrange(16000)),
+        f"{first.lower()}.{last.lower()}.{index}@example.com",
+        f"+61 4{rng.randrange(10 ** 8):08d}", f"users/{index}_avatar.jpg", address_id,
+    ))
+    return rows
+
+
+def business_rows(scale, index):
+    rng = random.Random(f"{scale.seed}:{index}")
+    rows = {table: [] for table in COLUMNS}
+
+    city, state, lat, lng, suburbs = rng.choice(CITIES)
+    address_id, business_id = _uuid(rng), _uuid(rng)
+    rows["addresses"].append((
+        address_id, f"{rng.randint(1, 400)} Beauty Lane", rng.choice(suburbs),
+        city, state, f"{rng.randint(2000, 6999)}", "Australia",
+        round(lat + rng.uniform(-0.15, 0.15), 6),
+        round(lng + rng.uniform(-0.15, 0.15), 6),
+    ))
+
+    categories = rng.sample(sorted(CATEGORIES), rng.randint(2, 4))
+    slug = f"business{index}"
+    rows["businesses"].append((
+        business_id,
+        f"{rng.choice(BRAND_WORDS)} {rng.choice(BRAND_NOUNS)} {index}",
+        f"+61 4{rng.randrange(10 ** 8):08d}",
+        f"hello@{slug}.example.com",
+        f"https://{slug}.example.com",
+        json.dumps({"instagram": f"https://instagram.com/{slug}"}),
+        address_id,
+        f"A {city} studio for {', '.join(c.lower() for c in categories)}.",
+        f"business-images/{slug}_logo.png",
+        _array(f"business-images/{slug}_{n}.jpg" for n in range(rng.randint(1, 6))),
+    ))
+
+    for weekday in range(7):
+        rows["opening_hour_templates"].append((
+            _uuid(rng), business_id, weekday, OPENS, CLOSES, scale.first_day
+        ))
+
+    staff = []
+    for n in range(rng.randint(2, 6)):
+        staff_id = _uuid(rng)
+        staff.append(staff_id)
+        rows["staff"].append((
+            staff_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+            _array([f"{rng.choice(categories)} Specialist"]), None, business_id,
+        ))
+        for q in range(rng.randint(1, 2)):
+            rows["qualifications"].append((
+                _uuid(rng), f"Certificate {q + 1}", "Beauty Institute", None,
+                f"CERT-{index}-{n}-{q}", _array([f"certificates/{index}_{n}_{q}.jpg"]),
+                staff_id,
+            ))
+
+    services = []
+    for name in categories:
+        category_id = _uuid(rng)
+        offered = []
+        for service_name in CATEGORIES[name]:
+            duration = rng.choice(DURATIONS)
+            price = rng.randrange(40, 200, 5)
+            service_id = _uuid(rng)
+            offered.append((duration, price))
+            services.append((service_id, duration))
+            rows["services"].append((
+                service_id, service_name, duration, price, None, None, category_id
+            ))
+        durations = [d for d, _ in offered]
+        rows["service_categories"].append((
+            category_id, name, f"{name} treatments.", None,
+            min(p for _, p in offered), min(durations), max(durations),
+            business_id,
+        ))
+
+    # spread bookings evenly over the days and lay each day's end to end
+    # through its opening hours, so they can never trip the no-overlap
+    # constraint. A booking that would leave too little of the day for the
+    # rest at the shortest service becomes that service, which always fits
+    # (Scale checks there are at most MAX_BOOKINGS_PER_DAY). Times are local
+    # wall-clock strings; load() sets the session time zone to parse them.
+    days = [scale.first_day + timedelta(days=offset) for offset in range(scale.days)]
+    past_days = (scale.today - scale.first_day).days
+    shortest = min(services, key=lambda service: service[1])
+    count, closes = scale.bookings_per_business, CLOSES.hour * 60
+    day = -1
+    for k in range(count):
+        if k * scale.days // count != day:
+            day, cursor = k * scale.days // count, OPENS.hour * 60
+        # this day's bookings from k on
+        left = -(-(day + 1) * count // scale.days) - k
+        picked = rng.sample(services, rng.choice((1, 1, 1, 2)))
+        length = sum(duration for _, duration in picked)
+        gap = rng.choice((0, 0, 15, 30))
+        if cursor + gap + length + (left - 1) * shortest[1] > closes:
+            picked, gap, length = [shortest], 0, shortest[1]
+        cursor += gap
+        ends = cursor + length
+
+        booking_id = _uuid(rng)
+        rows["bookings"].append((
+            booking_id,
+            index * scale.bookings_per_business + k + 1,
+            f"{days[day]} {cursor // 60:02d}:{cursor % 60:02d}",
+            f"{days[day]} {ends // 60:02d}:{ends % 60:02d}",
+            _user_id(scale, rng.randrange(scale.users)),
+            business_id,
+            rng.choice(staff),
+        ))
+        rows["booking_services"].extend(
+            (booking_id, service_id) for service_id, _ in picked
+        )
+        if day < past_days and rng.random() < 0.6:
+            stars = Decimal(rng.choice((30, 35, 40, 42, 45, 48, 50))) / 10
+            rows["ratings"].append((_uuid(rng), booking_id, stars, None))
+        cursor = ends
+
+    return rows
+
+
+def _write_chunk(task):
+    """Generate one range of users or businesses into per-table CSV files."""
+    scale, kind, start, stop, directory = task
+    generate = user_rows if kind == "users" else business_rows
+    files, writers = {}, {}
+    try:
+        for index in range(start, stop):
+            for table, rows in generate(scale, index).items():
+                if not rows:
+                    continue
+                if table not in writers:
+                    path = os.path.join(directory, f"{table}.{kind}.{start:010d}.csv")
+                    files[table] = open(path, "w", newline="")
+                    writers[table] = csv.writer(files[table], lineterminator="\n")
+                writers[table].writerows(rows)
+    finally:
+        for file in files.values():
+            file.close()
+    return {table: file.name for table, file in files.items()}
+
+
+def _tasks(scale, directory, users_per_task=20000, businesses_per_task=500):
+    for start in range(0, scale.users, users_per_task):
+        stop = min(start + users_per_task, scale.users)
+        yield scale, "users", start, stop, directory
+    for start in range(0, scale.businesses, businesses_per_task):
+        stop = min(start + businesses_per_task, scale.businesses)
+        yield scale, "businesses", start, stop, directory
+
+
+def load(scale, jobs=1, log=print):
+    """Generate the dataset and COPY it in, all in one transaction."""
+    with tempfile.TemporaryDirectory(prefix="datagen-") as directory:
+        started = clock.perf_counter()
+        if jobs > 1:
+            with Pool(jobs) as pool:
+                chunks = list(pool.imap(_write_chunk, _tasks(scale, directory)))
+        else:
+            chunks = [_write_chunk(task) for task in _tasks(scale, directory)]
+        log(f"{'generated':<20} {'':>12} {clock.perf_counter() - started:8.1f}s")
+
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SET session_replication_role = replica")
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            cursor.execute("SET TIME ZONE %s", (BUSINESS_TIMEZONE.key,))
+            cursor.execute(
+                PARTITIONS,
+                {
+                    "tz": BUSINESS_TIMEZONE.key,
+                    "first": scale.first_day,
+                    "last": scale.first_day + timedelta(days=scale.days),
+                },
+            )
+            for table, columns in COLUMNS.items():
+                started, rows = clock.perf_counter(), 0
+                sql = (
+                    f"COPY {table} ({', '.join(columns)}) "
+                    "FROM STDIN WITH (FORMAT csv)"
+                )
+                for chunk in chunks:
+                    if table in chunk:
+                        with open(chunk[table], newline="") as file:
+                            cursor.copy_expert(sql, file)
+                        rows += cursor.rowcount
+                log(f"{table:<20} {rows:>12,} {clock.perf_counter() - started:8.1f}s")
+
+            started = clock.perf_counter()
+            for statement in DERIVED:
+                cursor.execute(statement)
+            cursor.execute("SET session_replication_role = DEFAULT")
+            connection.commit()
+            elapsed = clock.perf_counter() - started
+            log(f"{'derived tables':<20} {'':>12} {elapsed:8.1f}s")
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        # batch-maintained, so it runs like it would in production: one
+        # incremental refresh that finds every new booking past its watermark
+        started = clock.perf_counter()
+        days = refresh_rollups()
+        log(f"{'rollups':<20} {days:>12,} {clock.perf_counter() - started:8.1f}s")
@@ -0,0 +1,84 @@
+"""Add business_changed triggers
+
+Revision ID: 3e8b6d0f12ac
+Revises: 9f1d2c7a3b4e
+Create Date: 2026-10-18 10:03:47.118502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8b6d0f12ac'
+down_revision: Union[str, Sequence[str], None] = '9f1d2c7a3b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# every table that is part of a cached business payload (app/cache.py)
+TABLES = (
+    'businesses',
+    'addresses',
+    'opening_hours',
+    'staff',
+    'qualifications',
+    'service_categories',
+    'services',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Child writes bump businesses.updated_at, so the parent row carries the
+    # version of its whole graph. The businesses trigger then publishes that
+    # version; Postgres folds identical notifications within a transaction.
+    op.execute("""
+        CREATE FUNCTION notify_business_changed() RETURNS trigger AS $$
+        DECLARE
+            r record;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                r := OLD;
+            ELSE
+                r := NEW;
+            END IF;
+
+            IF TG_TABLE_NAME = 'businesses' THEN
+                PERFORM pg_notify(
+                    'business_changed',
+                    json_build_object('id', r.id, 'version', now())::text
+                );
+            ELSIF TG_TABLE_NAME IN ('opening_hours', 'staff', 'service_categories') THEN
+                UPDATE businesses SET updated_at = now() WHERE id = r.business_id;
+            ELSIF TG_TABLE_NAME = 'qualifications' THEN
+                UPDATE businesses SET updated_at = now()
+                WHERE id = (SELECT business_id FROM staff WHERE id = r.staff_id);
+            ELSIF TG_TABLE_NAME = 'services' THEN
+                UPDATE businesses SET updated_at = now()
+                WHERE id = (
+                    SELECT business_id FROM service_categories
+                    WHERE id = r.service_category_id
+                );
+            ELSIF TG_TABLE_NAME = 'addresses' THEN
+                UPDATE businesses SET updated_at = now() WHERE address_id = r.id;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_business_changed "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION notify_business_changed()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER {table}_business_changed ON {table}")
+    op.execute("DROP FUNCTION notify_business_changed()")
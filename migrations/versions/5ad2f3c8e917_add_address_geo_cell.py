@@ -0,0 +1,30 @@
+"""Add address geo_cell
+
+Revision ID: 5ad2f3c8e917
+Revises: c4a09e1f7b63
+Create Date: 2026-10-18 12:16:05.377290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5ad2f3c8e917'
+down_revision: Union[str, Sequence[str], None] = 'c4a09e1f7b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('addresses', sa.Column('geo_cell', sa.Integer(), sa.Computed('floor((latitude + 90) * 10)::integer * 3600 + floor((longitude + 180) * 10)::integer', persisted=True), nullable=True))
+    op.create_index(op.f('ix_addresses_geo_cell'), 'addresses', ['geo_cell'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_addresses_geo_cell'), table_name='addresses')
+    op.drop_column('addresses', 'geo_cell')
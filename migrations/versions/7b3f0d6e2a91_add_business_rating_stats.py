@@ -0,0 +1,123 @@
+"""Add business rating stats
+
+Revision ID: 7b3f0d6e2a91
+Revises: e2c7b915a4d8
+Create Date: 2026-10-18 13:48:21.016654
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3f0d6e2a91'
+down_revision: Union[str, Sequence[str], None] = 'e2c7b915a4d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('business_rating_stats',
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('rating_sum', sa.Numeric(precision=14, scale=2), server_default=sa.text('0'), nullable=False),
+    sa.Column('rating_avg', sa.Numeric(precision=3, scale=2), sa.Computed('CASE WHEN rating_count > 0 THEN round(rating_sum / rating_count, 2) END', persisted=True), nullable=True),
+    sa.Column('stars_1', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('stars_2', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('stars_3', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('stars_4', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('stars_5', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('business_id')
+    )
+
+    # +1/-1 one rating into its business's row
+    op.execute("""
+        CREATE FUNCTION apply_rating_delta(bid uuid, stars numeric, delta integer)
+        RETURNS void AS $$
+            INSERT INTO business_rating_stats AS s (
+                business_id, rating_count, rating_sum,
+                stars_1, stars_2, stars_3, stars_4, stars_5
+            )
+            SELECT
+                bid, delta, delta * stars,
+                CASE WHEN bucket = 1 THEN delta ELSE 0 END,
+                CASE WHEN bucket = 2 THEN delta ELSE 0 END,
+                CASE WHEN bucket = 3 THEN delta ELSE 0 END,
+                CASE WHEN bucket = 4 THEN delta ELSE 0 END,
+                CASE WHEN bucket = 5 THEN delta ELSE 0 END
+            FROM (SELECT least(5, greatest(1, round(stars)))::int AS bucket) b
+            ON CONFLICT (business_id) DO UPDATE SET
+                rating_count = s.rating_count + EXCLUDED.rating_count,
+                rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+                stars_1 = s.stars_1 + EXCLUDED.stars_1,
+                stars_2 = s.stars_2 + EXCLUDED.stars_2,
+                stars_3 = s.stars_3 + EXCLUDED.stars_3,
+                stars_4 = s.stars_4 + EXCLUDED.stars_4,
+                stars_5 = s.stars_5 + EXCLUDED.stars_5,
+                updated_at = now()
+        $$ LANGUAGE sql
+    """)
+    op.execute("""
+        CREATE FUNCTION ratings_stats() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.stars = NEW.stars
+               AND OLD.booking_id = NEW.booking_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM apply_rating_delta(
+                    (SELECT business_id FROM bookings WHERE id = OLD.booking_id),
+                    OLD.stars,
+                    -1
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM apply_rating_delta(
+                    (SELECT business_id FROM bookings WHERE id = NEW.booking_id),
+                    NEW.stars,
+                    1
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER ratings_stats "
+        "AFTER INSERT OR UPDATE OR DELETE ON ratings "
+        "FOR EACH ROW EXECUTE FUNCTION ratings_stats()"
+    )
+
+    # existing ratings
+    op.execute("""
+        INSERT INTO business_rating_stats (
+            business_id, rating_count, rating_sum,
+            stars_1, stars_2, stars_3, stars_4, stars_5
+        )
+        SELECT
+            bk.business_id,
+            count(*),
+            sum(r.stars),
+            count(*) FILTER (WHERE round(r.stars) <= 1),
+            count(*) FILTER (WHERE round(r.stars) = 2),
+            count(*) FILTER (WHERE round(r.stars) = 3),
+            count(*) FILTER (WHERE round(r.stars) = 4),
+            count(*) FILTER (WHERE round(r.stars) >= 5)
+        FROM ratings r
+        JOIN bookings bk ON bk.id = r.booking_id
+        GROUP BY bk.business_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER ratings_stats ON ratings")
+    op.execute("DROP FUNCTION ratings_stats()")
+    op.execute("DROP FUNCTION apply_rating_delta(uuid, numeric, integer)")
+    op.drop_table('business_rating_stats')
@@ -0,0 +1,30 @@
+"""Add keyset pagination indexes
+
+Revision ID: 9f1d2c7a3b4e
+Revises: 5c4142b8a40a
+Create Date: 2026-10-18 09:12:31.402115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f1d2c7a3b4e'
+down_revision: Union[str, Sequence[str], None] = '5c4142b8a40a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_businesses_created_at_id', 'businesses', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_businesses_created_at_id', table_name='businesses')
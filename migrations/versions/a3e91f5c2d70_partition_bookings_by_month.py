@@ -0,0 +1,227 @@
+"""Partition bookings by month
+
+Revision ID: a3e91f5c2d70
+Revises: d58c1e7a9b34
+Create Date: 2026-10-18 16:04:27.918350
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e91f5c2d70'
+down_revision: Union[str, Sequence[str], None] = 'd58c1e7a9b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# partitions are local calendar months, like every other date in the app
+BUSINESS_TIMEZONE = os.getenv("BUSINESS_TIMEZONE", "Australia/Sydney")
+MONTHS_AHEAD = 12
+
+COLUMNS = "id, booking_id, time, ends_at, user_id, business_id, created_at, updated_at"
+
+# ratings_stats() from revision 7b3f0d6e2a91, reading the business of a
+# booking from {table}
+RATINGS_STATS_FUNCTION = """
+    CREATE OR REPLACE FUNCTION ratings_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE'
+           AND OLD.stars = NEW.stars
+           AND OLD.booking_id = NEW.booking_id THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM apply_rating_delta(
+                (SELECT business_id FROM {table} WHERE id = OLD.booking_id),
+                OLD.stars,
+                -1
+            );
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM apply_rating_delta(
+                (SELECT business_id FROM {table} WHERE id = NEW.booking_id),
+                NEW.stars,
+                1
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def _repoint_foreign_keys(table):
+    for referencing in ('booking_services', 'ratings'):
+        name = f'{referencing}_booking_id_fkey'
+        op.drop_constraint(name, referencing, type_='foreignkey')
+        op.create_foreign_key(name, referencing, table, ['booking_id'], ['id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A partitioned table can only enforce uniqueness on keys that include
+    # the partition key, so booking ids and numbers are made unique here, and
+    # booking_services and ratings reference this table instead of bookings.
+    op.create_table('booking_keys',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('booking_id', sa.BigInteger(), nullable=True),
+    sa.Column('time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('booking_id')
+    )
+    op.execute(
+        "INSERT INTO booking_keys (id, booking_id, time, business_id) "
+        "SELECT id, booking_id, time, business_id FROM bookings"
+    )
+    _repoint_foreign_keys('booking_keys')
+    op.execute(RATINGS_STATS_FUNCTION.format(table='booking_keys'))
+
+    # clear the names the partitioned table takes over
+    op.drop_index('ix_bookings_business_id_time', table_name='bookings')
+    op.drop_index('ix_bookings_user_id', table_name='bookings')
+    op.drop_index(op.f('ix_bookings_booking_id'), table_name='bookings')
+    op.drop_constraint('bookings_no_overlap', 'bookings')
+    op.execute("ALTER TABLE bookings RENAME CONSTRAINT bookings_pkey TO bookings_unpartitioned_pkey")
+    op.rename_table('bookings', 'bookings_unpartitioned')
+
+    op.create_table('bookings',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('booking_id', sa.BigInteger(), nullable=True),
+    sa.Column('time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'time'),
+    postgresql_partition_by='RANGE (time)'
+    )
+    op.create_index('ix_bookings_business_id_time', 'bookings', ['business_id', 'time'], unique=False)
+    op.create_index(op.f('ix_bookings_user_id'), 'bookings', ['user_id'], unique=False)
+    op.create_index(op.f('ix_bookings_booking_id'), 'bookings', ['booking_id'], unique=False)
+
+    # One partition per local month, bookings_YYYY_MM, each with its own
+    # no-overlap exclusion constraint: exclusion constraints can't be declared
+    # on a partitioned table. Returns the name when it created the partition.
+    op.execute("""
+        CREATE FUNCTION create_booking_partition(month date, tz text)
+        RETURNS text AS $$
+        DECLARE
+            month_start date := date_trunc('month', month)::date;
+            relname text := 'bookings_' || to_char(month_start, 'YYYY_MM');
+        BEGIN
+            IF to_regclass(relname) IS NOT NULL THEN
+                RETURN NULL;
+            END IF;
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF bookings FOR VALUES FROM (%L) TO (%L)',
+                relname,
+                month_start::timestamp AT TIME ZONE tz,
+                (month_start + interval '1 month')::timestamp AT TIME ZONE tz
+            );
+            EXECUTE format(
+                'ALTER TABLE %I ADD CONSTRAINT %I EXCLUDE USING gist '
+                '(business_id WITH =, tstzrange(time, ends_at) WITH &&)',
+                relname,
+                relname || '_no_overlap'
+            );
+            RETURN relname;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.get_bind().execute(
+        sa.text("""
+            SELECT create_booking_partition(month::date, :tz)
+            FROM generate_series(
+                date_trunc('month', least(
+                    (SELECT min(time) FROM bookings_unpartitioned) AT TIME ZONE :tz,
+                    now() AT TIME ZONE :tz
+                )),
+                date_trunc('month', greatest(
+                    (SELECT max(time) FROM bookings_unpartitioned) AT TIME ZONE :tz,
+                    (now() AT TIME ZONE :tz) + make_interval(months => :ahead)
+                )),
+                interval '1 month'
+            ) month
+        """),
+        {"tz": BUSINESS_TIMEZONE, "ahead": MONTHS_AHEAD},
+    )
+
+    op.execute(
+        f"INSERT INTO bookings ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM bookings_unpartitioned"
+    )
+    op.drop_table('bookings_unpartitioned')
+
+    op.execute("""
+        CREATE FUNCTION sync_booking_keys() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO booking_keys (id, booking_id, time, business_id)
+                VALUES (NEW.id, NEW.booking_id, NEW.time, NEW.business_id);
+            ELSIF TG_OP = 'UPDATE' THEN
+                UPDATE booking_keys
+                SET id = NEW.id,
+                    booking_id = NEW.booking_id,
+                    time = NEW.time,
+                    business_id = NEW.business_id
+                WHERE id = OLD.id;
+            ELSE
+                DELETE FROM booking_keys WHERE id = OLD.id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER bookings_keys "
+        "AFTER INSERT OR UPDATE OR DELETE ON bookings "
+        "FOR EACH ROW EXECUTE FUNCTION sync_booking_keys()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partitions detached by app.partitions aren't brought back: reattach
+    # them first, or the foreign keys below fail on their bookings' ratings.
+    op.create_table('bookings_unpartitioned',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('booking_id', sa.BigInteger(), nullable=True),
+    sa.Column('time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', name='bookings_unpartitioned_pkey')
+    )
+    op.execute(
+        f"INSERT INTO bookings_unpartitioned ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM bookings"
+    )
+    op.drop_table('bookings')
+    op.execute("DROP FUNCTION sync_booking_keys()")
+    op.execute("DROP FUNCTION create_booking_partition(date, text)")
+
+    op.rename_table('bookings_unpartitioned', 'bookings')
+    op.execute("ALTER TABLE bookings RENAME CONSTRAINT bookings_unpartitioned_pkey TO bookings_pkey")
+    op.create_index(op.f('ix_bookings_booking_id'), 'bookings', ['booking_id'], unique=True)
+    op.create_index(op.f('ix_bookings_user_id'), 'bookings', ['user_id'], unique=False)
+    op.create_index('ix_bookings_business_id_time', 'bookings', ['business_id', 'time'], unique=False)
+    op.execute("""
+        ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+        EXCLUDE USING gist (business_id WITH =, tstzrange(time, ends_at) WITH &&)
+    """)
+
+    op.execute(RATINGS_STATS_FUNCTION.format(table='bookings'))
+    _repoint_foreign_keys('bookings')
+    op.drop_table('booking_keys')
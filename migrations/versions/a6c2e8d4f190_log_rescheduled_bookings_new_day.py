@@ -0,0 +1,51 @@
+"""Log the new day of rescheduled bookings for the rollups
+
+Revision ID: a6c2e8d4f190
+Revises: d3a7f9b2c604
+Create Date: 2026-10-18 20:22:14.903517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c2e8d4f190'
+down_revision: Union[str, Sequence[str], None] = 'd3a7f9b2c604'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bookings.updated_at is set by the ORM, not the database, so a booking
+    # rescheduled in SQL would only have its old day refreshed; an update
+    # logs the new day as well
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_booking_rollup_change() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO booking_rollup_changes (business_id, day)
+            VALUES (OLD.business_id, (OLD.time AT TIME ZONE TG_ARGV[0])::date);
+            IF TG_OP = 'UPDATE' THEN
+                INSERT INTO booking_rollup_changes (business_id, day)
+                VALUES (NEW.business_id, (NEW.time AT TIME ZONE TG_ARGV[0])::date);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_booking_rollup_change() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO booking_rollup_changes (business_id, day)
+            VALUES (OLD.business_id, (OLD.time AT TIME ZONE TG_ARGV[0])::date);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
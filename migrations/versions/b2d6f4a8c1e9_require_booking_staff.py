@@ -0,0 +1,54 @@
+"""Require staff on the bookings of businesses with staff
+
+Revision ID: b2d6f4a8c1e9
+Revises: e8a4c2f17d93
+Create Date: 2026-10-18 19:40:05.214389
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d6f4a8c1e9'
+down_revision: Union[str, Sequence[str], None] = 'e8a4c2f17d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The partitions' exclusion constraints key a booking on
+    # coalesce(staff_id, business_id), so a booking without staff and one
+    # with staff never conflict. Keeping staff-less bookings to businesses
+    # that have no staff makes the key mean one thing per business: the
+    # business itself, or each of its staff members.
+    op.execute("""
+        CREATE FUNCTION require_booking_staff() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.staff_id IS NULL
+               AND EXISTS (SELECT 1 FROM staff WHERE business_id = NEW.business_id)
+            THEN
+                RAISE EXCEPTION 'business % has staff, so a booking needs staff_id',
+                    NEW.business_id
+                    USING ERRCODE = 'not_null_violation',
+                          TABLE = 'bookings',
+                          COLUMN = 'staff_id';
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER bookings_require_staff "
+        "BEFORE INSERT OR UPDATE OF staff_id, business_id ON bookings "
+        "FOR EACH ROW EXECUTE FUNCTION require_booking_staff()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER bookings_require_staff ON bookings")
+    op.execute("DROP FUNCTION require_booking_staff()")
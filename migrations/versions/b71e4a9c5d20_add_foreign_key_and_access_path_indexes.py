@@ -0,0 +1,46 @@
+"""Add foreign key and access path indexes
+
+Revision ID: b71e4a9c5d20
+Revises: 3e8b6d0f12ac
+Create Date: 2026-10-18 10:41:09.553871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4a9c5d20'
+down_revision: Union[str, Sequence[str], None] = '3e8b6d0f12ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_users_address_id'), 'users', ['address_id'], unique=False)
+    op.create_index(op.f('ix_businesses_address_id'), 'businesses', ['address_id'], unique=False)
+    op.create_index(op.f('ix_staff_business_id'), 'staff', ['business_id'], unique=False)
+    op.create_index(op.f('ix_qualifications_staff_id'), 'qualifications', ['staff_id'], unique=False)
+    op.create_index('ix_opening_hours_business_id_date', 'opening_hours', ['business_id', 'date'], unique=False)
+    op.create_index(op.f('ix_service_categories_business_id'), 'service_categories', ['business_id'], unique=False)
+    op.create_index(op.f('ix_services_service_category_id'), 'services', ['service_category_id'], unique=False)
+    op.create_index(op.f('ix_bookings_user_id'), 'bookings', ['user_id'], unique=False)
+    op.create_index('ix_bookings_business_id_time', 'bookings', ['business_id', 'time'], unique=False)
+    op.create_index('ix_booking_services_service_id', 'booking_services', ['service_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_services_service_id', table_name='booking_services')
+    op.drop_index('ix_bookings_business_id_time', table_name='bookings')
+    op.drop_index(op.f('ix_bookings_user_id'), table_name='bookings')
+    op.drop_index(op.f('ix_services_service_category_id'), table_name='services')
+    op.drop_index(op.f('ix_service_categories_business_id'), table_name='service_categories')
+    op.drop_index('ix_opening_hours_business_id_date', table_name='opening_hours')
+    op.drop_index(op.f('ix_qualifications_staff_id'), table_name='qualifications')
+    op.drop_index(op.f('ix_staff_business_id'), table_name='staff')
+    op.drop_index(op.f('ix_businesses_address_id'), table_name='businesses')
+    op.drop_index(op.f('ix_users_address_id'), table_name='users')
@@ -0,0 +1,94 @@
+"""Add daily booking and revenue rollups
+
+Revision ID: b94d7e21c6f5
+Revises: f1c86a3e5b27
+Create Date: 2026-10-18 17:31:52.640183
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b94d7e21c6f5'
+down_revision: Union[str, Sequence[str], None] = 'f1c86a3e5b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# rollup days are local dates
+BUSINESS_TIMEZONE = os.getenv("BUSINESS_TIMEZONE", "Australia/Sydney")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('booking_daily_stats',
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('business_id', 'day')
+    )
+    op.create_table('service_daily_stats',
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('service_id', sa.UUID(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.ForeignKeyConstraint(['service_id'], ['services.id'], ),
+    sa.PrimaryKeyConstraint('business_id', 'day', 'service_id')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('booking_rollup_changes',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=True), nullable=False),
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_booking_rollup_changes_changed_at'), 'booking_rollup_changes', ['changed_at'], unique=False)
+    op.create_index('ix_bookings_updated_at', 'bookings', ['updated_at'], unique=False)
+
+    # the first refresh picks up every booking
+    op.execute(
+        "INSERT INTO rollup_watermarks (name, watermark) "
+        "VALUES ('booking_rollups', '-infinity')"
+    )
+
+    # New and edited bookings are found by updated_at; a deleted booking, or
+    # one moved to another day, leaves nothing behind to find, so its old
+    # day is logged here for the next refresh.
+    op.execute("""
+        CREATE FUNCTION record_booking_rollup_change() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO booking_rollup_changes (business_id, day)
+            VALUES (OLD.business_id, (OLD.time AT TIME ZONE TG_ARGV[0])::date);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER bookings_rollup_changes "
+        "AFTER UPDATE OF time, business_id OR DELETE ON bookings "
+        f"FOR EACH ROW EXECUTE FUNCTION record_booking_rollup_change('{BUSINESS_TIMEZONE}')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER bookings_rollup_changes ON bookings")
+    op.execute("DROP FUNCTION record_booking_rollup_change()")
+    op.drop_index('ix_bookings_updated_at', table_name='bookings')
+    op.drop_index(op.f('ix_booking_rollup_changes_changed_at'), table_name='booking_rollup_changes')
+    op.drop_table('booking_rollup_changes')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('service_daily_stats')
+    op.drop_table('booking_daily_stats')
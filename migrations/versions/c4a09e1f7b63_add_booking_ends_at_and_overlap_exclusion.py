@@ -0,0 +1,50 @@
+"""Add booking ends_at and overlap exclusion constraint
+
+Revision ID: c4a09e1f7b63
+Revises: b71e4a9c5d20
+Create Date: 2026-10-18 11:27:52.804416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a09e1f7b63'
+down_revision: Union[str, Sequence[str], None] = 'b71e4a9c5d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # gist operator class for plain equality on uuid
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.add_column('bookings', sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("""
+        UPDATE bookings b
+        SET ends_at = b.time + make_interval(mins => coalesce(d.total, 0))
+        FROM (
+            SELECT bk.id, sum(s.duration_mins)::int AS total
+            FROM bookings bk
+            LEFT JOIN booking_services bs ON bs.booking_id = bk.id
+            LEFT JOIN services s ON s.id = bs.service_id
+            GROUP BY bk.id
+        ) d
+        WHERE d.id = b.id
+    """)
+    op.alter_column('bookings', 'ends_at', nullable=False)
+
+    op.execute("""
+        ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+        EXCLUDE USING gist (business_id WITH =, tstzrange(time, ends_at) WITH &&)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('bookings_no_overlap', 'bookings')
+    op.drop_column('bookings', 'ends_at')
@@ -0,0 +1,120 @@
+"""Derive category price_from and durations from services
+
+Revision ID: c7e3a9f05b18
+Revises: b94d7e21c6f5
+Create Date: 2026-10-18 18:02:16.377402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e3a9f05b18'
+down_revision: Union[str, Sequence[str], None] = 'b94d7e21c6f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('service_categories', sa.Column('min_duration_mins', sa.Integer(), nullable=True))
+    op.add_column('service_categories', sa.Column('max_duration_mins', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE service_categories c
+        SET price_from = s.price_from,
+            min_duration_mins = s.min_duration_mins,
+            max_duration_mins = s.max_duration_mins
+        FROM (
+            SELECT c.id,
+                   min(sv.price) AS price_from,
+                   min(sv.duration_mins) AS min_duration_mins,
+                   max(sv.duration_mins) AS max_duration_mins
+            FROM service_categories c
+            LEFT JOIN services sv ON sv.service_category_id = c.id
+            GROUP BY c.id
+        ) s
+        WHERE s.id = c.id
+    """)
+    op.drop_column('service_categories', 'duration_range')
+
+    # Recomputes one category's figures from its services, locking the
+    # category row first so that concurrent writers to the same category
+    # queue and each aggregate sees the others' committed services. Rows
+    # only change when a figure does, which spares the business_changed
+    # trigger on service_categories.
+    op.execute("""
+        CREATE FUNCTION refresh_category_figures(category uuid) RETURNS void AS $$
+        BEGIN
+            PERFORM 1 FROM service_categories WHERE id = category FOR UPDATE;
+            UPDATE service_categories c
+            SET price_from = s.price_from,
+                min_duration_mins = s.min_duration_mins,
+                max_duration_mins = s.max_duration_mins
+            FROM (
+                SELECT min(price) AS price_from,
+                       min(duration_mins) AS min_duration_mins,
+                       max(duration_mins) AS max_duration_mins
+                FROM services
+                WHERE service_category_id = category
+            ) s
+            WHERE c.id = category
+              AND (c.price_from, c.min_duration_mins, c.max_duration_mins)
+                  IS DISTINCT FROM
+                  (s.price_from, s.min_duration_mins, s.max_duration_mins);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION services_category_figures() RETURNS trigger AS $$
+        BEGIN
+            -- a service moving between categories locks both rows in id
+            -- order up front, so opposite moves queue instead of deadlocking
+            IF TG_OP = 'UPDATE'
+               AND NEW.service_category_id IS DISTINCT FROM OLD.service_category_id
+            THEN
+                PERFORM 1 FROM service_categories
+                WHERE id IN (OLD.service_category_id, NEW.service_category_id)
+                ORDER BY id
+                FOR UPDATE;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM refresh_category_figures(OLD.service_category_id);
+            END IF;
+            IF TG_OP = 'INSERT' OR (
+                TG_OP = 'UPDATE'
+                AND NEW.service_category_id IS DISTINCT FROM OLD.service_category_id
+            ) THEN
+                PERFORM refresh_category_figures(NEW.service_category_id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER services_category_figures "
+        "AFTER INSERT OR UPDATE OF price, duration_mins, service_category_id "
+        "OR DELETE ON services "
+        "FOR EACH ROW EXECUTE FUNCTION services_category_figures()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER services_category_figures ON services")
+    op.execute("DROP FUNCTION services_category_figures()")
+    op.execute("DROP FUNCTION refresh_category_figures(uuid)")
+    op.add_column('service_categories', sa.Column('duration_range', sa.String(), nullable=True))
+    op.execute("""
+        UPDATE service_categories
+        SET duration_range = CASE
+            WHEN min_duration_mins = max_duration_mins
+                THEN min_duration_mins || ' mins'
+            ELSE min_duration_mins || '–' || max_duration_mins || ' mins'
+        END
+        WHERE min_duration_mins IS NOT NULL
+    """)
+    op.drop_column('service_categories', 'max_duration_mins')
+    op.drop_column('service_categories', 'min_duration_mins')
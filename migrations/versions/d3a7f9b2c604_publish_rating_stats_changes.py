@@ -0,0 +1,57 @@
+"""Publish rating stats changes on business_changed
+
+Revision ID: d3a7f9b2c604
+Revises: b2d6f4a8c1e9
+Create Date: 2026-10-18 20:05:37.418902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7f9b2c604'
+down_revision: Union[str, Sequence[str], None] = 'b2d6f4a8c1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rating stats are part of the cached business payloads but don't bump
+    # businesses.updated_at, so their writes (the ratings_stats trigger's
+    # deltas, and app.ratings rebuilds) publish on their own. The version is
+    # the stats row's updated_at, which the business's version includes.
+    op.execute("""
+        CREATE FUNCTION notify_rating_stats_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify(
+                    'business_changed',
+                    json_build_object('id', OLD.business_id, 'version', now())::text
+                );
+            ELSE
+                PERFORM pg_notify(
+                    'business_changed',
+                    json_build_object(
+                        'id', NEW.business_id, 'version', NEW.updated_at
+                    )::text
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER business_rating_stats_changed "
+        "AFTER INSERT OR UPDATE OR DELETE ON business_rating_stats "
+        "FOR EACH ROW EXECUTE FUNCTION notify_rating_stats_changed()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER business_rating_stats_changed ON business_rating_stats")
+    op.execute("DROP FUNCTION notify_rating_stats_changed()")
@@ -0,0 +1,237 @@
+"""Replace opening_hours with weekly templates and exceptions
+
+Revision ID: d58c1e7a9b34
+Revises: 7b3f0d6e2a91
+Create Date: 2026-10-18 15:12:40.562118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd58c1e7a9b34'
+down_revision: Union[str, Sequence[str], None] = '7b3f0d6e2a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_TABLES = ('opening_hour_templates', 'opening_hour_exceptions')
+
+# notify_business_changed() from revision 3e8b6d0f12ac, with the tables whose
+# rows carry a business_id passed in
+NOTIFY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION notify_business_changed() RETURNS trigger AS $$
+    DECLARE
+        r record;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            r := OLD;
+        ELSE
+            r := NEW;
+        END IF;
+
+        IF TG_TABLE_NAME = 'businesses' THEN
+            PERFORM pg_notify(
+                'business_changed',
+                json_build_object('id', r.id, 'version', now())::text
+            );
+        ELSIF TG_TABLE_NAME IN ({tables}) THEN
+            UPDATE businesses SET updated_at = now() WHERE id = r.business_id;
+        ELSIF TG_TABLE_NAME = 'qualifications' THEN
+            UPDATE businesses SET updated_at = now()
+            WHERE id = (SELECT business_id FROM staff WHERE id = r.staff_id);
+        ELSIF TG_TABLE_NAME = 'services' THEN
+            UPDATE businesses SET updated_at = now()
+            WHERE id = (
+                SELECT business_id FROM service_categories
+                WHERE id = r.service_category_id
+            );
+        ELSIF TG_TABLE_NAME = 'addresses' THEN
+            UPDATE businesses SET updated_at = now() WHERE address_id = r.id;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def _notify_function(tables):
+    return NOTIFY_FUNCTION.format(tables=", ".join(f"'{t}'" for t in tables))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('opening_hour_templates',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('weekday', sa.SmallInteger(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.Column('valid_from', sa.Date(), nullable=True),
+    sa.Column('valid_until', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('weekday BETWEEN 0 AND 6', name='opening_hour_templates_weekday'),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_opening_hour_templates_business_id'), 'opening_hour_templates', ['business_id'], unique=False)
+    op.create_table('opening_hour_exceptions',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('(start_time IS NULL) = (end_time IS NULL)', name='opening_hour_exceptions_times'),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_opening_hour_exceptions_business_id_date', 'opening_hour_exceptions', ['business_id', 'date'], unique=False)
+
+    # Fold the per-date rows into templates. Each date's hours become one
+    # pattern string; the most common pattern per business and weekday over
+    # the business's stored span is the template, and every date in the span
+    # with a different pattern (including no hours at all) is an exception.
+    # Templates start at the first stored date so earlier history stays shut.
+    op.execute("""
+        CREATE TEMPORARY TABLE opening_days ON COMMIT DROP AS
+        WITH span AS (
+            SELECT business_id, min(date) AS first, max(date) AS last
+            FROM opening_hours
+            GROUP BY business_id
+        )
+        SELECT
+            s.business_id,
+            s.first,
+            d::date AS date,
+            extract(isodow FROM d)::int - 1 AS weekday,
+            coalesce(
+                (
+                    SELECT string_agg(
+                        o.start_time::text || '-' || o.end_time::text, ','
+                        ORDER BY o.start_time, o.end_time
+                    )
+                    FROM opening_hours o
+                    WHERE o.business_id = s.business_id AND o.date = d::date
+                ),
+                ''
+            ) AS pattern
+        FROM span s, generate_series(s.first, s.last, interval '1 day') d
+    """)
+    op.execute("""
+        CREATE TEMPORARY TABLE opening_weeks ON COMMIT DROP AS
+        SELECT
+            business_id,
+            weekday,
+            min(first) AS first,
+            mode() WITHIN GROUP (ORDER BY pattern) AS pattern
+        FROM opening_days
+        GROUP BY business_id, weekday
+    """)
+    op.execute("""
+        INSERT INTO opening_hour_templates (
+            business_id, weekday, start_time, end_time, valid_from
+        )
+        SELECT
+            w.business_id,
+            w.weekday,
+            split_part(interval_, '-', 1)::time,
+            split_part(interval_, '-', 2)::time,
+            w.first
+        FROM opening_weeks w,
+            unnest(string_to_array(nullif(w.pattern, ''), ',')) interval_
+    """)
+    op.execute("""
+        INSERT INTO opening_hour_exceptions (business_id, date, start_time, end_time)
+        SELECT
+            d.business_id,
+            d.date,
+            split_part(interval_, '-', 1)::time,
+            split_part(interval_, '-', 2)::time
+        FROM opening_days d
+        JOIN opening_weeks w USING (business_id, weekday)
+        LEFT JOIN LATERAL
+            unnest(string_to_array(nullif(d.pattern, ''), ',')) interval_ ON true
+        WHERE d.pattern <> w.pattern
+    """)
+
+    op.drop_table('opening_hours')
+    op.execute(_notify_function(('staff', 'service_categories') + NEW_TABLES))
+    for table in NEW_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_business_changed "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION notify_business_changed()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('opening_hours',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('business_id', sa.UUID(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_opening_hours_business_id_date', 'opening_hours', ['business_id', 'date'], unique=False)
+
+    # Expand the schedule back into per-date rows, from the earliest template
+    # or exception up to 90 days past the later of today and the last exception.
+    op.execute("""
+        WITH span AS (
+            SELECT business_id, min(first) AS first, max(last) AS last
+            FROM (
+                SELECT business_id, coalesce(valid_from, current_date) AS first,
+                       current_date + 90 AS last
+                FROM opening_hour_templates
+                UNION ALL
+                SELECT business_id, date, date + 90
+                FROM opening_hour_exceptions
+            ) bounds
+            GROUP BY business_id
+        ),
+        days AS (
+            SELECT s.business_id, d::date AS date
+            FROM span s, generate_series(s.first, s.last, interval '1 day') d
+        )
+        INSERT INTO opening_hours (business_id, date, start_time, end_time)
+        SELECT e.business_id, e.date, e.start_time, e.end_time
+        FROM days
+        JOIN opening_hour_exceptions e USING (business_id, date)
+        WHERE e.start_time IS NOT NULL
+        UNION ALL
+        SELECT t.business_id, days.date, t.start_time, t.end_time
+        FROM days
+        JOIN opening_hour_templates t
+          ON t.business_id = days.business_id
+         AND t.weekday = extract(isodow FROM days.date)::int - 1
+         AND (t.valid_from IS NULL OR t.valid_from <= days.date)
+         AND (t.valid_until IS NULL OR days.date < t.valid_until)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM opening_hour_exceptions e
+            WHERE e.business_id = days.business_id AND e.date = days.date
+        )
+    """)
+
+    for table in NEW_TABLES:
+        op.execute(f"DROP TRIGGER {table}_business_changed ON {table}")
+    op.execute(_notify_function(('opening_hours', 'staff', 'service_categories')))
+    op.execute(
+        "CREATE TRIGGER opening_hours_business_changed "
+        "AFTER INSERT OR UPDATE OR DELETE ON opening_hours "
+        "FOR EACH ROW EXECUTE FUNCTION notify_business_changed()"
+    )
+    op.drop_index('ix_opening_hour_exceptions_business_id_date', table_name='opening_hour_exceptions')
+    op.drop_table('opening_hour_exceptions')
+    op.drop_index(op.f('ix_opening_hour_templates_business_id'), table_name='opening_hour_templates')
+    op.drop_table('opening_hour_templates')
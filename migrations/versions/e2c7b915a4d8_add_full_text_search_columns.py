@@ -0,0 +1,93 @@
+"""Add full text search columns
+
+Revision ID: e2c7b915a4d8
+Revises: 5ad2f3c8e917
+Create Date: 2026-10-18 13:02:44.690133
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c7b915a4d8'
+down_revision: Union[str, Sequence[str], None] = '5ad2f3c8e917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('service_categories', 'services'):
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(VECTOR, persisted=True), nullable=True))
+        op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], unique=False, postgresql_using='gin')
+
+    op.add_column('businesses', sa.Column('search_document', postgresql.TSVECTOR(), nullable=True))
+
+    # The whole searchable text of one business. Children reach it through
+    # the business_changed triggers, which touch businesses.updated_at on
+    # every child write and so re-run the BEFORE trigger below.
+    op.execute("""
+        CREATE FUNCTION business_search_document(b businesses) RETURNS tsvector AS $$
+            SELECT
+                setweight(to_tsvector('english', coalesce(b.name, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(
+                    (SELECT concat_ws(' ', suburb, city) FROM addresses WHERE id = b.address_id),
+                    ''
+                )), 'B')
+                || setweight(to_tsvector('english', coalesce(
+                    (SELECT string_agg(name, ' ') FROM service_categories WHERE business_id = b.id),
+                    ''
+                )), 'B')
+                || setweight(to_tsvector('english', coalesce(
+                    (SELECT string_agg(s.name, ' ')
+                     FROM services s
+                     JOIN service_categories c ON c.id = s.service_category_id
+                     WHERE c.business_id = b.id),
+                    ''
+                )), 'B')
+                || setweight(to_tsvector('english', concat_ws(' ',
+                    b.description,
+                    (SELECT string_agg(description, ' ') FROM service_categories WHERE business_id = b.id),
+                    (SELECT string_agg(s.description, ' ')
+                     FROM services s
+                     JOIN service_categories c ON c.id = s.service_category_id
+                     WHERE c.business_id = b.id)
+                )), 'D')
+        $$ LANGUAGE sql STABLE
+    """)
+    op.execute("""
+        CREATE FUNCTION refresh_business_search_document() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_document := business_search_document(NEW);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER businesses_search_document "
+        "BEFORE INSERT OR UPDATE ON businesses "
+        "FOR EACH ROW EXECUTE FUNCTION refresh_business_search_document()"
+    )
+    op.execute("UPDATE businesses SET search_document = business_search_document(businesses)")
+    op.create_index('ix_businesses_search_document', 'businesses', ['search_document'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_businesses_search_document', table_name='businesses', postgresql_using='gin')
+    op.execute("DROP TRIGGER businesses_search_document ON businesses")
+    op.execute("DROP FUNCTION refresh_business_search_document()")
+    op.execute("DROP FUNCTION business_search_document(businesses)")
+    op.drop_column('businesses', 'search_document')
+    for table in ('services', 'service_categories'):
+        op.drop_index(f'ix_{table}_search_vector', table_name=table, postgresql_using='gin')
+        op.drop_column(table, 'search_vector')
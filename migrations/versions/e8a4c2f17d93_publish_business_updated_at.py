@@ -0,0 +1,150 @@
+"""Publish businesses.updated_at and touch old parents on moves
+
+Revision ID: e8a4c2f17d93
+Revises: c7e3a9f05b18
+Create Date: 2026-10-18 19:12:40.581736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a4c2f17d93'
+down_revision: Union[str, Sequence[str], None] = 'c7e3a9f05b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tables whose rows carry a business_id, as in revision d58c1e7a9b34
+BUSINESS_TABLES = (
+    'staff',
+    'service_categories',
+    'opening_hour_templates',
+    'opening_hour_exceptions',
+)
+TABLE_LIST = ", ".join(f"'{t}'" for t in BUSINESS_TABLES)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Any UPDATE of a business is a new version of its payload, including
+    # backfills and derived columns that don't set updated_at themselves.
+    # The published version has to be the row's updated_at: the cache
+    # refuses to store anything older than the last version it was sent.
+    op.execute("""
+        CREATE FUNCTION touch_business_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER businesses_touch_updated_at "
+        "BEFORE UPDATE ON businesses "
+        "FOR EACH ROW EXECUTE FUNCTION touch_business_updated_at()"
+    )
+
+    # A child row moved to another parent (staff or a category to another
+    # business, a service to another category) changes both parents, so an
+    # UPDATE touches the businesses of OLD and of NEW. Rows are read as
+    # jsonb since each table has its own parent column.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_business_changed() RETURNS trigger AS $$
+        DECLARE
+            r jsonb;
+            affected uuid[] := '{{}}';
+        BEGIN
+            IF TG_TABLE_NAME = 'businesses' THEN
+                IF TG_OP = 'DELETE' THEN
+                    PERFORM pg_notify(
+                        'business_changed',
+                        json_build_object('id', OLD.id, 'version', now())::text
+                    );
+                ELSE
+                    PERFORM pg_notify(
+                        'business_changed',
+                        json_build_object('id', NEW.id, 'version', NEW.updated_at)::text
+                    );
+                END IF;
+                RETURN NULL;
+            END IF;
+
+            FOREACH r IN ARRAY (CASE TG_OP
+                WHEN 'INSERT' THEN ARRAY[to_jsonb(NEW)]
+                WHEN 'DELETE' THEN ARRAY[to_jsonb(OLD)]
+                ELSE ARRAY[to_jsonb(OLD), to_jsonb(NEW)]
+            END) LOOP
+                IF TG_TABLE_NAME IN ({TABLE_LIST}) THEN
+                    affected := affected || (r->>'business_id')::uuid;
+                ELSIF TG_TABLE_NAME = 'qualifications' THEN
+                    affected := affected || (
+                        SELECT business_id FROM staff
+                        WHERE id = (r->>'staff_id')::uuid
+                    );
+                ELSIF TG_TABLE_NAME = 'services' THEN
+                    affected := affected || (
+                        SELECT business_id FROM service_categories
+                        WHERE id = (r->>'service_category_id')::uuid
+                    );
+                ELSIF TG_TABLE_NAME = 'addresses' THEN
+                    affected := affected || ARRAY(
+                        SELECT id FROM businesses WHERE address_id = (r->>'id')::uuid
+                    );
+                END IF;
+            END LOOP;
+
+            -- locked in id order, so opposite moves between two businesses
+            -- queue rather than deadlock
+            UPDATE businesses SET updated_at = now()
+            WHERE id IN (
+                SELECT id FROM businesses WHERE id = ANY(affected)
+                ORDER BY id FOR UPDATE
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_business_changed() RETURNS trigger AS $$
+        DECLARE
+            r record;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                r := OLD;
+            ELSE
+                r := NEW;
+            END IF;
+
+            IF TG_TABLE_NAME = 'businesses' THEN
+                PERFORM pg_notify(
+                    'business_changed',
+                    json_build_object('id', r.id, 'version', now())::text
+                );
+            ELSIF TG_TABLE_NAME IN ({TABLE_LIST}) THEN
+                UPDATE businesses SET updated_at = now() WHERE id = r.business_id;
+            ELSIF TG_TABLE_NAME = 'qualifications' THEN
+                UPDATE businesses SET updated_at = now()
+                WHERE id = (SELECT business_id FROM staff WHERE id = r.staff_id);
+            ELSIF TG_TABLE_NAME = 'services' THEN
+                UPDATE businesses SET updated_at = now()
+                WHERE id = (
+                    SELECT business_id FROM service_categories
+                    WHERE id = r.service_category_id
+                );
+            ELSIF TG_TABLE_NAME = 'addresses' THEN
+                UPDATE businesses SET updated_at = now() WHERE address_id = r.id;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER businesses_touch_updated_at ON businesses")
+    op.execute("DROP FUNCTION touch_business_updated_at()")
@@ -0,0 +1,229 @@
+"""Assign bookings to staff and keep per-day occupancy bitmaps
+
+Revision ID: f1c86a3e5b27
+Revises: a3e91f5c2d70
+Create Date: 2026-10-18 16:48:05.204917
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c86a3e5b27'
+down_revision: Union[str, Sequence[str], None] = 'a3e91f5c2d70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# cells are wall-clock minutes past local midnight, like opening hours
+BUSINESS_TIMEZONE = os.getenv("BUSINESS_TIMEZONE", "Australia/Sydney")
+
+# A staff member can't be double-booked, nor can a business without staff.
+# A staffed and a staff-less booking never conflict under this key, so a
+# business's bookings must be all one or the other; revision b2d6f4a8c1e9
+# makes staff required once a business has any.
+STAFF_OVERLAP = "coalesce(staff_id, business_id) WITH =, tstzrange(time, ends_at) WITH &&"
+BUSINESS_OVERLAP = "business_id WITH =, tstzrange(time, ends_at) WITH &&"
+
+# create_booking_partition() from revision a3e91f5c2d70, with the exclusion
+# constraint passed in
+PARTITION_FUNCTION = """
+    CREATE OR REPLACE FUNCTION create_booking_partition(month date, tz text)
+    RETURNS text AS $$
+    DECLARE
+        month_start date := date_trunc('month', month)::date;
+        relname text := 'bookings_' || to_char(month_start, 'YYYY_MM');
+    BEGIN
+        IF to_regclass(relname) IS NOT NULL THEN
+            RETURN NULL;
+        END IF;
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF bookings FOR VALUES FROM (%L) TO (%L)',
+            relname,
+            month_start::timestamp AT TIME ZONE tz,
+            (month_start + interval '1 month')::timestamp AT TIME ZONE tz
+        );
+        EXECUTE format(
+            'ALTER TABLE %I ADD CONSTRAINT %I EXCLUDE USING gist ({overlap})',
+            relname,
+            relname || '_no_overlap'
+        );
+        RETURN relname;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+REPLACE_PARTITION_CONSTRAINTS = """
+    DO $$
+    DECLARE
+        relname text;
+    BEGIN
+        FOR relname IN
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'bookings'::regclass
+        LOOP
+            EXECUTE format(
+                'ALTER TABLE %I DROP CONSTRAINT %I, '
+                'ADD CONSTRAINT %I EXCLUDE USING gist ({overlap})',
+                relname,
+                relname || '_no_overlap',
+                relname || '_no_overlap'
+            );
+        END LOOP;
+    END;
+    $$
+"""
+
+
+def _overlap(overlap):
+    op.execute(PARTITION_FUNCTION.format(overlap=overlap))
+    op.execute(REPLACE_PARTITION_CONSTRAINTS.format(overlap=overlap))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('bookings', sa.Column('staff_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('bookings_staff_id_fkey', 'bookings', 'staff', ['staff_id'], ['id'])
+    op.create_index('ix_bookings_staff_id_time', 'bookings', ['staff_id', 'time'], unique=False)
+    _overlap(STAFF_OVERLAP)
+
+    op.create_table('staff_occupancy',
+    sa.Column('staff_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('cells', postgresql.BIT(length=288), nullable=False),
+    sa.ForeignKeyConstraint(['staff_id'], ['staff.id'], ),
+    sa.PrimaryKeyConstraint('staff_id', 'day')
+    )
+
+    # the 5 minute cells of a local day that [starts, ends) touches
+    op.execute("""
+        CREATE FUNCTION occupancy_cells(
+            starts timestamptz, ends timestamptz, day date, tz text
+        ) RETURNS bit(288) AS $$
+        DECLARE
+            midnight timestamp := day::timestamp;
+            first_cell int := greatest(
+                0, floor(extract(epoch FROM (starts AT TIME ZONE tz) - midnight) / 300)
+            );
+            end_cell int := least(
+                288, ceil(extract(epoch FROM (ends AT TIME ZONE tz) - midnight) / 300)
+            );
+        BEGIN
+            IF end_cell <= first_cell THEN
+                RETURN repeat('0', 288)::bit(288);
+            END IF;
+            RETURN (
+                repeat('0', first_cell)
+                || repeat('1', end_cell - first_cell)
+                || repeat('0', 288 - end_cell)
+            )::bit(288);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+
+    # One staff member's day recomputed from their bookings. Used when a
+    # booking goes away: cells can be shared by back-to-back bookings, so
+    # they can't simply be cleared.
+    op.execute("""
+        CREATE FUNCTION rebuild_staff_occupancy(member uuid, local_day date, tz text)
+        RETURNS void AS $$
+        DECLARE
+            day_start timestamptz := local_day::timestamp AT TIME ZONE tz;
+            day_end timestamptz := (local_day + 1)::timestamp AT TIME ZONE tz;
+            occupied bit(288);
+        BEGIN
+            SELECT bit_or(occupancy_cells(b.time, b.ends_at, local_day, tz))
+            INTO occupied
+            FROM bookings b
+            WHERE b.staff_id = member
+              AND b.time > day_start - interval '1 day'
+              AND b.time < day_end
+              AND b.ends_at > day_start;
+
+            IF occupied IS NULL OR occupied = repeat('0', 288)::bit(288) THEN
+                DELETE FROM staff_occupancy o
+                WHERE o.staff_id = member AND o.day = local_day;
+            ELSE
+                INSERT INTO staff_occupancy AS o (staff_id, day, cells)
+                VALUES (member, local_day, occupied)
+                ON CONFLICT ON CONSTRAINT staff_occupancy_pkey
+                DO UPDATE SET cells = EXCLUDED.cells;
+            END IF;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # A new booking ORs its cells into the day; a cancelled or changed one
+    # rebuilds the day. Writers of the same staff member and day take an
+    # advisory lock first, so a rebuild can't miss a booking committed while
+    # it ran.
+    op.execute("""
+        CREATE FUNCTION sync_staff_occupancy() RETURNS trigger AS $$
+        DECLARE
+            tz text := TG_ARGV[0];
+            local_day date;
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.staff_id IS NOT NULL THEN
+                FOR local_day IN
+                    SELECT generate_series(
+                        (OLD.time AT TIME ZONE tz)::date,
+                        (OLD.ends_at AT TIME ZONE tz - interval '1 microsecond')::date,
+                        interval '1 day'
+                    )::date
+                LOOP
+                    PERFORM pg_advisory_xact_lock(
+                        hashtextextended(OLD.staff_id::text || local_day::text, 0)
+                    );
+                    PERFORM rebuild_staff_occupancy(OLD.staff_id, local_day, tz);
+                END LOOP;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.staff_id IS NOT NULL THEN
+                FOR local_day IN
+                    SELECT generate_series(
+                        (NEW.time AT TIME ZONE tz)::date,
+                        (NEW.ends_at AT TIME ZONE tz - interval '1 microsecond')::date,
+                        interval '1 day'
+                    )::date
+                LOOP
+                    PERFORM pg_advisory_xact_lock(
+                        hashtextextended(NEW.staff_id::text || local_day::text, 0)
+                    );
+                    INSERT INTO staff_occupancy AS o (staff_id, day, cells)
+                    VALUES (
+                        NEW.staff_id,
+                        local_day,
+                        occupancy_cells(NEW.time, NEW.ends_at, local_day, tz)
+                    )
+                    ON CONFLICT ON CONSTRAINT staff_occupancy_pkey
+                    DO UPDATE SET cells = o.cells | EXCLUDED.cells;
+                END LOOP;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER bookings_staff_occupancy "
+        "AFTER INSERT OR UPDATE OF staff_id, time, ends_at OR DELETE ON bookings "
+        f"FOR EACH ROW EXECUTE FUNCTION sync_staff_occupancy('{BUSINESS_TIMEZONE}')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER bookings_staff_occupancy ON bookings")
+    op.execute("DROP FUNCTION sync_staff_occupancy()")
+    op.execute("DROP FUNCTION rebuild_staff_occupancy(uuid, date, text)")
+    op.execute("DROP FUNCTION occupancy_cells(timestamptz, timestamptz, date, text)")
+    op.drop_table('staff_occupancy')
+
+    _overlap(BUSINESS_OVERLAP)
+    op.drop_index('ix_bookings_staff_id_time', table_name='bookings')
+    op.drop_constraint('bookings_staff_id_fkey', 'bookings', type_='foreignkey')
+    op.drop_column('bookings', 'staff_id')
@@ -1,11 +1,14 @@
+import argparse
 import os
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 from decimal import Decimal
 from app.database import SessionLocal
+from app.partitions import ensure_partitions
 from app.models import (
     Address,
     Business,
-    OpeningHour,
+    OpeningHourTemplate,
+    OpeningHourException,
     Staff,
     Qualification,
     ServiceCategory,
@@ -79,19 +82,23 @@ def seed():
         # ------------------------------------------------------------------
         # Opening Hours
         # ------------------------------------------------------------------
+        # Mon 9-5 and Tue 11-7 every week, closed Monday 29 December
         opening_hours = [
-            OpeningHour(
+            OpeningHourTemplate(
                 business=business,
-                date=date(2025, 12, 1),
+                weekday=0,
                 start_time=time(9, 0),
                 end_time=time(17, 0),
+                valid_from=date(2025, 12, 1),
             ),
-            OpeningHour(
+            OpeningHourTemplate(
                 business=business,
-                date=date(2025, 12, 2),
+                weekday=1,
                 start_time=time(11, 0),
                 end_time=time(19, 0),
+                valid_from=date(2025, 12, 1),
             ),
+            OpeningHourException(business=business, date=date(2025, 12, 29)),
         ]
         session.add_all(opening_hours)
 
@@ -144,8 +151,6 @@ def seed():
             name="Brows",
             description="Brow shaping, tinting and lamination services.",
             images=["service-categories/brows.jpg"],
-            price_from=60,
-            duration_range="30–75 mins",
             business_id=business.id,
         )
 
@@ -153,8 +158,6 @@ def seed():
             name="Lashes",
             description="Lash lifts and tints for a natural, lifted look.",
             images=["service-categories/lashes.jpg"],
-            price_from=80,
-            duration_range="45–90 mins",
             business_id=business.id,
         )
 
@@ -162,8 +165,6 @@ def seed():
             name="Facials",
             description="Skin treatments tailored to your skin type.",
             images=["service-categories/facials.jpg"],
-            price_from=100,
-            duration_range="60–90 mins",
             business_id=business.id,
         )
 
@@ -237,18 +238,24 @@ def seed():
         # ------------------------------------------------------------------
         # Bookings (with many-to-many Services)
         # ------------------------------------------------------------------
+        ensure_partitions(session, date(2025, 12, 1), date(2025, 12, 1))
+
         booking_1 = Booking(
             time=datetime(2025, 12, 1, 10, 0),
+            ends_at=datetime(2025, 12, 1, 10, 0) + timedelta(minutes=45 + 60),
             user=user_1,
             business=business,
+            staff_id=staff_1.id,
         )
 
         booking_1.services = [brow_shape_tint, lash_lift]
 
         booking_2 = Booking(
             time=datetime(2025, 12, 2, 13, 30),
+            ends_at=datetime(2025, 12, 2, 13, 30) + timedelta(minutes=75),
             user=user_2,
             business=business,
+            staff_id=staff_2.id,
         )
 
         booking_2.services = [signature_facial]
@@ -288,4 +295,38 @@ def seed():
 
 
 if __name__ == "__main__":
-    seed()
+    parser = argparse.ArgumentParser(
+        description="Insert the demo business, or a generated dataset with --scale."
+    )
+    parser.add_argument(
+        "--scale", type=int, metavar="N", help="generate N businesses via COPY"
+    )
+    parser.add_argument("--users", type=int, help="default: 10 per business")
+    parser.add_argument("--bookings-per-business", type=int, default=100)
+    parser.add_argument("--days", type=int, default=56)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--today",
+        type=date.fromisoformat,
+        help="centre of the booking calendar, YYYY-MM-DD (default: datagen.ANCHOR)",
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.scale:
+        from datagen import ANCHOR, Scale, load
+
+        try:
+            scale = Scale(
+                businesses=args.scale,
+                users=args.users or args.scale * 10,
+                bookings_per_business=args.bookings_per_business,
+                days=args.days,
+                seed=args.seed,
+                today=args.today or ANCHOR,
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+        load(scale, jobs=args.jobs)
+    else:
+        seed()